@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Active learning over composition space: choose the next compositions to simulate.
+
+A Gaussian process with an ARD squared-exponential kernel is fitted per
+target (γISF and FCC E/atom) over (x, y, T). (x, y) is the barycentric
+position in the ternary triangle, and T is scaled to kK. Candidates lie on a
+0.05 ternary grid, so file names stay unique at two decimals. A composition is
+scored, summed over all temperatures, by one of:
+    imse  the variance it would remove over the whole map (default)
+    std   its own normalised predictive std
+    ei    expected improvement towards low γISF
+A batch is picked greedily.
+After each pick the GP is conditioned on its own mean there ("kriging
+believer"): the variance ignores y, so later picks spread out. New
+observations are appended by extending the Cholesky factor. The
+hyperparameters are re-optimised with a warm start plus a few fixed restarts.
+A linear trend in (x, y, T) is removed first.
+
+    python active.py --batch 6            # propose from sfe_results.csv + energies, write work/data
+    python active.py --batch 6 --run      # … and run them via run_all's scheduler
+    python active.py --demo               # end-to-end loop against an analytic stand-in
+"""
+
+import os, time, argparse
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_solve, cholesky, solve_triangular
+from scipy.optimize import minimize
+from scipy.stats import norm
+
+import generate
+from ternary import barycentric
+
+TEMPS   = [100, 350, 550]   # same sweep as run_all.TEMPS
+STEP    = 0.05
+TARGETS = ["γISF", "E_per_atom"]
+
+# ------------------ Gaussian process ------------------
+class GP:
+    """GP on standardised residuals of a linear trend; ARD RBF kernel plus white noise."""
+
+    def __init__(self, lengths=(0.3, 0.3, 0.3), signal=1.0, noise=1e-2):
+        self.theta = np.log(np.r_[lengths, signal, noise])
+        self.X = self.y = self.L = None
+
+    def kernel(self, A, B, theta=None):
+        th = self.theta if theta is None else theta
+        ls, sf = np.exp(th[:-2]), np.exp(th[-2])
+        d = (A[:, None, :] - B[None, :, :]) / ls
+        return sf**2 * np.exp(-0.5 * np.einsum("ijk,ijk->ij", d, d))
+
+    def _nll(self, theta, X, y):
+        K = self.kernel(X, X, theta) + (np.exp(theta[-1]) ** 2 + 1e-8) * np.eye(len(X))
+        try:
+            L = cholesky(K, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e10
+        a = cho_solve((L, True), y)
+        return 0.5 * y @ a + np.log(np.diag(L)).sum()
+
+    def trend(self, X):
+        return np.column_stack([np.ones(len(X)), X]) @ self.beta
+
+    def fit(self, X, y, optimize=True, restarts=3):
+        self.X = np.asarray(X, dtype=float)
+        self.y_raw = np.asarray(y, dtype=float)
+        A = np.column_stack([np.ones(len(self.X)), self.X])
+        self.beta = np.linalg.lstsq(A, self.y_raw, rcond=None)[0] if len(self.X) > A.shape[1] else \
+            np.r_[self.y_raw.mean(), np.zeros(self.X.shape[1])]
+        r = self.y_raw - self.trend(self.X)
+        self.sd = r.std() or 1.0
+        self.y = r / self.sd
+        if optimize and len(self.X) > 3:
+            # length scales ≥ ~1.5 grid steps; noise ≥ 1 % of the residual spread
+            bounds = [(np.log(0.08), np.log(5.0))] * (len(self.theta) - 2) + [(np.log(0.1), np.log(10.0)),
+                                                                              (np.log(1e-2), np.log(0.5))]
+            starts = [self.theta] + [np.log(np.r_[[l] * (len(self.theta) - 2), 1.0, 0.05]) for l in (0.15, 0.5, 1.5)[:restarts]]
+            best = min((minimize(self._nll, np.clip(t0, *np.array(bounds).T), args=(self.X, self.y),
+                                 method="L-BFGS-B", bounds=bounds) for t0 in starts), key=lambda r: r.fun)
+            self.theta = best.x
+        self._factor()
+        return self
+
+    def _factor(self):
+        K = self.kernel(self.X, self.X) + (np.exp(self.theta[-1]) ** 2 + 1e-8) * np.eye(len(self.X))
+        self.L = cholesky(K, lower=True)
+        self.alpha = cho_solve((self.L, True), self.y)
+
+    def add(self, X, y):
+        """Condition on new points by extending the Cholesky factor (no refit)."""
+        X = np.atleast_2d(X)
+        y_raw = np.atleast_1d(y)
+        y = (y_raw - self.trend(X)) / self.sd
+        B = solve_triangular(self.L, self.kernel(self.X, X), lower=True)
+        Knn = self.kernel(X, X) + (np.exp(self.theta[-1]) ** 2 + 1e-8) * np.eye(len(X))
+        C = cholesky(Knn - B.T @ B, lower=True)
+        n, m = len(self.X), len(X)
+        L = np.zeros((n + m, n + m))
+        L[:n, :n], L[n:, :n], L[n:, n:] = self.L, B.T, C
+        self.L, self.X, self.y = L, np.vstack([self.X, X]), np.r_[self.y, y]
+        self.y_raw = np.r_[self.y_raw, y_raw]
+        self.alpha = cho_solve((self.L, True), self.y)
+        return self
+
+    def predict(self, Xs):
+        """(mean, std) in the original units."""
+        Ks = self.kernel(np.atleast_2d(Xs), self.X)
+        mean = Ks @ self.alpha
+        v = solve_triangular(self.L, Ks.T, lower=True)
+        var = np.maximum(np.exp(self.theta[-2]) ** 2 - np.einsum("ij,ij->j", v, v), 1e-12)
+        return mean * self.sd + self.trend(np.atleast_2d(Xs)), np.sqrt(var) * self.sd
+
+    def covariance(self, A, B):
+        """Posterior covariance between point sets A and B (standardised units)."""
+        Va = solve_triangular(self.L, self.kernel(self.X, A), lower=True)
+        Vb = solve_triangular(self.L, self.kernel(self.X, B), lower=True)
+        return self.kernel(A, B) - Va.T @ Vb
+
+    def copy(self):
+        g = GP()
+        g.__dict__ = {k: (v.copy() if isinstance(v, np.ndarray) else v) for k, v in self.__dict__.items()}
+        return g
+
+# ------------------ Composition space ------------------
+def features(Co, Fe, Ni, T):
+    x, y = barycentric(np.asarray(Co, float), np.asarray(Fe, float), np.asarray(Ni, float))
+    return np.column_stack([x, y, np.asarray(T, float) / 1000.0])
+
+def candidate_grid(step=STEP):
+    """All (Co, Fe, Ni) on the ternary grid with spacing `step`."""
+    n = int(round(1 / step))
+    i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1), indexing="ij")
+    m = i + j <= n
+    co, fe = i[m] * step, j[m] * step
+    return np.round(np.column_stack([co, fe, 1 - co - fe]), 4)
+
+def expand_T(comps, temps=TEMPS):
+    c = np.repeat(comps, len(temps), axis=0)
+    t = np.tile(temps, len(comps))
+    return features(c[:, 0], c[:, 1], c[:, 2], t)
+
+# ------------------ Acquisition ------------------
+def propose(models, comps, done, batch, temps=TEMPS, acq="imse"):
+    """Greedy batch of candidate compositions (indices into comps), kriging believer."""
+    models = {k: m.copy() for k, m in models.items()}
+    Xc = expand_T(comps, temps)
+    chosen = []
+    free = np.ones(len(comps), dtype=bool)
+    for c in done:
+        free &= ~np.all(np.isclose(comps, c, atol=1e-6), axis=1)
+    for _ in range(batch):
+        score = np.zeros(len(comps))
+        for name, gp in models.items():
+            mean, std = gp.predict(Xc)
+            std = std.reshape(len(comps), len(temps)) / gp.sd
+            if acq == "imse":
+                # variance removed over the whole map by observing each candidate
+                C = gp.covariance(Xc, Xc)
+                noise = np.exp(gp.theta[-1]) ** 2
+                red = (C**2).sum(axis=0) / (np.diag(C) + noise)
+                score += red.reshape(len(comps), len(temps)).sum(axis=1)
+            elif acq == "ei" and name == "γISF":
+                best = gp.y_raw.min()
+                z = (best - mean.reshape(std.shape)) / (std * gp.sd)
+                ei = (best - mean.reshape(std.shape)) * norm.cdf(z) + std * gp.sd * norm.pdf(z)
+                score += ei.sum(axis=1) / gp.sd
+            else:
+                score += std.sum(axis=1)
+        score[~free] = -np.inf
+        k = int(np.argmax(score))
+        if not np.isfinite(score[k]):
+            break
+        chosen.append(k)
+        free[k] = False
+        Xk = expand_T(comps[k:k + 1], temps)
+        for gp in models.values():
+            gp.add(Xk, gp.predict(Xk)[0])
+    return chosen
+
+# ------------------ Observations ------------------
+def observations(sfe="sfe_results.csv"):
+    """{target: DataFrame(Co, Fe, Ni, Temperature, value)} from the current results."""
+    import harvest
+    obs = {}
+    if os.path.exists(sfe):
+        d = pd.read_csv(sfe).dropna(subset=["γISF"])
+        obs["γISF"] = d[["Co", "Fe", "Ni", "Temperature", "γISF"]].rename(columns={"γISF": "value"})
+    try:
+        e = harvest.read_energies()
+        e = e[e["Structure"].str.upper() == "FCC"]
+        obs["E_per_atom"] = e[["Co", "Fe", "Ni", "Temperature", "E_per_atom"]].rename(columns={"E_per_atom": "value"})
+    except FileNotFoundError:
+        pass
+    return obs
+
+def fit_models(obs, models=None):
+    models = models or {}
+    for name, d in obs.items():
+        gp = models.get(name, GP())
+        gp.fit(features(d.Co, d.Fe, d.Ni, d.Temperature), d.value.values)
+        models[name] = gp
+    return models
+
+# ------------------ Analytic stand-in ------------------
+def analytic(Co, Fe, Ni, T):
+    """Smooth γISF (mJ/m²) and E/atom (eV) surrogate with a low-SFE valley near Co-rich alloys."""
+    Co, Fe, Ni, T = (np.asarray(v, float) for v in (Co, Fe, Ni, T))
+    g = (-30 * Co + 60 * Fe + 125 * Ni + 140 * Co * Ni - 90 * Fe * Ni + 220 * Co * Fe * Ni
+         - 60 * np.exp(-((Co - 0.7) ** 2 + (Ni - 0.25) ** 2) / 0.02) + 0.05 * T * (1 + Co))
+    e = -4.41 * Co - 4.40 * Fe - 4.45 * Ni - 0.03 * Fe * Ni + 0.02 * Co * Fe + 1.3e-4 * T
+    return g, e
+
+def demo(batch=4, rounds=20, target=2.5, seed=0, refit_every=1):
+    """Closed loop against `analytic`; RMSE of the γISF map vs the 20 fixed points + RBF."""
+    from scipy.interpolate import RBFInterpolator
+    rng = np.random.default_rng(seed)
+    comps = candidate_grid()
+    test = candidate_grid(0.025)
+    Xt = expand_T(test)
+    g_true, _ = analytic(*np.repeat(test, len(TEMPS), axis=0).T, np.tile(TEMPS, len(test)))
+
+    def run(cs):
+        c = np.repeat(cs, len(TEMPS), axis=0)
+        t = np.tile(TEMPS, len(cs))
+        g, e = analytic(c[:, 0], c[:, 1], c[:, 2], t)
+        g = g + rng.normal(0, 1.0, len(g))
+        return features(c[:, 0], c[:, 1], c[:, 2], t), {"γISF": g, "E_per_atom": e}
+
+    # baseline: the 20 hand-picked compositions, RBF per temperature
+    fixed = np.array([[c["Co"], c["Fe"], c["Ni"]] for c in generate.COMPOSITIONS])
+    Xf, yf = run(fixed)
+    pred = np.empty(len(Xt))
+    for k, T in enumerate(TEMPS):
+        m, mt = Xf[:, 2] == T / 1000.0, Xt[:, 2] == T / 1000.0
+        pred[mt] = RBFInterpolator(Xf[m, :2], yf["γISF"][m], kernel="thin_plate_spline")(Xt[mt, :2])
+    rmse_fixed = np.sqrt(np.mean((pred - g_true) ** 2))
+    print(f"baseline: {len(fixed)} compositions ({len(fixed) * len(TEMPS)} jobs/phase), RBF RMSE = {rmse_fixed:.2f} mJ/m²")
+
+    # active loop: corners + centre, then batches
+    seed_c = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [0.35, 0.35, 0.3]])
+    X, y = run(seed_c)
+    models = {k: GP().fit(X, v) for k, v in y.items()}
+    done = list(seed_c)
+    for r in range(1, rounds + 1):
+        t0 = time.time()
+        pick = propose(models, comps, done, batch)
+        Xn, yn = run(comps[pick])
+        done += list(comps[pick])
+        for k, gp in models.items():
+            if r % refit_every == 0:
+                gp.fit(np.vstack([gp.X, Xn]), np.r_[gp.y_raw, yn[k]])
+            else:
+                gp.add(Xn, yn[k])
+        rmse = np.sqrt(np.mean((models["γISF"].predict(Xt)[0] - g_true) ** 2))
+        print(f"round {r:2d}: {len(done):3d} compositions, γISF RMSE = {rmse:6.2f} mJ/m²  ({time.time() - t0:.2f} s)")
+        if rmse < target:
+            break
+    print(f"✅ {len(done)} compositions reach RMSE {rmse:.2f} (fixed set: {len(fixed)} → {rmse_fixed:.2f})")
+
+# ------------------ Driver ------------------
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=6)
+    ap.add_argument("--acq", choices=["imse", "std", "ei"], default="imse")
+    ap.add_argument("--run", action="store_true", help="run the new jobs with run_all's scheduler")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--demo", action="store_true", help="closed loop against the analytic stand-in")
+    args = ap.parse_args()
+
+    if args.demo:
+        demo(batch=args.batch)
+        return
+
+    obs = observations()
+    if not obs:
+        raise SystemExit("No sfe_results.csv / energies yet — run the fixed sweep first.")
+    models = fit_models(obs)
+    done = np.unique(np.concatenate([d[["Co", "Fe", "Ni"]].to_numpy() for d in obs.values()]), axis=0)
+    comps = candidate_grid()
+    pick = propose(models, comps, done, args.batch, acq=args.acq)
+    new = [dict(zip(generate.LABELS, map(float, comps[k]))) for k in pick]
+    for c in new:
+        print(f"→ {generate.fname_base('fcc', c)[4:]}")
+
+    os.makedirs(generate.OUT_DIR, exist_ok=True)
+    eos = generate.read_eos()     # eos.py scan / Vegard seeds, nominal PHASES otherwise
+    for phase in generate.PHASES:
+        generate.write_phase(phase, new, out_dir=generate.OUT_DIR, eos=eos)
+    print(f"✅ Wrote {len(new) * len(generate.PHASES)} structures to {generate.OUT_DIR}/")
+
+    if args.run:
+        import run_all
+        bases = {generate.fname_base(p, c) for p in generate.PHASES for c in new}
+        jobs = [j for j in run_all.collect_jobs() if os.path.splitext(os.path.basename(j[1]))[0] in bases]
+        n, ok, mins = run_all.run_scheduled(jobs, args.workers, cache=run_all.jobcache.Cache())
+        print(f"✅ {ok}/{n} new jobs finished ({mins:.1f} job-min); re-harvest and rerun to continue")
+
+if __name__ == "__main__":
+    main()
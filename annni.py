@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ANNNI fast-path stacking-fault energies from the bulk FCC/HCP/DHCP energies.
+
+Fitting the axial next-nearest-neighbour Ising model (J1, J2; J3 = 0) to the
+three per-atom energies at each (Co, Fe, Ni, T) gives
+
+    γISF  = (E_hcp + 2 E_dhcp − 3 E_fcc) / A
+    γESF  = 4 (E_dhcp − E_fcc) / A
+    γTwin = 2 (E_dhcp − E_fcc) / A          (per twin boundary)
+
+with A = √3 a² / 4 the (111) area per atom. The FCC lattice constant comes
+from lattice_results.csv (FCC run, else √2·a of the HCP/DHCP run at the same
+point, else generate.PHASES). Errors are propagated linearly from the replica
+spread (standard error) of each bulk energy. They are NaN where a phase has
+only one replica.
+
+Outputs:
+    sfe_results.csv    Co,Fe,Ni,Temperature,γISF,γESF,γTwin,γ*_err,a,c,Method  (mJ/m²)
+"""
+
+import os, time, argparse
+import numpy as np
+import pandas as pd
+
+import generate
+from sfe import EV_A2_TO_MJ_M2, DECK_CELLS
+
+KEYS = ["Co", "Fe", "Ni", "Temperature"]
+PHASES = ["FCC", "HCP", "DHCP"]
+
+def normalise(df):
+    df = df.copy()
+    df["Structure"] = df["Structure"].str.upper().str.strip()
+    for el in ("Co", "Fe", "Ni"):
+        df[el] = df[el].round(2)
+    df["Temperature"] = df["Temperature"].astype(int)
+    return df
+
+def bulk_energies(path="potential_energy_all.csv"):
+    """Wide table: E_<phase> (replica mean) and dE_<phase> (standard error)."""
+    df = normalise(pd.read_csv(path))
+    g = df.groupby(["Structure"] + KEYS)["E_per_atom"].agg(["mean", "std", "count"])
+    g["sem"] = g["std"] / np.sqrt(g["count"])
+    wide = g[["mean", "sem"]].unstack("Structure")
+    wide.columns = [("E_" if stat == "mean" else "dE_") + st for stat, st in wide.columns]
+    return wide.dropna(subset=[f"E_{p}" for p in PHASES]).reset_index()
+
+def fcc_lattice(path="lattice_results.csv"):
+    """FCC lattice constant per (Co, Fe, Ni, T) from the MD lattice vectors."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=KEYS + ["a"])
+    df = normalise(pd.read_csv(path)).dropna(subset=["a1"])
+    scale = DECK_CELLS / generate.N_SUPERCELL
+    # a1 = Lx/8: conventional a for FCC, in-plane a_hex (= a/√2) for HCP/DHCP
+    df["a"] = df["a1"] * scale * np.where(df["Structure"] == "FCC", 1.0, np.sqrt(2.0))
+    df["rank"] = df["Structure"].map({p: k for k, p in enumerate(PHASES)})
+    return df.sort_values("rank").drop_duplicates(KEYS)[KEYS + ["a"]]
+
+def annni(bulk, lattice, a_default=generate.PHASES["fcc"]["a"]):
+    """Vectorized ANNNI SFEs for every row of the bulk-energy table."""
+    out = bulk.merge(lattice, on=KEYS, how="left")
+    out["a"] = out["a"].fillna(a_default)
+    area = np.sqrt(3.0) / 4.0 * out["a"] ** 2
+    k = EV_A2_TO_MJ_M2 / area
+
+    ef, eh, ed = out["E_FCC"], out["E_HCP"], out["E_DHCP"]
+    sf, sh, sd = out["dE_FCC"], out["dE_HCP"], out["dE_DHCP"]
+    out["γISF"] = k * (eh + 2 * ed - 3 * ef)
+    out["γESF"] = k * 4 * (ed - ef)
+    out["γTwin"] = k * 2 * (ed - ef)
+    out["γISF_err"] = k * np.sqrt(sh**2 + 4 * sd**2 + 9 * sf**2)
+    out["γESF_err"] = k * 4 * np.sqrt(sd**2 + sf**2)
+    out["γTwin_err"] = k * 2 * np.sqrt(sd**2 + sf**2)
+    out["c"] = out["a"]
+    out["Method"] = "annni"
+    cols = KEYS + ["γISF", "γESF", "γTwin", "γISF_err", "γESF_err", "γTwin_err", "a", "c", "Method"]
+    return out[cols].sort_values(KEYS).reset_index(drop=True)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--energies", default="potential_energy_all.csv")
+    ap.add_argument("--lattice", default="lattice_results.csv")
+    ap.add_argument("--out", default="sfe_results.csv")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    res = annni(bulk_energies(args.energies), fcc_lattice(args.lattice))
+    dt = time.perf_counter() - t0
+    res.to_csv(args.out, index=False)
+    print(f"✅ ANNNI SFEs for {len(res)} (composition, T) points in {1e3 * dt:.1f} ms → {args.out}")
+
+if __name__ == "__main__":
+    main()
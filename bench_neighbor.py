@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scaling benchmark for neighbor.py: build time and peak memory from 10^3 to
+10^6 atoms. It runs on cubic FCC and on the skewed triclinic HCP cell that
+generate.py writes.
+
+Output:
+    neighbor_benchmark.csv
+"""
+
+import time, argparse, tracemalloc
+import numpy as np
+import pandas as pd
+from ase.build import bulk
+from neighbor import build
+
+CUTOFF = 5.80375 + 0.3  # setfl cutoff + default skin
+
+def cell_for(phase, n_target):
+    """Roughly cubic supercell of `phase` with ~n_target atoms."""
+    if phase == "fcc":
+        unit = bulk("Ni", "fcc", a=3.55, cubic=True)
+    else:
+        unit = bulk("Ni", "hcp", a=2.50, c=2.50 * 1.633)
+    lengths = unit.cell.lengths()
+    scale = (n_target / len(unit) * np.prod(lengths)) ** (1 / 3)
+    reps = np.maximum(1, np.round(scale / lengths)).astype(int)
+    atoms = unit.repeat(tuple(reps))
+    atoms.rattle(0.05, seed=0)
+    return atoms
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=float, nargs="+", default=[1e3, 1e4, 1e5, 1e6])
+    ap.add_argument("--out", default="neighbor_benchmark.csv")
+    args = ap.parse_args()
+
+    rows = []
+    for phase in ("fcc", "hcp"):
+        for n in args.sizes:
+            atoms = cell_for(phase, int(n))
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            offsets, indices, _ = build(atoms.positions, atoms.cell, CUTOFF, atoms.pbc)
+            dt = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rows.append({
+                "Structure": phase.upper(), "N": len(atoms), "pairs": len(indices),
+                "build_s": dt, "us_per_atom": 1e6 * dt / len(atoms), "peak_MB": peak / 2**20,
+            })
+            r = rows[-1]
+            print(f"{r['Structure']:<4} N={r['N']:>8d}  pairs={r['pairs']:>10d}  "
+                  f"{r['build_s']:8.3f} s  {r['us_per_atom']:6.2f} µs/atom  peak {r['peak_MB']:8.1f} MB")
+
+    pd.DataFrame(rows).to_csv(args.out, index=False)
+    print(f"✅ Saved: {args.out}")
+
+if __name__ == "__main__":
+    main()
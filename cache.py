@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed result cache for run_all.py jobs.
+
+A job's key is the SHA-256 of everything that determines its output:
+
+    data file bytes · deck text after ${VAR} substitution · setfl bytes
+    · LAMMPS version banner · extra options (e.g. monitor tolerances)
+
+Path-only variables (DATA, OUTDIR) are substituted by placeholders, so moving
+the tree does not invalidate the cache. An entry work/cache/<k[:2]>/<k>/ holds
+the log, meta.json (FINAL_* values) and the job's final_*.data /
+monitor_*.json. Entries are staged in a private temp dir and published with
+one atomic rename, so concurrent writers of the same key cannot corrupt each
+other; the first to publish wins. A hit touches the entry (LRU order).
+`evict()` drops the bulky final_*.data dumps of the least recently used entries
+until the cache fits its byte budget. Logs and meta are kept, but `restore()`
+of an entry without its dump is a miss: the job reruns, and its put() puts the
+dump back.
+
+    python cache.py            # size / entry summary
+    python cache.py --evict 2  # shrink dumps to 2 GB
+"""
+
+import os, re, glob, json, time, uuid, shutil, hashlib, argparse, subprocess
+
+ROOT      = os.path.abspath(os.path.dirname(__file__))
+CACHE_DIR = os.path.join(ROOT, "work", "cache")
+MAX_BYTES = 5 << 30
+BULKY     = "final_*.data"
+
+VAR_RE  = re.compile(r"\$\{(\w+)\}|\$(\w)")
+PAIR_RE = re.compile(r"^\s*pair_coeff\s+\S+\s+\S+\s+(\S+)", re.M)
+PATH_VARS = ("DATA", "OUTDIR", "LOGDIR", "BASE")
+
+_file_hashes, _versions = {}, {}
+
+# ------------------ Key ingredients ------------------
+def file_hash(path):
+    """SHA-256 of a file, memoized on (path, mtime, size)."""
+    st = os.stat(path)
+    memo = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if memo not in _file_hashes:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        _file_hashes[memo] = h.hexdigest()
+    return _file_hashes[memo]
+
+def substitute(deck_text, variables):
+    """Deck text with ${VAR}/$V replaced; path variables become placeholders."""
+    def sub(m):
+        name = m.group(1) or m.group(2)
+        if name in PATH_VARS:
+            return f"<{name}>"
+        return str(variables.get(name, m.group(0)))
+    return VAR_RE.sub(sub, deck_text)
+
+def setfl_path(deck_path, deck_text):
+    """Potential file named in pair_coeff, resolved like LAMMPS would (cwd first)."""
+    from eam import SETFL
+    m = PAIR_RE.search(deck_text)
+    if m:
+        for base in (os.getcwd(), os.path.dirname(os.path.abspath(deck_path))):
+            p = os.path.join(base, m.group(1))
+            if os.path.exists(p):
+                return p
+    return SETFL
+
+def lammps_version(lmp):
+    """First banner line of `lmp -h` (falls back to the executable's identity)."""
+    if lmp not in _versions:
+        try:
+            out = subprocess.run([lmp, "-h"], capture_output=True, text=True, timeout=30).stdout
+            line = next((l for l in out.splitlines() if "LAMMPS" in l or "Large-scale" in l), "")
+        except (OSError, subprocess.SubprocessError):
+            line = ""
+        if not line:
+            try:
+                st = os.stat(shutil.which(lmp) or lmp)
+                line = f"{lmp}:{st.st_size}:{st.st_mtime_ns}"
+            except OSError:
+                line = lmp
+        _versions[lmp] = line.strip()
+    return _versions[lmp]
+
+def job_key(data_path, deck_path, variables, lmp, extra=None):
+    deck_text = open(deck_path, errors="ignore").read()
+    parts = {
+        "data": file_hash(data_path),
+        "deck": hashlib.sha256(substitute(deck_text, variables).encode()).hexdigest(),
+        "setfl": file_hash(setfl_path(deck_path, deck_text)),
+        "lammps": lammps_version(lmp),
+        "extra": extra or {},
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+# ------------------ Store ------------------
+class Cache:
+    """Directory of immutable, atomically published job entries."""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root, self.max_bytes = root, max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def entry(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        """Entry dir of a complete entry (touched for LRU), else None."""
+        d = self.entry(key)
+        if not os.path.exists(os.path.join(d, "meta.json")):
+            return None
+        try:
+            os.utime(d)
+        except OSError:
+            return None
+        return d
+
+    def meta(self, key):
+        with open(os.path.join(self.entry(key), "meta.json")) as fh:
+            return json.load(fh)
+
+    def put(self, key, log, files=(), meta=None):
+        """Publish log + files under key; returns False if another writer won.
+
+        An existing entry only gets back the files evict() removed from it.
+        """
+        final = self.entry(key)
+        if os.path.exists(final):
+            self._refill(final, files)
+            return False
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        tmp = f"{final}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(tmp)
+        try:
+            shutil.copy2(log, os.path.join(tmp, "log"))
+            kept = []
+            for f in files:
+                if os.path.exists(f):
+                    shutil.copy2(f, os.path.join(tmp, os.path.basename(f)))
+                    kept.append(os.path.basename(f))
+            with open(os.path.join(tmp, "meta.json"), "w") as fh:
+                json.dump({"created": time.time(), **(meta or {}), "files": kept}, fh, indent=1)
+            os.rename(tmp, final)
+            return True
+        except OSError:
+            return False  # lost the race (final exists) or disk trouble; entry stays absent
+        finally:
+            if os.path.exists(tmp):
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    def _refill(self, d, files):
+        for f in files:
+            dst = os.path.join(d, os.path.basename(f))
+            if os.path.exists(f) and not os.path.exists(dst):
+                tmp = f"{dst}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                try:
+                    shutil.copy2(f, tmp)
+                    os.replace(tmp, dst)
+                except OSError:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+
+    def restore(self, key, log, outdir):
+        """Copy a cached entry back to the job's log path and results dir.
+
+        False (nothing restored) when meta.json lists no files or one of them is
+        gone (evicted dump): the caller treats it as a miss and reruns the job.
+        """
+        d = self.entry(key)
+        try:
+            names = self.meta(key).get("files")
+        except (OSError, ValueError):
+            return False
+        if names is None or not all(os.path.exists(os.path.join(d, f)) for f in names):
+            return False
+        os.makedirs(outdir, exist_ok=True)
+        try:
+            for f in names:
+                shutil.copy2(os.path.join(d, f), os.path.join(outdir, f))
+            shutil.copy2(os.path.join(d, "log"), log)
+        except FileNotFoundError:
+            return False    # evicted concurrently
+        return True
+
+    def entries(self):
+        return [d for d in glob.glob(os.path.join(self.root, "??", "*")) if ".tmp-" not in d]
+
+    def bulky_bytes(self):
+        return sum(os.path.getsize(f) for f in glob.glob(os.path.join(self.root, "??", "*", BULKY)))
+
+    def evict(self, max_bytes=None):
+        """Drop final_*.data of least recently used entries until under budget."""
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        dumps = []
+        for d in self.entries():
+            try:
+                used = os.stat(d).st_mtime
+            except FileNotFoundError:
+                continue
+            for f in glob.glob(os.path.join(d, BULKY)):
+                dumps.append((used, f, os.path.getsize(f)))
+        total = sum(s for _, _, s in dumps)
+        freed = 0
+        for _, f, size in sorted(dumps):
+            if total - freed <= budget:
+                break
+            try:
+                os.remove(f)
+                freed += size
+            except FileNotFoundError:
+                pass
+        return freed
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--root", default=CACHE_DIR)
+    ap.add_argument("--evict", type=float, metavar="GB", help="shrink final_*.data dumps to this size")
+    args = ap.parse_args()
+
+    cache = Cache(args.root)
+    if args.evict is not None:
+        freed = cache.evict(int(args.evict * (1 << 30)))
+        print(f"🧹 evicted {freed / 1e6:.1f} MB of dumps")
+    print(f"cache: {len(cache.entries())} entries, dumps {cache.bulky_bytes() / 1e6:.1f} MB → {args.root}")
+
+if __name__ == "__main__":
+    main()
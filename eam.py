@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-process EAM/alloy engine for the Co–Fe–Ni structures.
+
+Reads FeNiCrCoAl-heaweight.setfl (F(ρ), ρ(r) and r·φ(r) tables), builds the
+same cubic-spline coefficients LAMMPS uses in pair_style eam/alloy, and
+evaluates total / per-atom energy, forces and virial for ASE Atoms with fully
+vectorized pair gathers (no per-atom Python loops).
+
+EAMPotential.load() parses the setfl once into a binary bundle under
+work/potentials/<sha256>/ (meta.json + spline coefficients as .npy) and
+memory-maps it afterwards; write_setfl() turns it back into a setfl for LAMMPS,
+optionally for an element subset.
+
+Run as a script to compute static 0 K energies of all structures from
+generate.py and compare them to FINAL_PE_PERATOM in potential_energy_all.csv.
+
+Outputs:
+    eam_validation.csv
+"""
+
+import os, json, time, shutil, hashlib, argparse
+import numpy as np
+import pandas as pd
+from neighbor import NeighborList
+
+SETFL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "FeNiCrCoAl-heaweight.setfl")
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "work", "potentials")
+
+# ------------------ Spline tables ------------------
+def interpolate(f, delta):
+    """LAMMPS PairEAM::interpolate → (n, 7) coefficients per table point.
+
+    Columns 3..6 give the value ((c3·p + c4)·p + c5)·p + c6 and columns
+    0..2 its derivative (c0·p + c1)·p + c2, with p ∈ [0, 1] inside a bin.
+    """
+    f = np.asarray(f, dtype=float)
+    n = len(f)
+    s = np.zeros((n, 7))
+    s[:, 6] = f
+    s[0, 5] = f[1] - f[0]
+    s[1, 5] = 0.5 * (f[2] - f[0])
+    s[n-2, 5] = 0.5 * (f[n-1] - f[n-3])
+    s[n-1, 5] = f[n-1] - f[n-2]
+    s[2:n-2, 5] = ((f[0:n-4] - f[4:n]) + 8.0 * (f[3:n-1] - f[1:n-3])) / 12.0
+    s[:n-1, 4] = 3.0 * (f[1:] - f[:-1]) - 2.0 * s[:n-1, 5] - s[1:, 5]
+    s[:n-1, 3] = s[:n-1, 5] + s[1:, 5] - 2.0 * (f[1:] - f[:-1])
+    s[:, 2] = s[:, 5] / delta
+    s[:, 1] = 2.0 * s[:, 4] / delta
+    s[:, 0] = 3.0 * s[:, 3] / delta
+    return s
+
+def spline_eval(coef, tab, x, delta):
+    """Value and derivative of tables `coef[tab]` at x (all arrays, same shape)."""
+    n = coef.shape[1]
+    p = x / delta
+    m = np.minimum(p.astype(np.int64), n - 2)
+    m = np.maximum(m, 0)
+    p = np.minimum(p - m, 1.0)
+    c = coef[tab, m]
+    val = ((c[:, 3] * p + c[:, 4]) * p + c[:, 5]) * p + c[:, 6]
+    der = (c[:, 0] * p + c[:, 1]) * p + c[:, 2]
+    return val, der
+
+def pair_index(ti, tj):
+    """Position of φ_ij in setfl's lower-triangular pair ordering."""
+    hi, lo = np.maximum(ti, tj), np.minimum(ti, tj)
+    return hi * (hi + 1) // 2 + lo
+
+# ------------------ setfl I/O ------------------
+def read_setfl(path=SETFL):
+    """Raw tables of a setfl file → dict (F: (nel, nrho), rho: (nel, nr), z2r: (npair, nr))."""
+    with open(path) as fh:
+        lines = fh.readlines()
+    head = lines[3].split()
+    nel, elements = int(head[0]), head[1:]
+    nrho, drho, nr, dr, cutoff = lines[4].split()
+    nrho, nr = int(nrho), int(nr)
+    tok = " ".join(lines[5:]).split()
+
+    pos, info, F, rho = 0, [], [], []
+    for _ in range(nel):
+        info.append((int(tok[pos]), float(tok[pos + 1]), float(tok[pos + 2]), tok[pos + 3]))
+        pos += 4  # Z, mass, lattice constant, lattice type
+        F.append(np.array(tok[pos:pos + nrho], dtype=float)); pos += nrho
+        rho.append(np.array(tok[pos:pos + nr], dtype=float)); pos += nr
+    npair = nel * (nel + 1) // 2
+    z2r = np.array(tok[pos:pos + npair * nr], dtype=float).reshape(npair, nr)
+    return {
+        "comments": [l.rstrip("\n") for l in lines[:3]], "elements": elements,
+        "Z": [i[0] for i in info], "masses": [i[1] for i in info],
+        "lattice": [i[2] for i in info], "lattice_type": [i[3] for i in info],
+        "nrho": nrho, "drho": float(drho), "nr": nr, "dr": float(dr), "cutoff": float(cutoff),
+        "F": np.array(F), "rho": np.array(rho), "z2r": z2r,
+    }
+
+def _values(fh, arr, per_line=5):
+    # %.16e round-trips every double exactly
+    arr = np.asarray(arr).ravel()
+    for k in range(0, len(arr), per_line):
+        fh.write(" ".join(f"{v:.16e}" for v in arr[k:k + per_line]) + "\n")
+
+def file_sha(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# ------------------ Potential ------------------
+class EAMPotential:
+    """Tabulated eam/alloy potential with LAMMPS-identical interpolation.
+
+    Spline tables are (ntab, n, 7) arrays; EAMPotential.load() maps them
+    read-only from a .npy bundle, so worker processes share the pages and
+    only touch the rows of the elements they use.
+    """
+
+    def __init__(self, elements, masses, nrho, drho, nr, dr, cutoff, F, rho, z2r, info=None):
+        self._setup(elements, masses, nrho, drho, nr, dr, cutoff, info)
+        self.F = np.ascontiguousarray([interpolate(t, self.drho) for t in F])
+        self.rho = np.ascontiguousarray([interpolate(t, self.dr) for t in rho])
+        self.z2r = np.ascontiguousarray([interpolate(t, self.dr) for t in z2r])
+
+    def _setup(self, elements, masses, nrho, drho, nr, dr, cutoff, info):
+        self.table_elements = list(elements)  # all elements in the tables
+        self.elements = list(elements)        # the ones types_of() accepts
+        self.masses = np.asarray(masses, dtype=float)
+        self.nrho, self.drho = int(nrho), float(drho)
+        self.nr, self.dr = int(nr), float(dr)
+        self.cutoff = float(cutoff)
+        self.rhomax = (self.nrho - 1) * self.drho
+        self.info = info or {}
+
+    @classmethod
+    def from_setfl(cls, path=SETFL):
+        t = read_setfl(path)
+        info = {k: t[k] for k in ("comments", "Z", "lattice", "lattice_type")}
+        return cls(t["elements"], t["masses"], t["nrho"], t["drho"], t["nr"], t["dr"], t["cutoff"],
+                   t["F"], t["rho"], t["z2r"], info=info)
+
+    # ---- binary bundle ----
+    def save_bundle(self, out_dir, source=""):
+        """Write meta.json + F/rho/z2r spline coefficients as .npy (atomic publish)."""
+        tmp = f"{out_dir}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in ("F", "rho", "z2r"):
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        meta = {"elements": self.table_elements, "masses": self.masses.tolist(),
+                "nrho": self.nrho, "drho": self.drho, "nr": self.nr, "dr": self.dr,
+                "cutoff": self.cutoff, "source": source, **self.info}
+        with open(os.path.join(tmp, "meta.json"), "w") as fh:
+            json.dump(meta, fh, indent=1)
+        try:
+            os.rename(tmp, out_dir)
+        except OSError:  # another process published it first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def from_bundle(cls, bundle, elements=None):
+        """Memory-mapped potential; `elements` restricts it to a subset."""
+        with open(os.path.join(bundle, "meta.json")) as fh:
+            meta = json.load(fh)
+        pot = cls.__new__(cls)
+        info = {k: meta[k] for k in ("comments", "Z", "lattice", "lattice_type") if k in meta}
+        pot._setup(meta["elements"], meta["masses"], meta["nrho"], meta["drho"], meta["nr"], meta["dr"],
+                   meta["cutoff"], info)
+        for name in ("F", "rho", "z2r"):
+            setattr(pot, name, np.load(os.path.join(bundle, f"{name}.npy"), mmap_mode="r"))
+        return pot.select(elements) if elements else pot
+
+    @classmethod
+    def load(cls, path=SETFL, elements=None, bundle_dir=BUNDLE_DIR):
+        """from_setfl() through a bundle keyed on the file's sha256 (built on first use)."""
+        bundle = os.path.join(bundle_dir, file_sha(path)[:16])
+        if not os.path.exists(os.path.join(bundle, "meta.json")):
+            os.makedirs(bundle_dir, exist_ok=True)
+            cls.from_setfl(path).save_bundle(bundle, source=os.path.abspath(path))
+        return cls.from_bundle(bundle, elements)
+
+    def select(self, elements):
+        """Restrict types_of() to `elements`; the tables are shared, not copied."""
+        missing = [el for el in elements if el not in self.table_elements]
+        if missing:
+            raise ValueError(f"elements {missing} not in setfl ({' '.join(self.table_elements)})")
+        self.elements = list(elements)
+        return self
+
+    def write_setfl(self, path, elements=None):
+        """setfl file for LAMMPS with `elements` (default: the selected ones) in that order."""
+        elements = list(elements or self.elements)
+        idx = [self.table_elements.index(el) for el in elements]
+        info = self.info
+        comments = (info.get("comments") or ["", "", ""])[:3]
+        with open(path, "w") as fh:
+            for c in comments:
+                fh.write(c + "\n")
+            fh.write(f"{len(idx)} " + " ".join(elements) + "\n")
+            fh.write(f"{self.nrho} {self.drho!r} {self.nr} {self.dr!r} {self.cutoff!r}\n")
+            for k in idx:
+                Z = info["Z"][k] if "Z" in info else 0
+                a = info["lattice"][k] if "lattice" in info else 0.0
+                lat = info["lattice_type"][k] if "lattice_type" in info else "fcc"
+                fh.write(f"{Z} {float(self.masses[k])!r} {float(a)!r} {lat}\n")
+                _values(fh, self.F[k, :, 6])
+                _values(fh, self.rho[k, :, 6])
+            for a in range(len(idx)):
+                for b in range(a + 1):
+                    _values(fh, self.z2r[pair_index(idx[a], idx[b]), :, 6])
+
+    def types_of(self, atoms):
+        """Setfl table index of every atom."""
+        lookup = {el: self.table_elements.index(el) for el in self.elements}
+        try:
+            return np.array([lookup[s] for s in atoms.get_chemical_symbols()], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"element {e} not in setfl ({' '.join(self.elements)})")
+
+    def compute(self, atoms, nl=None):
+        """Energy, per-atom energies, forces, stress and virial of one cell.
+
+        Stress follows ASE (eV/Å³, dE/dε / V); virial follows LAMMPS (Σ r⊗f, eV).
+        Pass a persistent NeighborList to reuse it across steps (Verlet skin).
+        """
+        return self.compute_batch([atoms], None if nl is None else [nl])[0]
+
+    def compute_batch(self, images, nls=None):
+        """compute() for many cells at once: one set of gathers over all pairs."""
+        if nls is None:
+            nls = [NeighborList(self.cutoff, skin=0.0) for _ in images]
+        sizes = np.array([len(a) for a in images])
+        first = np.concatenate([[0], np.cumsum(sizes)])
+        n = first[-1]
+        t = np.concatenate([self.types_of(a) for a in images])
+        I, J, R, DD, img = [], [], [], [], []
+        for k, (atoms, nl) in enumerate(zip(images, nls)):
+            nl.update(atoms.positions, atoms.cell, atoms.pbc)
+            i, j, r, D = nl.pairs(atoms.positions, atoms.cell)
+            I.append(i + first[k]); J.append(j + first[k]); R.append(r); DD.append(D)
+            img.append(np.full(len(i), k))
+        i, j, r, D, img = (np.concatenate(x) for x in (I, J, R, DD, img))
+        ti, tj = t[i], t[j]
+
+        # electron density gathered from neighbours: ρ_i = Σ_j ρ_tj(r_ij)
+        rho_j, drho_j = spline_eval(self.rho, tj, r, self.dr)
+        rho_i = np.bincount(i, weights=rho_j, minlength=n)
+
+        # embedding energy, linear beyond the tabulated ρ range (as LAMMPS)
+        Fi, dFi = spline_eval(self.F, t, rho_i, self.drho)
+        over = rho_i > self.rhomax
+        Fi[over] += dFi[over] * (rho_i[over] - self.rhomax)
+
+        # pair term from r·φ(r)
+        z2, dz2 = spline_eval(self.z2r, pair_index(ti, tj), r, self.dr)
+        phi = z2 / r
+        dphi = (dz2 - phi) / r
+
+        energies = Fi + 0.5 * np.bincount(i, weights=phi, minlength=n)
+
+        # ordered pair (i, j) carries F'_i ρ'_tj + ½ φ'; its mirror gives the rest
+        g = dFi[i] * drho_j + 0.5 * dphi
+        gD = (g / r)[:, None] * D
+        forces = np.zeros((n, 3))
+        for k in range(3):
+            forces[:, k] = (np.bincount(i, weights=gD[:, k], minlength=n)
+                            - np.bincount(j, weights=gD[:, k], minlength=n))
+
+        dEde = np.zeros((len(images), 9))
+        for k in range(9):
+            dEde[:, k] = np.bincount(img, weights=gD[:, k // 3] * D[:, k % 3], minlength=len(images))
+        dEde = dEde.reshape(-1, 3, 3)
+
+        out = []
+        for k, atoms in enumerate(images):
+            sl = slice(first[k], first[k + 1])
+            out.append({
+                "energy": energies[sl].sum(),
+                "energies": energies[sl],
+                "forces": forces[sl],
+                "stress": dEde[k] / atoms.get_volume(),
+                "virial": -dEde[k],
+            })
+        return out
+
+    def energy(self, atoms, nl=None):
+        return self.compute(atoms, nl)["energy"]
+
+# ------------------ Validation against LAMMPS ------------------
+def static_energies(pot):
+    """0 K per-atom energies of every generate.py structure."""
+    import generate
+    rows = []
+    for phase in generate.PHASES:
+        for comp in generate.COMPOSITIONS:
+            atoms = generate.build_structure(phase, comp)
+            res = pot.compute(atoms)
+            rows.append({
+                "Structure": phase.upper(),
+                "Co": round(comp["Co"], 2), "Fe": round(comp["Fe"], 2), "Ni": round(comp["Ni"], 2),
+                "E_static": res["energy"] / len(atoms),
+                "N": len(atoms),
+            })
+    return pd.DataFrame(rows)
+
+def validate(static, ref_csv="potential_energy_all.csv"):
+    """Join static energies with the LAMMPS FINAL_PE_PERATOM values."""
+    ref = pd.read_csv(ref_csv)
+    ref["Structure"] = ref["Structure"].str.upper().str.strip()
+    for el in ("Co", "Fe", "Ni"):
+        ref[el] = ref[el].round(2)
+        static[el] = static[el].round(2)
+    out = static.merge(ref, on=["Structure", "Co", "Fe", "Ni"], how="left")
+    out["dE"] = out["E_per_atom"] - out["E_static"]
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Static EAM energies + LAMMPS cross-check")
+    ap.add_argument("--setfl", default=SETFL)
+    ap.add_argument("--ref", default="potential_energy_all.csv")
+    ap.add_argument("--out", default="eam_validation.csv")
+    ap.add_argument("--write-setfl", metavar="PATH", help="write a Co/Fe/Ni setfl from the bundle and exit")
+    args = ap.parse_args()
+
+    import generate
+    t0 = time.time()
+    pot = EAMPotential.load(args.setfl, elements=generate.LABELS)
+    t1 = time.time()
+    if args.write_setfl:
+        pot.write_setfl(args.write_setfl)
+        print(f"✅ Saved: {args.write_setfl} ({' '.join(pot.elements)})")
+        return
+    static = static_energies(pot)
+    t2 = time.time()
+    print(f"loaded potential in {t1 - t0:.2f} s, {len(static)} structures in {t2 - t1:.2f} s")
+
+    out = validate(static, args.ref)
+    out.to_csv(args.out, index=False)
+    matched = out.dropna(subset=["E_per_atom"])
+    for (st, T), g in matched.groupby(["Structure", "Temperature"]):
+        print(f"{st:<5} {int(T):>4} K  n={len(g):2d}  <E_MD − E_0K> = {g['dE'].mean():+.4f} ± {g['dE'].std():.4f} eV/atom")
+    print(f"✅ Saved: {args.out}")
+
+if __name__ == "__main__":
+    main()
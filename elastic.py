@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Elastic constants of the relaxed final_*.data snapshots written by the decks.
+
+Each snapshot keeps its MD cell (the box of that temperature). Its atoms are
+relaxed once at that cell. That state is then strained by ±δ, ±2δ along each
+of the six Voigt components. All 24 strained cells relax their internal
+coordinates together in one batched L-BFGS (relaxed-ion constants, which
+matter for HCP/DHCP), and one compute_batch gives their stresses. The 6×6
+stiffness is the least-squares fit σ = σ0 + C ε. It is then averaged over
+the entries that cubic (FCC) or hexagonal (HCP/DHCP) symmetry makes
+equivalent. The random alloy breaks that symmetry slightly, so the error
+combines the spread of those entries with the fit's standard error.
+
+Snapshots are processed in parallel, and the per-run columns are merged into
+the harvest store (runs table, by tag), next to the lattice data.
+
+    python elastic.py                       # work/results/*/final_*.data
+    python elastic.py path/to/*.data -j 16
+
+Outputs:
+    elastic_results.csv   tag,Structure,Co,Fe,Ni,Temperature,C11,C12,C13,C33,C44,C66,*_err,B,G,stable   (GPa)
+"""
+
+import os, glob, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from ase.io import read
+from ase.units import GPa
+
+import generate
+import harvest
+from eam import EAMPotential, SETFL
+from fingerprint import FINAL_RE, RES_DIR, Z_OF_TYPE
+from neighbor import NeighborList
+
+# ------------------ Settings ----------------
+DELTA = 0.005                          # strain step
+STEPS = (-2, -1, 1, 2)                 # multiples of DELTA per Voigt component
+VOIGT = ((0, 0), (1, 1), (2, 2), (1, 2), (0, 2), (0, 1))
+
+# Voigt entries that are equal by symmetry (z ∥ c for the hexagonal cells)
+CUBIC = {"C11": [(0, 0), (1, 1), (2, 2)], "C12": [(0, 1), (0, 2), (1, 2)], "C44": [(3, 3), (4, 4), (5, 5)]}
+HEXAGONAL = {"C11": [(0, 0), (1, 1)], "C12": [(0, 1)], "C13": [(0, 2), (1, 2)], "C33": [(2, 2)],
+             "C44": [(3, 3), (4, 4)], "C66": [(5, 5)]}
+CONSTANTS = ("C11", "C12", "C13", "C33", "C44", "C66")
+
+# ------------------ Strains ------------------
+def strain_set(delta=DELTA, steps=STEPS):
+    """(n, 6) Voigt strains (engineering shears), one component at a time."""
+    eps = []
+    for k in range(6):
+        for s in steps:
+            e = np.zeros(6)
+            e[k] = s * delta
+            eps.append(e)
+    return np.array(eps)
+
+def deformation(e):
+    """I + ε for a Voigt strain vector."""
+    eps = np.zeros((3, 3))
+    for k, (i, j) in enumerate(VOIGT):
+        eps[i, j] = eps[j, i] = e[k] if i == j else 0.5 * e[k]
+    return np.eye(3) + eps
+
+def relax_batch(pot, images, maxiter=500, gtol=1e-5):
+    """Relax all positions of every image at fixed cell (in place), all images in one L-BFGS."""
+    nls = [NeighborList(pot.cutoff, skin=0.3) for _ in images]
+    sizes = [3 * len(a) for a in images]
+    x0 = np.concatenate([a.positions.ravel() for a in images])
+
+    def fun(x):
+        for a, xx in zip(images, np.split(x, np.cumsum(sizes)[:-1])):
+            a.positions[:] = xx.reshape(-1, 3)
+        res = pot.compute_batch(images, nls)
+        return sum(r["energy"] for r in res), -np.concatenate([r["forces"].ravel() for r in res])
+
+    opt = minimize(fun, x0, jac=True, method="L-BFGS-B", options={"maxiter": maxiter, "gtol": gtol})
+    fun(opt.x)
+    return pot.compute_batch(images, nls)
+
+# ------------------ Fit ------------------
+def fit_stiffness(eps, sig):
+    """Least-squares σ = σ0 + C ε → (C, standard error of C), both (6, 6)."""
+    X = np.hstack([np.ones((len(eps), 1)), eps])
+    coef, _, _, _ = np.linalg.lstsq(X, sig, rcond=None)
+    dof = max(len(eps) - X.shape[1], 1)
+    s2 = ((sig - X @ coef) ** 2).sum(axis=0) / dof                   # per stress component
+    var = np.diag(np.linalg.inv(X.T @ X))[1:]                       # per strain component
+    C = coef[1:].T                                                  # C[i, j] = dσ_i / dε_j
+    se = np.sqrt(np.outer(s2, var))
+    return 0.5 * (C + C.T), 0.5 * np.sqrt(se ** 2 + se.T ** 2)
+
+def symmetrize(C, se, struct):
+    """Symmetry-averaged constants with errors {name: (value, err)}."""
+    out = {}
+    for name, idx in (CUBIC if struct == "fcc" else HEXAGONAL).items():
+        v = np.array([C[i, j] for i, j in idx])
+        s = np.array([se[i, j] for i, j in idx])
+        spread = v.var(ddof=1) / len(v) if len(v) > 1 else 0.0
+        out[name] = (v.mean(), np.sqrt((s ** 2).sum() / len(v) ** 2 + spread))
+    return out
+
+def moduli(C):
+    """Voigt–Reuss–Hill bulk and shear moduli of a 6×6 stiffness."""
+    S = np.linalg.inv(C)
+    bv = (C[0, 0] + C[1, 1] + C[2, 2] + 2 * (C[0, 1] + C[0, 2] + C[1, 2])) / 9
+    gv = (C[0, 0] + C[1, 1] + C[2, 2] - C[0, 1] - C[0, 2] - C[1, 2] + 3 * (C[3, 3] + C[4, 4] + C[5, 5])) / 15
+    br = 1 / (S[0, 0] + S[1, 1] + S[2, 2] + 2 * (S[0, 1] + S[0, 2] + S[1, 2]))
+    gr = 15 / (4 * (S[0, 0] + S[1, 1] + S[2, 2]) - 4 * (S[0, 1] + S[0, 2] + S[1, 2])
+               + 3 * (S[3, 3] + S[4, 4] + S[5, 5]))
+    return 0.5 * (bv + br), 0.5 * (gv + gr)
+
+# ------------------ Per file ------------------
+_pot = None
+
+def potential(setfl=SETFL):
+    """Per-process potential (memory-mapped bundle, so workers start instantly)."""
+    global _pot
+    if _pot is None:
+        _pot = EAMPotential.load(setfl, elements=generate.LABELS)
+    return _pot
+
+def analyse(path, setfl=SETFL):
+    """Elastic constants of one final_<struct>_<T>K.data snapshot → dict."""
+    m = FINAL_RE.search(os.path.basename(path))
+    struct, T = (m.group(1), int(m.group(2))) if m else ("fcc", -1)
+    pot = potential(setfl)
+    atoms = read(path, format="lammps-data", atom_style="atomic", Z_of_type=Z_OF_TYPE)
+    atoms.pbc = True
+    relax_batch(pot, [atoms])
+
+    eps = strain_set()
+    cell0 = np.asarray(atoms.cell)
+    images = []
+    for e in eps:
+        a = atoms.copy()
+        a.set_cell(cell0 @ deformation(e), scale_atoms=True)
+        images.append(a)
+    res = relax_batch(pot, images)
+    sig = np.array([[r["stress"][i, j] for i, j in VOIGT] for r in res]) / GPa
+
+    C, se = fit_stiffness(eps, sig)
+    B, G = moduli(C)
+    base = os.path.basename(os.path.dirname(path))
+    row = {"tag": f"{base}_{T}K", "Structure": struct.upper(), "Temperature": T}
+    for name, (v, err) in symmetrize(C, se, struct).items():
+        row[name], row[f"{name}_err"] = v, err
+    row.update(B=B, G=G, stable=bool(np.linalg.eigvalsh(C).min() > 0))
+    return row
+
+def _job(args):
+    return analyse(*args)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="final_*.data files (default: work/results/*/final_*.data)")
+    ap.add_argument("--setfl", default=SETFL)
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default="elastic_results.csv")
+    ap.add_argument("--no-store", action="store_true", help="do not merge into the harvest store")
+    args = ap.parse_args()
+
+    paths = sorted(args.paths or glob.glob(os.path.join(RES_DIR, "*", "final_*.data")))
+    if not paths:
+        print("❌ No final_*.data snapshots found.")
+        return
+    potential(args.setfl)   # build the bundle once before the workers map it
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        rows = list(pool.map(_job, [(p, args.setfl) for p in paths]))
+    df = pd.DataFrame(rows)
+    for c in CONSTANTS:
+        if c not in df:
+            df[c] = df[f"{c}_err"] = np.nan
+    meta = [harvest.parse_metadata(t + ".log") for t in df["tag"]]
+    for k, col in enumerate(("Co", "Fe", "Ni"), start=1):
+        df.insert(1 + k, col, [mt[k] if mt else np.nan for mt in meta])
+    cols = ["tag", "Structure", "Co", "Fe", "Ni", "Temperature"]
+    cols += [x for c in CONSTANTS for x in (c, f"{c}_err")] + ["B", "G", "stable"]
+    df = df[cols]
+    df.to_csv(args.out, index=False)
+
+    for r in df[~df["stable"]].itertuples():
+        print(f"⚠️  {r.tag}: stiffness not positive definite (C11 {r.C11:.0f}, C12 {r.C12:.0f}, C44 {r.C44:.0f} GPa)")
+    if not args.no_store:
+        harvest.update_runs(df.drop(columns=["Structure", "Co", "Fe", "Ni", "Temperature"]))
+    print(f"✅ {len(df)} snapshots in {time.time() - t0:.1f} s → {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Equation-of-state prefit: composition-aware lattice parameters for generate.py.
+
+For every phase and composition, the random-alloy cell of generate.py (same
+seeds) is scanned over volume. HCP/DHCP are also scanned over c/a at each
+volume. All cells of one (phase, composition) go through a single
+compute_batch. At each volume the energy is minimized over c/a (a parabola).
+The third-order Birch–Murnaghan equation is then fitted exactly, as a cubic
+in V^(-2/3), to the energy minima. This gives V0, E0, B0 and B0', and from
+them a0 and c/a. Energies are static: positions stay on the lattice sites.
+
+With --vegard only the pure elements are scanned. a, c/a and B0 of the
+alloys are interpolated linearly from them (Method = vegard).
+
+generate.py reads eos_results.csv, when it exists, to start every structure
+at its own a0 and c/a instead of the PHASES defaults. Compositions missing
+from the table get Vegard values from its end members. The NPT stage then
+starts close to its equilibrium volume. B0 goes into the harvest store: an
+`eos` table, plus a B0 column on the matching runs.
+
+    python eos.py                    # all phases × COMPOSITIONS
+    python eos.py --vegard           # end members only, interpolate the rest
+    python generate.py               # picks up eos_results.csv
+
+Outputs:
+    eos_results.csv   Structure,Co,Fe,Ni,a0,c_over_a,V0,E0,B0,B0p,Method   (Å, Å³/atom, eV/atom, GPa)
+"""
+
+import os, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from ase.units import GPa
+
+import generate
+import harvest
+from eam import EAMPotential, SETFL
+
+# ------------------ Settings ----------------
+SCALES = np.linspace(0.94, 1.06, 9)           # isotropic linear scale about the PHASES cell
+RATIOS = np.linspace(0.96, 1.04, 5)           # c/a relative to PHASES (hcp/dhcp only), at fixed volume
+KEYS = ["Structure", "Co", "Fe", "Ni"]
+
+# ------------------ Fit ------------------
+def birch_murnaghan(V, E):
+    """Third-order Birch–Murnaghan fit (a cubic in V^(-2/3)) → V0, E0, B0 (eV/Å³), B0'."""
+    p = np.polyfit(V ** (-2 / 3), E, 3)
+    dp = np.polyder(p)
+    x = np.roots(dp)
+    x = x[np.isreal(x)].real
+    x = x[(x > 0) & (np.polyval(np.polyder(dp), x) > 0)]          # minima only
+    if not len(x):
+        raise ValueError("no energy minimum inside the scanned volumes")
+    V0 = x[np.argmin(np.abs(x ** -1.5 - V.mean()))] ** -1.5
+
+    def bulk(v, h=1e-4):
+        e = lambda u: np.polyval(p, u ** (-2 / 3))
+        return v * (e(v * (1 + h)) - 2 * e(v) + e(v * (1 - h))) / (v * h) ** 2
+
+    B0 = bulk(V0)
+    h = 1e-3 * V0
+    B0p = -V0 / B0 * (bulk(V0 + h) - bulk(V0 - h)) / (2 * h)
+    return V0, np.polyval(p, V0 ** (-2 / 3)), B0, B0p
+
+def ratio_minimum(q, E):
+    """Minimum of a parabola through E(c/a factor q) → (q*, E*), q* clipped to the scanned range."""
+    c2, c1, c0 = np.polyfit(q, E, 2)
+    qs = np.clip(-c1 / (2 * c2), q.min(), q.max()) if c2 > 0 else q[np.argmin(E)]
+    return qs, np.polyval([c2, c1, c0], qs)
+
+# ------------------ Per structure ------------------
+_pot = None
+
+def potential(setfl=SETFL):
+    """Per-process potential (memory-mapped bundle, so workers start instantly)."""
+    global _pot
+    if _pot is None:
+        _pot = EAMPotential.load(setfl, elements=generate.LABELS)
+    return _pot
+
+def scan(phase, comp, setfl=SETFL, scales=SCALES, ratios=RATIOS):
+    """E–V (and c/a) scan and BM fit of one phase/composition → row dict."""
+    pot = potential(setfl)
+    base = generate.build_structure(phase, comp)
+    n = len(base)
+    cell0 = np.asarray(base.cell)
+    qs = np.array([1.0]) if phase == "fcc" else ratios
+
+    cells = []
+    for s in scales:
+        for q in qs:      # x, y by q^(-1/3) and z by q^(2/3): c/a × q at the same volume
+            a = base.copy()
+            a.set_cell(cell0 * s * np.array([q ** (-1 / 3), q ** (-1 / 3), q ** (2 / 3)])[:, None],
+                       scale_atoms=True)
+            cells.append(a)
+    E = np.array([r["energy"] for r in pot.compute_batch(cells)]).reshape(len(scales), len(qs)) / n
+    V = abs(np.linalg.det(cell0)) / n * scales ** 3
+
+    if len(qs) > 1:
+        qmin, emin = np.array([ratio_minimum(qs, e) for e in E]).T
+    else:
+        qmin, emin = np.ones(len(scales)), E[:, 0]
+    V0, E0, B0, B0p = birch_murnaghan(V, emin)
+    q0 = np.polyval(np.polyfit(V, qmin, 2), V0)
+    s0 = (V0 / V[0]) ** (1 / 3) * scales[0]
+
+    pinfo = generate.PHASES[phase]
+    row = {"Structure": phase.upper(), "Co": comp["Co"], "Fe": comp["Fe"], "Ni": comp["Ni"]}
+    row.update(a0=pinfo["a"] * s0 * q0 ** (-1 / 3),
+               c_over_a=np.nan if phase == "fcc" else pinfo["c_over_a"] * q0,
+               V0=V0, E0=E0, B0=B0 / GPa, B0p=B0p, Method="scan")
+    return row
+
+def vegard_rows(df, phases, comps):
+    """Linear interpolation of a0, c/a, V0 and B0 from the pure-element rows of `df`."""
+    rows = []
+    for phase in phases:
+        ends = [df[(df["Structure"] == phase.upper()) & (df[el] == 1.0)].iloc[0] for el in generate.LABELS]
+        pinfo = generate.PHASES[phase]
+        for comp in comps:
+            if max(comp.values()) == 1.0:
+                continue
+            w = np.array([comp[el] for el in generate.LABELS])
+            p = generate.vegard(phase, comp, {(phase,) + tuple(float(x == el) for x in generate.LABELS):
+                                              {"a": e.a0, "c_over_a": e.c_over_a}
+                                              for el, e in zip(generate.LABELS, ends)})
+            r = 1.0 if phase == "fcc" else p["c_over_a"] / pinfo["c_over_a"]
+            v_nom = generate.lattice(phase).get_volume() / len(generate.lattice(phase))
+            rows.append({"Structure": phase.upper(), "Co": comp["Co"], "Fe": comp["Fe"], "Ni": comp["Ni"],
+                         "a0": p["a"], "c_over_a": np.nan if phase == "fcc" else p["c_over_a"],
+                         "V0": v_nom * (p["a"] / pinfo["a"]) ** 3 * r,
+                         "E0": np.nan, "B0": w @ np.array([e.B0 for e in ends]), "B0p": np.nan,
+                         "Method": "vegard"})
+    return rows
+
+def _job(args):
+    t0 = time.time()
+    return scan(*args), time.time() - t0
+
+# ------------------ Store ------------------
+def store_results(df, store=harvest.STORE):
+    """eos table into the harvest store, and B0 onto the runs of the same phase/composition."""
+    tables = harvest.load_store(store)
+    tables["eos"] = df
+    harvest.save_store(tables, store)
+    runs = tables.get("runs", pd.DataFrame())
+    if len(runs) and "Structure" in runs:
+        b0 = runs[["tag"] + KEYS].merge(df[KEYS + ["B0"]], on=KEYS, how="left")
+        harvest.update_runs(b0[["tag", "B0"]], store=store)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--setfl", default=SETFL)
+    ap.add_argument("--phases", nargs="+", default=list(generate.PHASES), choices=list(generate.PHASES))
+    ap.add_argument("--vegard", action="store_true", help="scan the pure elements only, interpolate the alloys")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default="eos_results.csv")
+    ap.add_argument("--no-store", action="store_true", help="do not merge into the harvest store")
+    args = ap.parse_args()
+
+    comps = generate.COMPOSITIONS
+    scanned = [c for c in comps if max(c.values()) == 1.0] if args.vegard else comps
+    potential(args.setfl)   # build the bundle once before the workers map it
+    todo = [(phase, comp, args.setfl) for comp in scanned for phase in args.phases]
+    rows = []
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for (phase, comp, _), (r, dt) in zip(todo, pool.map(_job, todo)):
+            rows.append(r)
+            ca = f", c/a = {r['c_over_a']:.4f}" if phase != "fcc" else ""
+            print(f"✓ {generate.fname_base(phase, comp)}: a0 = {r['a0']:.4f} Å{ca}, "
+                  f"B0 = {r['B0']:.0f} GPa, B0' = {r['B0p']:.2f}  ({dt:.1f} s)")
+    df = pd.DataFrame(rows)
+    if args.vegard:
+        df = pd.concat([df, pd.DataFrame(vegard_rows(df, args.phases, comps))], ignore_index=True)
+    df = df.sort_values(KEYS, ignore_index=True)
+    df.to_csv(args.out, index=False)
+
+    if not args.no_store:
+        store_results(df)
+    for phase in args.phases:
+        sub = df[df["Structure"] == phase.upper()]
+        shift = (sub["a0"] / generate.PHASES[phase]["a"] - 1) * 100
+        print(f"{phase.upper():>4}: a0 {sub['a0'].min():.4f}–{sub['a0'].max():.4f} Å "
+              f"({shift.abs().max():.1f}% max. from PHASES)")
+    print(f"✅ {len(df)} structures in {time.time() - t0:.1f} s → {args.out}")
+
+if __name__ == "__main__":
+    main()
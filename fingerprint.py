@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structural fingerprints of the final_*.data snapshots written by the decks.
+
+Every atom is classified by adaptive common-neighbour analysis (a-CNA). Its 12
+nearest neighbours set a local cutoff (1+√2)/2 · <d>, and the 12 (CN, bonds,
+chain) signatures are evaluated with array operations on (N, 12, 12) bond
+masks, with no per-atom Python loop. Atoms with 12 × 421 are FCC, those with
+6 × 421 + 6 × 422 are HCP, and everything else is Other. The close-packed
+layers along z are then labelled h (mostly HCP atoms) or c (mostly FCC
+atoms), giving the Jagodzinski stacking: FCC = c, HCP = h, DHCP = hc.
+
+A run is flagged `transformed` when its atoms or its stacking no longer match
+the structure it was started as. Files are analysed in parallel, and the
+per-run columns are merged into the harvest store (runs table, by tag), so
+harvest.energy_table() can leave transformed runs out.
+
+    python fingerprint.py                       # work/results/*/final_*.data
+    python fingerprint.py path/to/*.data -j 16
+
+Outputs:
+    fingerprint_results.csv   tag,Structure,Temperature,frac_fcc,frac_hcp,frac_other,stacking,transformed
+"""
+
+import os, re, glob, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from ase.io import read
+from ase.data import atomic_numbers
+
+import generate
+import harvest
+from neighbor import neighbor_pairs
+
+RES_DIR = os.path.join(harvest.ROOT, "work", "results")
+FINAL_RE = re.compile(r"final_(fcc|hcp|dhcp)_([0-9]+)K\.data$")
+Z_OF_TYPE = {t: atomic_numbers[el] for t, el in enumerate(generate.LABELS, 1)}
+
+N_NEIGH = 12
+CHUNK = 20000             # atoms per (N, 12, 12, 12) block
+MIN_FRACTION = 0.6        # an intact phase keeps at least this fraction of its atom type
+EXPECTED = {"fcc": "c", "hcp": "h", "dhcp": "hc"}
+
+OTHER, FCC, HCP = 0, 1, 2
+
+# ------------------ a-CNA ------------------
+def nearest_neighbors(atoms, k=N_NEIGH):
+    """(N, k) neighbour vectors sorted by distance and a mask of atoms that have k of them."""
+    n = len(atoms)
+    nn = (np.sqrt(2) * atoms.get_volume() / n) ** (1 / 3)     # close-packed NN distance
+    i, j, d, D = neighbor_pairs(atoms, 1.3 * nn)
+    order = np.lexsort((d, i))
+    i, D = i[order], D[order]
+    first = np.searchsorted(i, np.arange(n))
+    count = np.bincount(i, minlength=n)
+    ok = count >= k
+    rank = np.arange(len(i)) - first[i]
+    sel = rank < k
+    vec = np.zeros((n, k, 3))
+    vec[i[sel], rank[sel]] = D[sel]
+    return vec, ok
+
+def cna_classify(vec, ok):
+    """FCC / HCP / OTHER per atom from its (N, 12, 3) nearest-neighbour vectors."""
+    out = np.full(len(vec), OTHER)
+    for s in range(0, len(vec), CHUNK):
+        v = vec[s:s + CHUNK]
+        r = np.linalg.norm(v, axis=2)
+        rc = 0.5 * (1 + np.sqrt(2)) * r.mean(axis=1)
+        # bonds between neighbours a, b of the central atom
+        dab = np.linalg.norm(v[:, :, None, :] - v[:, None, :, :], axis=3)
+        B = (dab < rc[:, None, None]) & ~np.eye(N_NEIGH, dtype=bool)
+        n_cn = B.sum(axis=2)                                        # common neighbours of (i, a)
+        sub = B[:, :, :, None] & B[:, :, None, :] & B[:, None, :, :]   # bonds among them
+        deg = sub.sum(axis=3)
+        n_bonds = deg.sum(axis=2) // 2
+        chain = np.where(deg.max(axis=2) >= 2, 2, 1)                 # 2 bonds sharing an atom → 422
+        s421 = (n_cn == 4) & (n_bonds == 2) & (chain == 1)
+        s422 = (n_cn == 4) & (n_bonds == 2) & (chain == 2)
+        n421, n422 = s421.sum(axis=1), s422.sum(axis=1)
+        cls = np.full(len(v), OTHER)
+        cls[n421 == 12] = FCC
+        cls[(n421 == 6) & (n422 == 6)] = HCP
+        cls[~ok[s:s + CHUNK]] = OTHER
+        out[s:s + CHUNK] = cls
+    return out
+
+# ------------------ Stacking ------------------
+def layers(z, lz, gap=0.5):
+    """Layer index of every atom from gaps > `gap` Å in the periodic z coordinate."""
+    z = np.mod(z, lz)
+    order = np.argsort(z)
+    zs = z[order]
+    steps = np.diff(np.concatenate([zs, [zs[0] + lz]]))
+    start = (np.argmax(steps) + 1) % len(zs)                 # begin after the widest gap
+    zs, order = np.roll(zs, -start), np.roll(order, -start)
+    steps = np.roll(steps, -start)
+    lab = np.concatenate([[0], np.cumsum(steps[:-1] > gap)])
+    out = np.empty(len(z), dtype=np.int64)
+    out[order] = lab
+    return out
+
+def stacking(atoms, cls):
+    """h/c label of every close-packed layer along z (x for layers that are neither)."""
+    lay = layers(atoms.positions[:, 2], atoms.cell[2, 2])
+    n = np.bincount(lay)
+    f_fcc = np.bincount(lay, weights=cls == FCC) / n
+    f_hcp = np.bincount(lay, weights=cls == HCP) / n
+    return "".join("h" if h > 0.5 else "c" if c > 0.5 else "x" for h, c in zip(f_hcp, f_fcc))
+
+def reduce_period(seq):
+    """Shortest repeating unit of a periodic stacking string, up to rotation ("chch" → "hc")."""
+    for p in range(1, len(seq) + 1):
+        if len(seq) % p == 0 and seq == seq[:p] * (len(seq) // p):
+            unit = seq[:p]
+            return min(unit[k:] + unit[:k] for k in range(p))
+    return seq
+
+# ------------------ Per file ------------------
+def analyse(path):
+    """Fingerprint of one final_<struct>_<T>K.data snapshot → dict."""
+    m = FINAL_RE.search(os.path.basename(path))
+    struct, T = (m.group(1), int(m.group(2))) if m else ("", -1)
+    atoms = read(path, format="lammps-data", atom_style="atomic", Z_of_type=Z_OF_TYPE)
+    cls = cna_classify(*nearest_neighbors(atoms))
+    frac = np.bincount(cls, minlength=3) / len(cls)
+    seq = stacking(atoms, cls)
+    unit = reduce_period(seq)
+
+    if struct == "fcc":
+        intact = frac[FCC] >= MIN_FRACTION
+    elif struct == "hcp":
+        intact = frac[HCP] >= MIN_FRACTION
+    elif struct == "dhcp":
+        intact = frac[FCC] + frac[HCP] >= MIN_FRACTION and unit == reduce_period(EXPECTED[struct])
+    else:
+        intact = True    # not a final_<struct>_<T>K snapshot: nothing to compare against
+    base = os.path.basename(os.path.dirname(path))
+    return {
+        "tag": f"{base}_{T}K", "path": os.path.abspath(path), "Structure": struct.upper(), "Temperature": T,
+        "frac_fcc": frac[FCC], "frac_hcp": frac[HCP], "frac_other": frac[OTHER],
+        "stacking": unit, "transformed": bool(m) and not intact,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="final_*.data files (default: work/results/*/final_*.data)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default="fingerprint_results.csv")
+    ap.add_argument("--no-store", action="store_true", help="do not merge into the harvest store")
+    args = ap.parse_args()
+
+    paths = sorted(args.paths or glob.glob(os.path.join(RES_DIR, "*", "final_*.data")))
+    if not paths:
+        print("❌ No final_*.data snapshots found.")
+        return
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        rows = list(pool.map(analyse, paths, chunksize=max(1, len(paths) // (8 * args.jobs))))
+    df = pd.DataFrame(rows)
+    df.to_csv(args.out, index=False)
+
+    for r in df[df["transformed"]].itertuples():
+        print(f"⚠️  {r.tag}: fcc {r.frac_fcc:.2f} / hcp {r.frac_hcp:.2f} / other {r.frac_other:.2f}, "
+              f"stacking '{r.stacking}' — no longer {r.Structure}")
+    if not args.no_store:
+        cols = ["tag", "frac_fcc", "frac_hcp", "frac_other", "stacking", "transformed"]
+        harvest.update_runs(df[cols], fill={"transformed": False})
+    print(f"✅ {len(df)} snapshots in {time.time() - t0:.1f} s, {int(df['transformed'].sum())} transformed "
+          f"→ {args.out}")
+
+if __name__ == "__main__":
+    main()
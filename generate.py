@@ -5,19 +5,50 @@ generate_structures.py
 Generates FCC, HCP, and DHCP supercells for all Co–Fe–Ni ternary compositions.
 
 Output (in ./work/data/):
-    fcc_Co0.25_Fe0.25_Ni0.50.data
-    fcc_Co0.25_Fe0.25_Ni0.50.cif
+    fcc_Co0.25_Fe0.25_Ni0.50.data          (… _r0, _r1, … with --replicas K > 1)
+    fcc_Co0.25_Fe0.25_Ni0.50.json          cell sidecar: atom count, box lengths, deck divisors NX/NY/NZ, FY
+    fcc_Co0.25_Fe0.25_Ni0.50.cif           (only with --cif)
     ... for all 3 phases and 20 compositions
+
+Each phase lattice is built once. Every (composition, replica) is one NumPy
+permutation of the species array, and every file is written from a fixed-width
+byte template of that lattice: only the type column changes, so writing is
+I/O-bound. Data files always declare 3 atom types (1 = Co, 2 = Fe, 3 = Ni,
+matching `pair_coeff * * … Co Fe Ni`) with Masses, also for pure elements
+and binaries. HCP and DHCP (ABAC stacking) are orthohexagonal, so every box
+is orthogonal and LAMMPS never sees a skewed triclinic cell. Replica k uses the seed (SEED, phase, composition, k), so the
+output does not depend on --jobs.
+
+When eos_results.csv (eos.py) exists, every composition starts at its own
+fitted a and c/a (Vegard from the table's end members for compositions it
+lacks); `--no-eos` keeps the PHASES values. Repeats, and so NX/NY/NZ, do not
+change.
+
+`--sqs [STEPS]` replaces the shuffles by special quasirandom structures
+(sqs.py): the best `--replicas` annealing chains per composition.
+
+    python generate.py --replicas 1000 --size 30 --jobs 8
+    python generate.py --sqs --replicas 2
+
+Importable: `build_structure(phase, comp, eos=read_eos())` returns the ASE
+Atoms written here, so in-process tools see exactly the cell LAMMPS gets.
+Without `eos` the cell has the nominal PHASES lattice parameters; eos.py
+(which scans about them), qha.py, swapmc.py and eam.py's static energies
+call it that way, and sqs.py only takes the site topology from lattice().
 """
 
-import os, random
+import os, json, time, argparse
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from ase import Atoms
 from ase.build import bulk
+from ase.data import atomic_masses, atomic_numbers
 from ase.io import write
 
 # ---- Settings ----
-random.seed(42); np.random.seed(42)
-N_SUPERCELL = 4  # 4×4×4 → ~256 atoms
+N_SUPERCELL = 4  # 4×4×4 → ~256 atoms (HCP/DHCP: searched to the same atom count)
+DECK_SCALE = 2   # decks report half lattice parameters (a_i = L_i/8 of the 4×4×4 FCC cell)
 
 # Compositions (fractional form for filenames)
 COMPOSITIONS = [
@@ -37,44 +68,256 @@ PHASES = {
     "dhcp": {"crystal": "hcp", "a": 2.50, "c_over_a": 3.266},
 }
 
+LABELS = ["Co", "Fe", "Ni"]
 OUT_DIR = "work/data"
-os.makedirs(OUT_DIR, exist_ok=True)
+SEED = 42
 
-def rand_elements(n, fracs, labels):
-    """Shuffle element types based on fractions."""
+# ---- Species ----
+def species_counts(n, fracs):
+    """Atoms per species; the last species takes the rounding remainder."""
     n_each = [int(round(f * n)) for f in fracs]
     n_each[-1] = n - sum(n_each[:-1])
-    lst = sum(([lab] * count for lab, count in zip(labels, n_each)), [])
-    random.shuffle(lst)
-    return lst
-
-for phase, pinfo in PHASES.items():
-    print(f"Generating {phase.upper()} structures...")
-    for comp in COMPOSITIONS:
-        xCo, xFe, xNi = comp["Co"], comp["Fe"], comp["Ni"]
-        fracs = [xCo, xFe, xNi]
-        labels = ["Co", "Fe", "Ni"]
-
-        # Build unit cell
-        if phase == "fcc":
-            atoms = bulk("Ni", crystalstructure=pinfo["crystal"], a=pinfo["a"], cubic=True)
-        else:
-            atoms = bulk("Ni", crystalstructure=pinfo["crystal"], a=pinfo["a"],
-                         c=pinfo["a"] * pinfo["c_over_a"], cubic=False)
+    return np.array(n_each)
+
+def rand_elements(n, fracs, labels, rng):
+    """Shuffle element types based on fractions (`rng` is required, so every caller is reproducible)."""
+    return rng.permutation(np.repeat(np.asarray(labels), species_counts(n, fracs)))
+
+def replica_rng(phase, comp_index, replica, seed=SEED):
+    return np.random.default_rng([seed, list(PHASES).index(phase), comp_index, replica])
+
+def fname_base(phase, comp, replica=None):
+    """Format: fcc_Co0.25_Fe0.25_Ni0.50 (+ _r<k> for replicas)"""
+    def f(x): return f"{x:.2f}"
+    base = f"{phase}_Co{f(comp['Co'])}_Fe{f(comp['Fe'])}_Ni{f(comp['Ni'])}"
+    return base if replica is None else f"{base}_r{replica}"
+
+# ---- Lattices ----
+STACKING = {"hcp": "AB", "dhcp": "ABAC"}
+SITES = {"A": [(0, 0), (1/2, 1/2)], "B": [(0, 1/3), (1/2, 5/6)], "C": [(1/2, 1/6), (0, 2/3)]}
+
+def orthohexagonal(phase):
+    """Orthogonal hexagonal unit cell, x ∥ [2-1-10], y ∥ [01-10], z ∥ [0001] (2 atoms per layer)."""
+    pinfo = PHASES[phase]
+    a, c = pinfo["a"], pinfo["a"] * pinfo["c_over_a"]
+    seq = STACKING[phase]
+    frac = [(x, y, k / len(seq)) for k, layer in enumerate(seq) for x, y in SITES[layer]]
+    return Atoms(f"Ni{len(frac)}", scaled_positions=frac, cell=[a, np.sqrt(3) * a, c], pbc=True)
+
+def supercell_shape(lengths, n_unit, target, tol=0.2, n_max=16):
+    """Repeats (nx, ny, nz) with about `target` atoms and the most cubic box."""
+    r = np.arange(1, n_max + 1)
+    reps = np.stack(np.meshgrid(r, r, r, indexing="ij"), axis=-1).reshape(-1, 3)
+    L = reps * np.asarray(lengths)
+    dev = np.abs(reps.prod(axis=1) * n_unit / target - 1)
+    score = np.where(dev <= tol, L.max(axis=1) / L.min(axis=1) + 2 * dev, np.inf)
+    return tuple(int(x) for x in reps[np.argmin(score)])
+
+def conventional(phase, params=None):
+    """Lattice parameters along x, y, z of the conventional cell (a, a, a or a, a, c)."""
+    pinfo = params or PHASES[phase]
+    a = pinfo["a"]
+    return (a, a, a) if phase == "fcc" else (a, a, a * pinfo["c_over_a"])
+
+@lru_cache(maxsize=None)
+def lattice(phase, size=N_SUPERCELL):
+    """Supercell of one phase as an ASE Atoms (built once per phase and size).
+
+    FCC is the cubic size×size×size cell. HCP/DHCP use an orthohexagonal cell
+    (no tilt) whose repeats are searched for the most cubic box with about as
+    many atoms as the FCC cell.
+    """
+    pinfo = PHASES[phase]
+    if phase == "fcc":
+        atoms = bulk("Ni", crystalstructure=pinfo["crystal"], a=pinfo["a"], cubic=True)
+        return atoms.repeat((size, size, size))
+    unit = orthohexagonal(phase)
+    reps = supercell_shape(unit.cell.lengths(), len(unit), 4 * size ** 3)
+    atoms = unit.repeat(reps)
+    atoms.info["repeats"] = reps
+    return atoms
+
+def scaled(atoms, phase, params):
+    """Copy of a lattice() cell with lattice parameters `params` ({"a", "c_over_a"}) instead of PHASES'."""
+    new, old = conventional(phase, params), conventional(phase)
+    out = atoms.copy()
+    out.set_cell(np.asarray(atoms.cell) * (np.array(new) / np.array(old))[:, None], scale_atoms=True)
+    return out
+
+def read_eos(path="eos_results.csv"):
+    """{(phase, Co, Fe, Ni): {"a", "c_over_a"}} from eos.py's table ({} if absent)."""
+    if not os.path.exists(path):
+        return {}
+    import pandas as pd
+    df = pd.read_csv(path)
+    return {(r.Structure.lower(), round(r.Co, 3), round(r.Fe, 3), round(r.Ni, 3)):
+            {"a": r.a0, "c_over_a": None if r.Structure == "FCC" else r.c_over_a} for r in df.itertuples()}
 
-        atoms = atoms.repeat((N_SUPERCELL, N_SUPERCELL, N_SUPERCELL))
-        atoms.set_chemical_symbols(rand_elements(len(atoms), fracs, labels))
+def vegard(phase, comp, eos):
+    """a and c/a interpolated linearly from the pure-element entries of `eos` (None if one is missing)."""
+    ends = [eos.get((phase,) + tuple(float(lab == el) for lab in LABELS)) for el in LABELS]
+    if not all(ends):
+        return None
+    w = [comp[lab] for lab in LABELS]
+    return {"a": sum(x * e["a"] for x, e in zip(w, ends)),
+            "c_over_a": None if phase == "fcc" else sum(x * e["c_over_a"] for x, e in zip(w, ends))}
+
+def lattice_params(phase, comp, eos=None):
+    """Lattice parameters of one composition: EOS scan, else Vegard from its end members, else PHASES."""
+    eos = eos or {}
+    key = (phase,) + tuple(round(comp[lab], 3) for lab in LABELS)
+    return eos.get(key) or vegard(phase, comp, eos) or {k: PHASES[phase][k] for k in ("a", "c_over_a")}
+
+def sidecar(phase, atoms, params=None):
+    """Cell description written next to every .data file.
+
+    N_i are integer deck divisors (DECK_SCALE × cells along i); FY is the √3 of
+    the orthohexagonal y axis, so the decks' a2 = Ly / (NY·FY) compares with a1.
+    """
+    L = atoms.cell.lengths()
+    fy = 1.0 if phase == "fcc" else float(np.sqrt(3))
+    div = [int(round(DECK_SCALE * l / (a * f))) for l, a, f in zip(L, conventional(phase, params), (1, fy, 1))]
+    return {"phase": phase, "natoms": len(atoms), "lengths": [round(l, 10) for l in L],
+            "NX": div[0], "NY": div[1], "NZ": div[2], "FY": fy}
+
+def build_structure(phase, comp, replica=0, size=N_SUPERCELL, seed=SEED, params=None, eos=None):
+    """Random-alloy supercell for one (phase, composition, replica).
+
+    `params` overrides a, c/a; else `eos` (read_eos()) seeds them as write_phase does.
+    """
+    if params is None and eos:
+        params = lattice_params(phase, comp, eos)
+    k = COMPOSITIONS.index(comp) if comp in COMPOSITIONS else len(COMPOSITIONS)
+    atoms = lattice(phase, size).copy() if params is None else scaled(lattice(phase, size), phase, params)
+    fracs = [comp[lab] for lab in LABELS]
+    atoms.set_chemical_symbols(rand_elements(len(atoms), fracs, LABELS, replica_rng(phase, k, replica, seed)))
+    return atoms
+
+# ---- Fixed-format LAMMPS data writer ----
+class DataTemplate:
+    """Byte image of a LAMMPS atomic data file for one lattice; only types vary.
+
+    The cell is rotated into LAMMPS' lower-triangular form (a ∥ x, b in xy).
+    """
+
+    def __init__(self, atoms, labels=LABELS):
+        a, b, c = np.asarray(atoms.cell, dtype=float)
+        lx = np.linalg.norm(a)
+        xy = b @ a / lx
+        ly = np.sqrt(b @ b - xy**2)
+        xz = c @ a / lx
+        yz = (b @ c - xy * xz) / ly
+        lz = np.sqrt(c @ c - xz**2 - yz**2)
+        cell = np.array([[lx, 0, 0], [xy, ly, 0], [xz, yz, lz]])
+        frac = np.linalg.solve(np.asarray(atoms.cell).T, atoms.positions.T).T % 1.0
+        pos = frac @ cell
+        n = len(atoms)
+
+        head = [f"LAMMPS data file (generate.py)\n\n{n} atoms\n{len(labels)} atom types\n\n",
+                f"0.0 {lx:.12f} xlo xhi\n0.0 {ly:.12f} ylo yhi\n0.0 {lz:.12f} zlo zhi\n"]
+        if max(abs(xy), abs(xz), abs(yz)) > 1e-10:
+            head.append(f"{xy:.12f} {xz:.12f} {yz:.12f} xy xz yz\n")
+        head.append("\nMasses\n\n")
+        head += [f"{t} {atomic_masses[atomic_numbers[el]]:.4f}  # {el}\n" for t, el in enumerate(labels, 1)]
+        head.append("\nAtoms  # atomic\n\n")
+        self.header = "".join(head).encode()
+
+        # fixed-width rows "<id> <type> x y z\n"; the type sits at column `col`
+        w = len(str(n))
+        rows = [f"{i:>{w}d} 0 {x:20.12f} {y:20.12f} {z:20.12f}\n" for i, (x, y, z) in enumerate(pos, 1)]
+        self.body = np.frombuffer("".join(rows).encode(), dtype=np.uint8).reshape(n, -1).copy()
+        self.col = w + 1
+
+    def tobytes(self, types):
+        """File contents for 1-based integer types (one per atom, < 10)."""
+        body = self.body.copy()
+        body[:, self.col] = ord("0") + np.asarray(types, dtype=np.uint8)
+        return self.header + body.tobytes()
+
+def write_data(path, template, types):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(template.tobytes(types))
+    os.replace(tmp, path)
+
+def write_phase(phase, comps, replicas=1, size=N_SUPERCELL, out_dir=OUT_DIR, seed=SEED,
+                cif=False, jobs=4, sqs_steps=0, eos=None):
+    """Every (composition, replica) of one phase → .data (and .cif), written in parallel.
+
+    `eos` (read_eos()) seeds a and c/a per composition; one template is built per distinct cell.
+    """
+    atoms = lattice(phase, size)
+    n = len(atoms)
+    cells = {}      # (a, c/a) → (atoms, template, sidecar)
+    for comp in comps:
+        p = lattice_params(phase, comp, eos)
+        key = (p["a"], p["c_over_a"])
+        if key not in cells:
+            img = atoms if key == (PHASES[phase]["a"], PHASES[phase]["c_over_a"]) else scaled(atoms, phase, p)
+            cells[key] = img, DataTemplate(img), json.dumps({**sidecar(phase, img, p), **p}, indent=1)
+    codes = np.arange(1, len(LABELS) + 1, dtype=np.uint8)
+
+    sqs_types = {}
+    if sqs_steps:
+        import sqs
+        nbs = sqs.shells(atoms)
+        for k, comp in enumerate(comps):
+            cnt = species_counts(n, [comp[lab] for lab in LABELS])
+            best, _ = sqs.optimize(atoms, cnt, max(replicas, sqs.N_CHAINS), steps=sqs_steps,
+                                   rng=replica_rng(phase, k, 0, seed), nbs=nbs)
+            sqs_types[k] = best[:replicas].astype(np.uint8) + 1
+
+    def one(task):
+        k, comp, r = task
+        p = lattice_params(phase, comp, eos)
+        img, template, meta = cells[(p["a"], p["c_over_a"])]
+        if sqs_steps:
+            types = sqs_types[k][r]
+        else:
+            fracs = [comp[lab] for lab in LABELS]
+            types = replica_rng(phase, k, r, seed).permutation(np.repeat(codes, species_counts(n, fracs)))
+        base = fname_base(phase, comp, r if replicas > 1 else None)
+        write_data(os.path.join(out_dir, base + ".data"), template, types)
+        with open(os.path.join(out_dir, base + ".json"), "w") as fh:
+            fh.write(meta)
+        if cif:
+            img = img.copy()
+            img.set_chemical_symbols(np.asarray(LABELS)[types - 1])
+            write(os.path.join(out_dir, base + ".cif"), img, format="cif")
+        return base
 
-        # Format: fcc_Co0.25_Fe0.25_Ni0.50.data
-        def f(x): return f"{x:.2f}"
-        fname_base = f"{phase}_Co{f(xCo)}_Fe{f(xFe)}_Ni{f(xNi)}"
+    tasks = [(k, comp, r) for k, comp in enumerate(comps) for r in range(replicas)]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(one, tasks)), n
 
-        path_data = os.path.join(OUT_DIR, fname_base + ".data")
-        path_cif  = os.path.join(OUT_DIR, fname_base + ".cif")
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--replicas", type=int, default=1, help="random replicas per composition")
+    ap.add_argument("--size", type=int, default=N_SUPERCELL,
+                    help="FCC repeats per axis (HCP/DHCP: same atom count, most cubic box)")
+    ap.add_argument("--phases", nargs="+", default=list(PHASES), choices=list(PHASES))
+    ap.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1), help="writer threads")
+    ap.add_argument("--cif", action="store_true", help="also write .cif files (slow, ASE)")
+    ap.add_argument("--out", default=OUT_DIR)
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument("--sqs", type=int, nargs="?", const=5000, default=0, metavar="STEPS",
+                    help="SQS annealing steps per composition (0 = random shuffle)")
+    ap.add_argument("--eos", default="eos_results.csv",
+                    help="eos.py table seeding a and c/a per composition (used if it exists)")
+    ap.add_argument("--no-eos", action="store_true", help="nominal PHASES lattice parameters for all")
+    args = ap.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    eos = {} if args.no_eos else read_eos(args.eos)
+    if eos:
+        print(f"⚡ Lattice parameters seeded from {args.eos} ({len(eos)} entries, Vegard for the rest)")
 
-        write(path_data, atoms, format="lammps-data", atom_style="atomic")
-        write(path_cif, atoms, format="cif")
+    for phase in args.phases:
+        t0 = time.time()
+        names, n = write_phase(phase, COMPOSITIONS, args.replicas, args.size, args.out,
+                               args.seed, args.cif, args.jobs, args.sqs, eos)
+        print(f"✓ {phase.upper()}: {len(names)} structures × {n} atoms in {time.time() - t0:.2f} s")
 
-        print(f"✓ {fname_base} → {len(atoms)} atoms")
+    print(f"\n✅ All .data{' and .cif' if args.cif else ''} files written to {args.out}/")
 
-print("\n✅ All .data and .cif files written to work/data/")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental, single-pass harvester for LAMMPS logs → one columnar results store.
+
+Each log is streamed line by line once. That single pass collects the thermo
+tables, FINAL_STRUCT / FINAL_TEMP / FINAL_PE_PERATOM, the lattice vectors and
+orientation, the atom count and every ERROR/WARNING line. When monitor.py has
+appended MONITOR_* averages, E_per_atom and a1..a3 are those equilibrium means
+(errors in E_err, a*_err; the last-step value stays in E_last). The store
+(work/results.npz) keeps path, mtime and size per log, so re-harvesting
+10k logs only re-parses files that are new or changed.
+
+Tables in the store:
+    runs    one row per log   (Structure, Co, Fe, Ni, Temperature, E_per_atom, a1..a3, …)
+    thermo  every thermo row  (path, run, Step, Temp, PotEng, …)
+
+Usage:
+    python harvest.py                     # *.log and work/logs/*.log
+    python harvest.py work/logs --csv     # also write lattice_results.csv / potential_energy_all.csv
+"""
+
+import os, re, glob, argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+ROOT  = os.path.abspath(os.path.dirname(__file__))
+STORE = os.path.join(ROOT, "work", "results.npz")
+
+META_RE   = re.compile(r'(fcc|hcp|dhcp)_Co([0-9.]+)_Fe([0-9.]+)_Ni([0-9.]+)(?:_r[0-9]+)?_([0-9]+)K')
+ATOMS_RE  = re.compile(r"^\s*(\d+) atoms\s*$")
+ORIENT_RE = re.compile(r"Orientation:\s*x=\[([^\]]+)\],\s*y=\[([^\]]+)\],\s*z=\[([^\]]+)\]")
+NUM_RE    = re.compile(r"([-+0-9.eE]+)")
+MON_RE    = re.compile(r"^MONITOR_(PE_PERATOM|a[123])\s*=\s*(\S+)\s*\+/-\s*(\S+)")
+
+# ------------------ Single-pass parser ------------------
+def parse_metadata(fname):
+    """Extract structure, composition, and temperature from filename."""
+    m = META_RE.search(Path(fname).stem)
+    if not m:
+        return None
+    struct, Co, Fe, Ni, T = m.groups()
+    return struct.upper(), float(Co), float(Fe), float(Ni), int(T)
+
+def empty_record(path):
+    st = os.stat(path)
+    rec = {
+        "path": os.path.abspath(path), "mtime": st.st_mtime_ns, "size": st.st_size,
+        "tag": Path(path).stem, "Structure": "", "Co": np.nan, "Fe": np.nan, "Ni": np.nan,
+        "Temperature": np.nan, "E_per_atom": np.nan, "E_last": np.nan, "E_err": np.nan,
+        "natoms": np.nan, "a1": np.nan, "a2": np.nan, "a3": np.nan,
+        "a1_err": np.nan, "a2_err": np.nan, "a3_err": np.nan,
+        "Orientation_x": "", "Orientation_y": "", "Orientation_z": "",
+        "errors": "", "n_warnings": 0, "skew_warning": False, "finished": False,
+    }
+    meta = parse_metadata(path)
+    if meta:
+        rec["Structure"], rec["Co"], rec["Fe"], rec["Ni"], rec["Temperature"] = meta
+    return rec
+
+def parse_log(path):
+    """Stream one log → (run record, thermo columns dict)."""
+    rec = empty_record(path)
+    thermo, cols, missing, run = {"run": []}, None, [], -1
+    errors, averaged = [], {}
+
+    with open(path, "r", errors="ignore") as fh:
+        for line in fh:
+            if cols is not None:
+                tok = line.split()
+                if len(tok) == len(cols):
+                    try:
+                        vals = [float(t) for t in tok]
+                    except ValueError:
+                        vals = None
+                    if vals is not None:
+                        for c, v in zip(cols, vals):
+                            thermo[c].append(v)
+                        for c in missing:
+                            thermo[c].append(np.nan)
+                        thermo["run"].append(run)
+                        continue
+                cols = None  # table ended (Loop time, WARNING, …)
+
+            s = line.lstrip()
+            if not s:
+                continue
+            if s.startswith("Step ") or s.strip() == "Step":
+                cols = s.split()
+                run += 1
+                n_before = len(thermo["run"])
+                for c in cols:
+                    thermo.setdefault(c, [np.nan] * n_before)
+                # columns absent from this header keep the table rectangular
+                missing = [c for c in thermo if c != "run" and c not in cols]
+                continue
+            if s.startswith("FINAL_STRUCT"):
+                rec["Structure"] = s.split("=", 1)[1].strip().upper()
+            elif s.startswith("FINAL_TEMP"):
+                m = NUM_RE.search(s.split("=", 1)[1])
+                if m: rec["Temperature"] = float(m.group(1))
+            elif s.startswith("FINAL_PE_PERATOM"):
+                m = NUM_RE.search(s.split("=", 1)[1])
+                if m: rec["E_per_atom"] = float(m.group(1))
+            elif s.startswith("Lattice vector a"):
+                k, v = s[len("Lattice vector "):].split("=", 1)
+                m = NUM_RE.search(v)
+                if m and k.strip() in ("a1", "a2", "a3"):
+                    rec[k.strip()] = float(m.group(1))
+            elif s.startswith("Orientation:"):
+                o = ORIENT_RE.search(s)
+                if o:
+                    rec["Orientation_x"], rec["Orientation_y"], rec["Orientation_z"] = (g.strip() for g in o.groups())
+            elif s.startswith("ERROR"):
+                errors.append(s.strip())
+            elif s.startswith("WARNING"):
+                rec["n_warnings"] += 1
+                if "Triclinic box skew is large" in s:
+                    rec["skew_warning"] = True
+            elif s.startswith("MONITOR_"):
+                m = MON_RE.match(s)
+                if m:
+                    averaged[m.group(1)] = (float(m.group(2)), float(m.group(3)))
+            elif s.startswith("END_OF_RUN"):
+                rec["finished"] = True
+            else:
+                m = ATOMS_RE.match(line)
+                if m:
+                    rec["natoms"] = float(m.group(1))
+
+    rec["errors"] = " | ".join(errors)
+    rec["E_last"] = rec["E_per_atom"]
+    if "PE_PERATOM" in averaged:
+        rec["E_per_atom"], rec["E_err"] = averaged["PE_PERATOM"]
+    for k in ("a1", "a2", "a3"):
+        if k in averaged:
+            rec[k], rec[f"{k}_err"] = averaged[k]
+    return rec, thermo
+
+# ------------------ Columnar store ------------------
+def _to_array(values):
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        arr = arr.astype(str)
+    return arr
+
+def _from_array(arr):
+    """Inverse of _to_array for flag columns: "True"/"False" strings back to booleans."""
+    if arr.dtype.kind == "U" and len(arr) and set(np.unique(arr)) <= {"True", "False", "nan"}:
+        return pd.Series(arr).map({"True": True, "False": False}).values
+    return arr
+
+def save_store(tables, store=STORE):
+    """Write {table: DataFrame} as one npz of `table:column` arrays (atomic replace)."""
+    os.makedirs(os.path.dirname(store), exist_ok=True)
+    arrays = {}
+    for name, df in tables.items():
+        arrays[f"{name}:__len__"] = np.array([len(df)])
+        for c in df.columns:
+            arrays[f"{name}:{c}"] = _to_array(df[c].values)
+    tmp = store + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, store)
+
+def load_store(store=STORE):
+    """{table: DataFrame} from the store ({} if missing)."""
+    if not os.path.exists(store):
+        return {}
+    cols = {}
+    with np.load(store, allow_pickle=False) as z:
+        for key in z.files:
+            name, c = key.split(":", 1)
+            cols.setdefault(name, {})[c] = z[key]
+    return {name: pd.DataFrame({c: _from_array(v) for c, v in d.items() if c != "__len__"})
+            for name, d in cols.items()}
+
+def load_table(name, store=STORE):
+    return load_store(store).get(name, pd.DataFrame())
+
+def update_runs(extra, on="tag", store=STORE, fill=None):
+    """Merge extra per-run columns (e.g. from analysis stages) into the runs table.
+
+    `fill` gives defaults ({column: value}) for runs the stage did not cover, so
+    flag columns stay boolean instead of turning into object columns with NaN.
+    """
+    tables = load_store(store)
+    runs = tables.get("runs", pd.DataFrame({on: []}))
+    new_cols = [c for c in extra.columns if c != on]
+    runs = runs.drop(columns=[c for c in new_cols if c in runs.columns])
+    runs = runs.merge(extra, on=on, how="left")
+    for c, v in (fill or {}).items():
+        runs[c] = runs[c].fillna(v).astype(type(v))
+    tables["runs"] = runs
+    save_store(tables, store)
+    return tables["runs"]
+
+# ------------------ Incremental harvest ------------------
+def find_logs(targets):
+    paths = []
+    for t in targets:
+        if os.path.isdir(t):
+            paths += glob.glob(os.path.join(t, "*.log"))
+        else:
+            paths += glob.glob(t)
+    return sorted(set(os.path.abspath(p) for p in paths))
+
+def harvest(paths, store=STORE):
+    """Parse new/changed logs among `paths` and return their rows of the runs table.
+
+    Rows of unchanged logs are reused; rows of other logs already in the store
+    are kept while the file still exists.
+    """
+    tables = load_store(store)
+    runs = tables.get("runs", pd.DataFrame())
+    thermo = tables.get("thermo", pd.DataFrame())
+
+    stat = {p: os.stat(p) for p in paths}
+    keep = np.zeros(len(runs), dtype=bool)
+    if len(runs):
+        keep = np.array([(stat[p].st_mtime_ns, stat[p].st_size) == (int(m), int(z)) if p in stat
+                         else os.path.exists(p)
+                         for p, m, z in zip(runs["path"], runs["mtime"], runs["size"])])
+    old_runs = runs[keep].reset_index(drop=True)
+    kept = set(old_runs["path"]) if len(old_runs) else set()
+    if len(thermo):
+        thermo = thermo[thermo["path"].isin(kept)]
+
+    recs, tabs = [], [thermo] if len(thermo) else []
+    todo = [p for p in paths if p not in kept]
+    for p in todo:
+        rec, th = parse_log(p)
+        recs.append(rec)
+        if th["run"]:
+            tabs.append(pd.DataFrame(th).assign(path=p))
+
+    runs = pd.concat([old_runs, pd.DataFrame(recs)], ignore_index=True) if recs else old_runs
+    thermo = pd.concat(tabs, ignore_index=True) if tabs else pd.DataFrame({"path": [], "run": []})
+    tables.update(runs=runs, thermo=thermo)
+    save_store(tables, store)
+    print(f"harvest: {len(todo)} parsed, {len(paths) - len(todo)} unchanged → {store}")
+    if "path" not in runs:
+        return pd.DataFrame([empty_record(__file__)]).iloc[:0]  # no logs at all: empty, full schema
+    return runs[runs["path"].isin(stat)].reset_index(drop=True)
+
+# ------------------ Legacy CSV views ------------------
+def lattice_table(runs):
+    """runs → lattice_results.csv layout (Structure, Co, Fe, Ni, Temperature, a1..c, …)."""
+    df = runs[(runs["Structure"] != "") & runs["Co"].notna()].copy()
+    hexa = df["Structure"] != "FCC"
+    df["a"] = np.where(hexa, df[["a1", "a2"]].mean(axis=1, skipna=False), df["a1"])
+    df["c"] = np.where(hexa, df["a3"], df["a1"])
+    df["NonConventional"] = np.where((df["Orientation_x"] != "") & (df["Orientation_x"] != "1 0 0"), "True", "False")
+    df["Temperature"] = df["Temperature"].astype("Int64")
+    cols = ["Structure", "Co", "Fe", "Ni", "Temperature", "a1", "a2", "a3", "a", "c",
+            "Orientation_x", "Orientation_y", "Orientation_z", "NonConventional"]
+    return df[cols].reset_index(drop=True)
+
+def energy_table(runs):
+    """runs → potential_energy_all.csv layout (Structure, Co, Fe, Ni, Temperature, E_per_atom).
+
+    Runs that fingerprint.py flagged as transformed are left out.
+    """
+    df = runs[(runs["Structure"] != "") & runs["Co"].notna() & runs["E_per_atom"].notna()].copy()
+    if "transformed" in df:
+        df = df[~df["transformed"].fillna(False).astype(bool)]
+    df["Temperature"] = df["Temperature"].astype(int)
+    return df[["Structure", "Co", "Fe", "Ni", "Temperature", "E_per_atom"]].reset_index(drop=True)
+
+def read_energies(csv="potential_energy_all.csv", store=STORE):
+    """Energy table from the store when it has results, else the legacy CSV."""
+    runs = load_table("runs", store)
+    if len(runs) and runs["E_per_atom"].notna().any():
+        return energy_table(runs)
+    return pd.read_csv(csv)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("targets", nargs="*", default=["*.log", os.path.join("work", "logs")])
+    ap.add_argument("--store", default=STORE)
+    ap.add_argument("--csv", action="store_true", help="also write the legacy CSV views")
+    args = ap.parse_args()
+
+    runs = harvest(find_logs(args.targets), args.store)
+    if args.csv:
+        lattice_table(runs).to_csv("lattice_results.csv", index=False)
+        energy_table(runs).to_csv("potential_energy_all.csv", index=False)
+        print("✅ Saved: lattice_results.csv, potential_energy_all.csv")
+
+if __name__ == "__main__":
+    main()
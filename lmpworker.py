@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent LAMMPS workers on the Python library interface.
+
+A Pool starts N processes, and each one creates a single `lammps.lammps()`
+instance. Jobs are queued to the pool. Between jobs a worker sends `clear`
+and deletes the index variables it set for the previous job (variables
+survive `clear`). It then sets the new job up: variables, an optional deck
+(`file`) and extra commands.
+LAMMPS initializes once per worker, not once per job, which dominates short
+jobs such as minimizations, strained static cells and γ-surface points.
+
+Results come back as Python values read straight from the instance
+(get_thermo, extract_variable, extract_compute, get_natoms), so nothing has
+to be printed and regex-parsed. A job's `log` still writes a normal LAMMPS
+log for harvest.py. A worker whose instance raised an error replaces it
+before the next job.
+
+`factory` builds the instance, and MockLammps stands in when the LAMMPS
+Python module is not installed:
+
+    python lmpworker.py --mock -j 4                # static jobs over work/data/*.data
+    python run_all.py --lib --workers 8            # full decks, warm workers
+    python run_all.py --lib mock --workers 2       # scheduler plumbing without LAMMPS
+"""
+
+import os, re, glob, time, argparse, importlib.util
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+SETFL_REL = "../potentials/FeNiCrCoAl-heaweight.setfl"   # as in in.*.lmp
+ELEMENTS = "Co Fe Ni"
+DECK_RESULTS = ("PE_PERATOM", "a1", "a2", "a3")           # equal-style variables the decks define
+
+# library.h enums: LMP_STYLE_GLOBAL, LMP_TYPE_SCALAR / LMP_TYPE_VECTOR, LMP_VAR_EQUAL
+STYLE_GLOBAL, TYPE_SCALAR, TYPE_VECTOR, VAR_EQUAL = 0, 0, 1, 0
+
+Job = namedtuple("Job", "tag in_file vars commands log thermo variables computes",
+                 defaults=(None, {}, (), None, ("pe",), (), ()))
+Job.__doc__ = """One unit of work. `computes` are (id, n): n = 0 for a global scalar, else a vector of length n."""
+
+# ------------------ Job builders ------------------
+def setup(data, setfl=SETFL_REL):
+    return ["units metal", "atom_style atomic", "boundary p p p", f"read_data {data}",
+            "pair_style eam/alloy", f"pair_coeff * * {setfl} {ELEMENTS}"]
+
+def deck_job(tag, in_file, variables, log=None):
+    """A whole in.*.lmp run; results are the decks' FINAL_* variables."""
+    return Job(tag, in_file=in_file, vars=dict(variables), log=log, thermo=("pe", "press"),
+               variables=DECK_RESULTS)
+
+def static_job(tag, data, commands=(), setfl=SETFL_REL):
+    """Energy and pressure tensor (bar) of a data file at fixed positions (`run 0`)."""
+    return Job(tag, commands=setup(data, setfl) + list(commands) + ["run 0"],
+               thermo=("pe", "press", "vol"), computes=(("thermo_press", 6),))
+
+def minimize_job(tag, data, commands=(), setfl=SETFL_REL, etol=1e-12, ftol=1e-12):
+    """Conjugate-gradient relaxation at fixed cell; add e.g. `fix … box/relax …` via `commands`."""
+    return Job(tag, commands=setup(data, setfl) + list(commands)
+               + ["min_style cg", f"minimize {etol} {ftol} 50000 100000"],
+               thermo=("pe", "press", "lx", "ly", "lz"), computes=(("thermo_press", 6),))
+
+# ------------------ Instances ------------------
+def library(cmdargs=("-screen", "none", "-log", "none")):
+    """A real lammps.lammps() instance (LAMMPS Python module)."""
+    try:
+        from lammps import lammps
+    except ImportError as e:
+        raise RuntimeError("LAMMPS Python module not installed (use the mock factory to test)") from e
+    return lammps(cmdargs=list(cmdargs))
+
+def check_factory(factory):
+    """Fail early (in the parent) when the LAMMPS module the workers would import is missing."""
+    if factory is library and importlib.util.find_spec("lammps") is None:
+        raise RuntimeError("LAMMPS Python module not installed (use the mock factory to test)")
+
+class MockLammps:
+    """Stand-in with the subset of the lammps.lammps API the workers use.
+
+    Tracks variables across `clear` like LAMMPS does, counts atoms from
+    read_data headers, writes `log` files with the deck's results, and
+    returns fixed, atom-count-based values.
+    """
+
+    PE_PERATOM = -4.4
+    created = 0
+
+    def __init__(self, cmdargs=None):
+        MockLammps.created += 1
+        self.variables, self.natoms, self.log, self.ran = {}, 0, None, False
+
+    def command(self, cmd):
+        tok = cmd.split()
+        if not tok or tok[0].startswith("#"):
+            return
+        if tok[0] == "clear":
+            self.natoms, self.ran = 0, False
+        elif tok[0] == "variable" and len(tok) >= 3:
+            if tok[2] == "delete":
+                self.variables.pop(tok[1], None)
+            elif tok[2] == "index":
+                self.variables.setdefault(tok[1], tok[3])
+        elif tok[0] == "read_data":
+            path = self.expand(tok[1])
+            with open(path, errors="ignore") as fh:
+                m = re.search(r"^\s*(\d+)\s+atoms\s*$", fh.read(4000), re.M)
+            if not m:
+                raise Exception(f"ERROR: Invalid data file {path}")
+            self.natoms = int(m.group(1))
+        elif tok[0] == "log":
+            self.log = None if tok[1] == "none" else self.expand(tok[1])
+            if self.log:
+                open(self.log, "w").close()
+        elif tok[0] in ("run", "minimize"):
+            if not self.natoms:
+                raise Exception(f"ERROR: {tok[0]} command before simulation box is defined")
+            self.ran = True
+
+    def expand(self, s):
+        return re.sub(r"\$\{(\w+)\}", lambda m: self.variables.get(m.group(1), m.group(0)), s)
+
+    def file(self, path):
+        with open(path) as fh:
+            for line in fh:
+                if line.split()[:1] in (["variable"], ["read_data"]):
+                    self.command(line.split("#")[0])
+        self.command("run 0")
+        if self.log:
+            with open(self.log, "a") as fh:
+                fh.write(f"{self.natoms} atoms\nFINAL_PE_PERATOM = {self.PE_PERATOM} eV\nEND_OF_RUN\n")
+
+    def get_natoms(self):
+        return self.natoms
+
+    def get_thermo(self, name):
+        return {"pe": self.PE_PERATOM * self.natoms, "vol": 11.2 * self.natoms}.get(name, 0.0)
+
+    def extract_variable(self, name, group=None, vartype=VAR_EQUAL):
+        return {"PE_PERATOM": self.PE_PERATOM, "a1": 1.775, "a2": 1.775, "a3": 1.775}.get(name)
+
+    def extract_compute(self, cid, style, ctype):
+        return [0.0] * 6 if ctype == TYPE_VECTOR else 0.0
+
+    def version(self):
+        return 0
+
+    def close(self):
+        pass
+
+# ------------------ Worker ------------------
+class Worker:
+    """One persistent instance; run(job) → dict of Python values."""
+
+    def __init__(self, factory=library):
+        self.factory = factory
+        self.lmp, self.served, self.owned = factory(), 0, []
+
+    def reset(self):
+        self.lmp.command("clear")
+        for name in self.owned:
+            self.lmp.command(f"variable {name} delete")
+        self.owned = []
+
+    def run(self, job):
+        t0 = time.time()
+        out = {"tag": job.tag, "ok": False, "error": None, "pid": os.getpid(), "served": self.served}
+        try:
+            self.reset()
+            for name, value in job.vars.items():
+                # index variables survive `clear` and are not redefined, e.g. a deck's NX default
+                self.lmp.command(f"variable {name} delete")
+                self.lmp.command(f"variable {name} index {value}")
+                self.owned.append(name)
+            if job.log:
+                self.lmp.command(f"log {job.log}")
+            if job.in_file:
+                self.lmp.file(job.in_file)
+            for cmd in job.commands:
+                self.lmp.command(cmd)
+            res = {"natoms": self.lmp.get_natoms()}
+            for name in job.thermo:
+                res[name] = self.lmp.get_thermo(name)
+            for name in job.variables:
+                res[name] = self.lmp.extract_variable(name, None, VAR_EQUAL)
+            for cid, n in job.computes:
+                if n:
+                    vec = self.lmp.extract_compute(cid, STYLE_GLOBAL, TYPE_VECTOR)
+                    res[cid] = [float(vec[k]) for k in range(n)]
+                else:
+                    res[cid] = self.lmp.extract_compute(cid, STYLE_GLOBAL, TYPE_SCALAR)
+            out.update(ok=True, results=res)
+        except Exception as e:
+            out["error"] = str(e).strip() or type(e).__name__
+            self.lmp.close()          # state after an error is undefined: start a fresh instance
+            self.lmp, self.owned = self.factory(), []
+        finally:
+            if job.log and out["error"] is None:
+                self.lmp.command("log none")
+        self.served += 1
+        out["wall_s"] = time.time() - t0
+        return out
+
+# ------------------ Pool ------------------
+_worker = None
+
+def _init(factory):
+    global _worker
+    _worker = Worker(factory)
+
+def _run(job):
+    return _worker.run(job)
+
+class Pool:
+    """`n` worker processes, each with one persistent LAMMPS instance."""
+
+    def __init__(self, n, factory=library):
+        check_factory(factory)
+        self.executor = ProcessPoolExecutor(max_workers=n, initializer=_init, initargs=(factory,))
+
+    def submit(self, job):
+        return self.executor.submit(_run, job)
+
+    def map(self, jobs):
+        return self.executor.map(_run, jobs)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="data files (default: work/data/*.data)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--mock", action="store_true", help="use MockLammps instead of the LAMMPS module")
+    ap.add_argument("--minimize", action="store_true", help="minimize instead of a static `run 0`")
+    args = ap.parse_args()
+
+    paths = sorted(args.paths or glob.glob(os.path.join("work", "data", "*.data")))
+    if not paths:
+        print("❌ No data files found.")
+        return
+    build = minimize_job if args.minimize else static_job
+    jobs = [build(os.path.splitext(os.path.basename(p))[0], p) for p in paths]
+    t0 = time.time()
+    try:
+        pool = Pool(args.jobs, MockLammps if args.mock else library)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    with pool:
+        out = list(pool.map(jobs))
+    for r in out:
+        if r["ok"]:
+            res = r["results"]
+            print(f"✓ {r['tag']}: {res['pe'] / max(res['natoms'], 1):.6f} eV/atom, "
+                  f"P = {res['press']:.1f} bar  ({r['wall_s']:.2f} s, job {r['served'] + 1} of pid {r['pid']})")
+        else:
+            print(f"❌ {r['tag']}: {r['error']}")
+    n_ok = sum(r["ok"] for r in out)
+    print(f"✅ {n_ok}/{len(out)} jobs on {len({r['pid'] for r in out})} warm workers in {time.time() - t0:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-job resource and LAMMPS timing metrics for run_all.py.
+
+Every LAMMPS launch is reaped with os.wait4, which gives wall, user/sys CPU
+and peak RSS of the process tree. Its log is parsed for the timing LAMMPS
+prints after each run: the `Loop time`, `Performance: … ns/day` and the
+Pair/Neigh/Comm/Modify/Output/Other rows of the MPI task timing breakdown,
+split into minimize / npt / nvt with the decks' "STAGE" markers. One JSON
+record per job is appended to work/metrics.jsonl.
+
+Running the module prints a report: ns/day per structure and composition,
+the section breakdown, and outliers in cost per atom-step (e.g. the skewed
+triclinic DHCP boxes LAMMPS warns about).
+
+    python metrics.py                 # report from work/metrics.jsonl
+    python metrics.py --csv metrics_report.csv
+"""
+
+import os, re, sys, json, time, argparse, threading
+
+import numpy as np
+import pandas as pd
+
+import harvest
+
+METRICS = os.path.join(harvest.ROOT, "work", "metrics.jsonl")
+
+LOOP_RE  = re.compile(r"^Loop time of (\S+) on (\d+) procs for (\d+) steps with (\d+) atoms")
+PERF_RE  = re.compile(r"^Performance:\s+(\S+) ns/day")
+SECT_RE  = re.compile(r"^(Pair|Bond|Kspace|Neigh|Comm|Output|Modify|Other)\s*\|([^|]*)\|([^|]*)\|")
+STAGE_RE = re.compile(r"^STAGE (\w+)")
+WALL_RE  = re.compile(r"^Total wall time: (\d+):(\d+):(\d+)")
+SECTIONS = ("Pair", "Neigh", "Comm", "Modify", "Output", "Other")
+OUTLIER  = 1.5    # cost per atom-step above OUTLIER × that of the cheapest structure
+RSS_UNIT = 1024 ** 2 if sys.platform == "darwin" else 1024    # ru_maxrss: bytes on macOS, KiB on Linux
+
+_lock = threading.Lock()
+
+# ------------------ Process usage ------------------
+def wait(proc, t0):
+    """Reap a Popen started at `t0` with os.wait4 → (returncode, usage dict)."""
+    _, status, ru = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, {"wall_s": time.time() - t0, "cpu_user_s": ru.ru_utime,
+                             "cpu_sys_s": ru.ru_stime, "max_rss_mb": ru.ru_maxrss / RSS_UNIT}
+
+# ------------------ LAMMPS timing ------------------
+def parse_timing(log):
+    """Loop time, steps, ns/day and section seconds per stage of one LAMMPS log."""
+    stages, cur, natoms, procs, wall, skew, loop = {}, "minimize", None, None, None, False, 0.0
+    try:
+        fh = open(log, errors="ignore")
+    except OSError:
+        return {}
+    with fh:
+        for line in fh:
+            m = STAGE_RE.match(line)
+            if m:
+                cur = m.group(1)
+                continue
+            m = LOOP_RE.match(line)
+            if m:
+                st = stages.setdefault(cur, {"loop_s": 0.0, "steps": 0, "ns": 0.0,
+                                             **{s: 0.0 for s in SECTIONS}})
+                loop = float(m.group(1))
+                st["loop_s"] += loop
+                st["steps"] += int(m.group(3))
+                procs, natoms = int(m.group(2)), int(m.group(4))
+                continue
+            m = PERF_RE.match(line)
+            if m and cur in stages:
+                try:
+                    stages[cur]["ns"] += float(m.group(1)) * loop / 86400.0
+                except ValueError:
+                    pass
+                continue
+            m = SECT_RE.match(line)
+            if m and cur in stages and m.group(1) in SECTIONS:
+                try:
+                    stages[cur][m.group(1)] += float(m.group(3))   # avg time over ranks
+                except ValueError:
+                    pass
+                continue
+            m = WALL_RE.match(line)
+            if m:
+                h, mi, s = map(int, m.groups())
+                wall = 3600 * h + 60 * mi + s
+            elif "WARNING" in line and "skew" in line.lower():
+                skew = True
+    return {"natoms": natoms, "procs": procs, "lammps_wall_s": wall, "skew_warning": skew, "stages": stages}
+
+# ------------------ Records ------------------
+def record(tag, usage, log, path=METRICS, **info):
+    """Append one job's metrics (usage + parsed timing) to the JSONL file."""
+    rec = {"tag": tag, "time": time.strftime("%Y-%m-%d %H:%M:%S"), **usage, **parse_timing(log), **info}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(path, "a") as fh:
+        fh.write(json.dumps(rec) + "\n")
+    return rec
+
+def load(path=METRICS):
+    """Last record per tag as a flat frame (stage fields as <stage>_<field>)."""
+    recs = {}
+    if os.path.exists(path):
+        with open(path) as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                recs[rec["tag"]] = rec
+    rows = []
+    for tag, rec in recs.items():
+        row = {k: v for k, v in rec.items() if k != "stages"}
+        for stage, st in (rec.get("stages") or {}).items():
+            for k, v in st.items():
+                row[f"{stage}_{k}"] = v
+        meta = harvest.parse_metadata(tag + ".log")
+        if meta:
+            row["Structure"], row["Co"], row["Fe"], row["Ni"], row["Temperature"] = meta
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# ------------------ Report ------------------
+def summarize(df):
+    """Per-job MD totals: ns/day, cost per atom-step, section shares."""
+    df = df.copy()
+    md = [s for s in ("npt", "nvt") if f"{s}_loop_s" in df]
+    zero = pd.Series(0.0, index=df.index)
+    col = lambda field: sum((df.get(f"{s}_{field}", zero).fillna(0) for s in md), zero).to_numpy(float)
+    # NaN where there is no MD stage (e.g. a job that died in minimize) instead of dividing by zero
+    ratio = lambda a, b: np.divide(a, b, out=np.full(len(df), np.nan), where=b > 0)
+    loop, steps, ns = col("loop_s"), col("steps"), col("ns")
+    procs = df["procs"].fillna(1).to_numpy(float) if "procs" in df else 1.0
+    natoms = df["natoms"].to_numpy(float) if "natoms" in df else np.full(len(df), np.nan)
+    df["md_loop_s"] = loop
+    df["ns_per_day"] = ratio(ns * 86400.0, loop)
+    df["us_per_atom_step"] = ratio(1e6 * loop * procs, steps * natoms)
+    for s in SECTIONS:
+        df[f"{s}_pct"] = ratio(100 * col(s), loop)
+    # same potential everywhere, so cost per atom-step should not depend on the phase;
+    # the cheapest structure's median is the reference
+    ref = df.groupby("Structure")["us_per_atom_step"].median().min()
+    df["cost_ratio"] = df["us_per_atom_step"] / ref
+    df["outlier"] = df["cost_ratio"] > OUTLIER
+    return df
+
+def report(df):
+    cols = ["wall_s", "cpu_user_s", "max_rss_mb", "natoms", "ns_per_day", "us_per_atom_step", "cost_ratio"]
+    cols += [f"{s}_pct" for s in ("Pair", "Neigh", "Comm")]
+    print("\n── per structure ──")
+    print(df.groupby("Structure")[cols].median().round(2).to_string())
+    print("\n── ns/day per composition ──")
+    comp = df.assign(comp=[f"Co{c:.2f}_Fe{f:.2f}_Ni{n:.2f}" for c, f, n in zip(df.Co, df.Fe, df.Ni)])
+    print(comp.pivot_table(index="comp", columns="Structure", values="ns_per_day", aggfunc="median").round(2).to_string())
+    if "minimize_loop_s" in df:
+        share = 100 * df["minimize_loop_s"].fillna(0) / (df["minimize_loop_s"].fillna(0) + df["md_loop_s"])
+        print(f"\nminimization: {share.median():.1f}% of loop time (median)")
+    out = df[df["outlier"]]
+    if len(out):
+        print(f"\n⚠️  {len(out)} outliers (> {OUTLIER}× the cheapest structure's cost per atom-step):")
+        for r in out.sort_values("us_per_atom_step", ascending=False).itertuples():
+            why = " [triclinic skew warning]" if getattr(r, "skew_warning", False) else ""
+            print(f"   {r.tag}: {r.us_per_atom_step:.2f} µs/atom-step ({r.cost_ratio:.1f}×), Neigh {r.Neigh_pct:.0f}%, "
+                  f"Comm {r.Comm_pct:.0f}%{why}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--metrics", default=METRICS)
+    ap.add_argument("--csv", help="also write the per-job table")
+    args = ap.parse_args()
+
+    df = load(args.metrics)
+    if df.empty or "Structure" not in df:
+        print(f"❌ No job metrics in {args.metrics}")
+        return
+    df = summarize(df)
+    report(df)
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"✅ Saved: {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-the-fly thermo monitor for the NPT/NVT stages of in.*.lmp.
+
+Streams the stdout of a running LAMMPS process (tee'd to the log) and keeps
+the thermo series of the current stage (decks print "STAGE npt" / "STAGE nvt").
+After each new sample it runs an MSER truncation to drop the equilibration
+transient, then a block-averaged (Flyvbjerg–Petersen) standard error of the rest.
+Once E/atom (and the box lengths during NPT) converge within tolerance, it
+touches ${OUTDIR}/<stage>_<T>K.converged. The deck checks that file between
+5000-step chunks and skips the remaining chunks of the stage.
+
+At the end it appends averaged MONITOR_* lines (mean ± error) to the log and
+writes ${OUTDIR}/monitor_<T>K.json. run_monitored_batch() does the same for
+in.batch.lmp, with one monitor per "REPLICA <T>" block.
+"""
+
+import os, re, json, time, subprocess
+import numpy as np
+
+import metrics
+
+ATOMS_RE = re.compile(r"^\s*(\d+) atoms\s*$")
+STAGES   = ("npt", "nvt")
+DECK_CELLS = 8  # in.*.lmp report a_i = L_i / N_i, N_i = 8 unless the data sidecar says otherwise
+
+# ------------------ Statistics ------------------
+def mser_truncation(x, batch=5):
+    """MSER-5: index where the equilibration transient ends."""
+    x = np.asarray(x, dtype=float)
+    nb = len(x) // batch
+    if nb < 4:
+        return 0
+    b = x[:nb * batch].reshape(nb, batch).mean(axis=1)
+    n = nb - np.arange(nb // 2)
+    tail_sum = np.cumsum(b[::-1])[::-1][:nb // 2]
+    tail_sq = np.cumsum((b ** 2)[::-1])[::-1][:nb // 2]
+    var = tail_sq / n - (tail_sum / n) ** 2
+    return int(np.argmin(var / n)) * batch
+
+def block_stderr(x, min_blocks=8):
+    """Standard error of the mean of a correlated series (blocking, plateau max)."""
+    x = np.asarray(x, dtype=float)
+    if len(x) < 2:
+        return np.inf
+    best = x.std(ddof=1) / np.sqrt(len(x))
+    while len(x) >= 2 * min_blocks:
+        x = 0.5 * (x[: len(x) // 2 * 2 : 2] + x[1: len(x) // 2 * 2 : 2])
+        best = max(best, x.std(ddof=1) / np.sqrt(len(x)))
+    return best
+
+def summarize(x):
+    """(mean, stderr, n_used) after MSER truncation."""
+    x = np.asarray(x, dtype=float)
+    if len(x) == 0:
+        return np.nan, np.inf, 0
+    t0 = mser_truncation(x)
+    y = x[t0:]
+    return y.mean(), block_stderr(y), len(y)
+
+# ------------------ Stream parser ------------------
+def divisors(cell):
+    """Lx, Ly, Lz divisors of the decks' a1/a2/a3 from run_all.cell_vars() (N_i; Ly also by FY)."""
+    return cell.get("NX", DECK_CELLS), cell.get("NY", DECK_CELLS) * cell.get("FY", 1), cell.get("NZ", DECK_CELLS)
+
+def sentinel(outdir, temp, stage):
+    return os.path.join(outdir, f"{stage}_{temp}K.converged")
+
+def clear_sentinels(outdir, temp):
+    """Remove a previous run's sentinels; a stale one would end the stage at its first check."""
+    for s in STAGES:
+        if os.path.exists(sentinel(outdir, temp, s)):
+            os.remove(sentinel(outdir, temp, s))
+
+class ThermoMonitor:
+    """Consumes log lines; tracks per-stage thermo series and convergence."""
+
+    def __init__(self, outdir, temp, tol_e=2e-4, tol_l=2e-3, min_samples=40, div=(DECK_CELLS,) * 3):
+        self.outdir, self.temp = outdir, temp
+        self.div = dict(zip(("Lx", "Ly", "Lz"), div))
+        self.tol_e, self.tol_l, self.min_samples = tol_e, tol_l, min_samples
+        self.natoms = None
+        self.stage = None
+        self.cols = None
+        self.series = {s: {} for s in STAGES}
+        self.last_step = {s: -1 for s in STAGES}
+        self.converged = {s: False for s in STAGES}
+
+    def sentinel(self, stage):
+        return sentinel(self.outdir, self.temp, stage)
+
+    def clear_sentinels(self):
+        clear_sentinels(self.outdir, self.temp)
+
+    def feed(self, line):
+        if self.cols is not None:
+            tok = line.split()
+            if len(tok) == len(self.cols):
+                try:
+                    row = dict(zip(self.cols, map(float, tok)))
+                except ValueError:
+                    row = None
+                if row is not None:
+                    self._sample(row)
+                    return
+            self.cols = None
+        s = line.strip()
+        if s.startswith("STAGE "):
+            self.stage = s.split()[1].lower()
+        elif s.startswith("Step ") and self.stage in STAGES:
+            self.cols = s.split()
+        elif self.natoms is None:
+            m = ATOMS_RE.match(line)
+            if m:
+                self.natoms = int(m.group(1))
+
+    def _sample(self, row):
+        st = self.stage
+        if st not in STAGES or row["Step"] <= self.last_step[st]:
+            return  # chunk headers repeat the last step of the previous chunk
+        self.last_step[st] = row["Step"]
+        for k, v in row.items():
+            self.series[st].setdefault(k, []).append(v)
+        if not self.converged[st] and self.is_converged(st):
+            self.converged[st] = True
+            open(self.sentinel(st), "w").close()
+
+    def is_converged(self, stage):
+        ser = self.series[stage]
+        pe = ser.get("PotEng")
+        if not pe or len(pe) < self.min_samples or not self.natoms:
+            return False
+        _, err, n = summarize(np.asarray(pe) / self.natoms)
+        if n < self.min_samples // 2 or err > self.tol_e:
+            return False
+        if stage == "npt":
+            for k in ("Lx", "Ly", "Lz"):
+                if k in ser:
+                    _, err_l, _ = summarize(np.asarray(ser[k]) / self.div[k])
+                    if err_l > self.tol_l:
+                        return False
+        return True
+
+    def report(self):
+        """Averaged E/atom (NVT) and lattice vectors (NPT) with error bars."""
+        out = {"natoms": self.natoms, "converged": dict(self.converged),
+               "samples": {s: len(self.series[s].get("Step", [])) for s in STAGES}}
+        pe = self.series["nvt"].get("PotEng") or self.series["npt"].get("PotEng")
+        if pe and self.natoms:
+            m, e, n = summarize(np.asarray(pe) / self.natoms)
+            out["PE_PERATOM"] = (m, e, n)
+        for k, name in (("Lx", "a1"), ("Ly", "a2"), ("Lz", "a3")):
+            v = self.series["npt"].get(k)
+            if v:
+                out[name] = summarize(np.asarray(v) / self.div[k])
+        return out
+
+# ------------------ Process wrappers ------------------
+def write_report(fh, rep):
+    """Append the averaged MONITOR_* block to an open log."""
+    fh.write("-------------------------------------------\n")
+    if "PE_PERATOM" in rep:
+        m, e, n = rep["PE_PERATOM"]
+        fh.write(f"MONITOR_PE_PERATOM = {m:.8f} +/- {e:.8f} eV ({n} samples)\n")
+    for name in ("a1", "a2", "a3"):
+        if name in rep:
+            m, e, n = rep[name]
+            fh.write(f"MONITOR_{name} = {m:.8f} +/- {e:.8f} Å ({n} samples)\n")
+    fh.write(f"MONITOR_CONVERGED = npt:{rep['converged']['npt']} nvt:{rep['converged']['nvt']}\n")
+
+def finish(mon, rep, outdir, temp):
+    mon.clear_sentinels()
+    with open(os.path.join(outdir, f"monitor_{temp}K.json"), "w") as fh:
+        json.dump(rep, fh, indent=1, default=float)
+    return rep
+
+def run_monitored(cmd, log, outdir, temp, usage=None, **kw):
+    """Run LAMMPS with its stdout streamed through a ThermoMonitor → (returncode, report).
+
+    `usage`, when a dict, receives the process' metrics.wait() resource usage.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    mon = ThermoMonitor(outdir, temp, **kw)
+    mon.clear_sentinels()
+    with open(log, "w") as lf:
+        t0 = time.time()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, errors="replace", bufsize=1)
+        for line in proc.stdout:
+            lf.write(line)
+            mon.feed(line)
+        rc, use = metrics.wait(proc, t0)
+        if usage is not None:
+            usage.update(use)
+        rep = mon.report()
+        write_report(lf, rep)
+    return rc, finish(mon, rep, outdir, temp)
+
+def run_monitored_batch(cmd, outdir, logs, usage=None, **kw):
+    """Monitor an in.batch.lmp run (one "REPLICA <T>" block per temperature).
+
+    LAMMPS writes the per-temperature logs itself (`logs` = {T: path}); the
+    MONITOR_* block is appended to each once the process has exited.
+    → (returncode, {T: report})
+    """
+    os.makedirs(outdir, exist_ok=True)
+    mons = {T: ThermoMonitor(outdir, T, **kw) for T in logs}
+    for mon in mons.values():
+        mon.clear_sentinels()
+    cur, t0 = None, time.time()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, errors="replace", bufsize=1)
+    for line in proc.stdout:
+        if line.startswith("REPLICA "):
+            cur = mons.get(int(float(line.split()[1])))
+        elif cur is not None:
+            cur.feed(line)
+    rc, use = metrics.wait(proc, t0)
+    if usage is not None:
+        usage.update(use)
+
+    reps = {}
+    for T, mon in mons.items():
+        if not mon.series["npt"]:
+            continue  # never reached (process died earlier)
+        reps[T] = rep = mon.report()
+        with open(logs[T], "a") as lf:
+            write_report(lf, rep)
+        finish(mon, rep, outdir, T)
+    return rc, reps
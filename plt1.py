@@ -6,18 +6,16 @@ import os
 DATA_PATH = "sfe_results.csv"  # Replace with your actual CSV file
 OUT_DIR = "plots_sfe"          # Output folder for figures
 Y_LIMITS = (0, 0.005)           # Fixed Y-axis range for all plots
-os.makedirs(OUT_DIR, exist_ok=True)
+STYLE = {}                      # matplotlib defaults
 
-# ---- Load Data ----
-df = pd.read_csv(DATA_PATH)
+def add_composition(df):
+    df = df.copy()
+    df['composition'] = [f"Co{co:.2f}_Fe{fe:.2f}_Ni{ni:.2f}" for co, fe, ni in zip(df.Co, df.Fe, df.Ni)]
+    return df
 
-# ---- Get all unique compositions ----
-df['composition'] = df.apply(lambda row: f"Co{row.Co:.2f}_Fe{row.Fe:.2f}_Ni{row.Ni:.2f}", axis=1)
-unique_compositions = df['composition'].unique()
-
-# ---- Plotting Loop ----
-for comp in unique_compositions:
-    subdf = df[df['composition'] == comp].sort_values(by='Temperature')
+def plot_sfe_vs_temp(subdf, comp, fname):
+    """γISF/γESF/γTwin vs temperature for one composition."""
+    subdf = subdf.sort_values(by='Temperature')
 
     plt.figure(figsize=(10,6))
     plt.plot(subdf['Temperature'], subdf['γISF'], marker='o', label='γISF')
@@ -33,8 +31,22 @@ for comp in unique_compositions:
     plt.tight_layout()
 
     # Save plot
-    fname = os.path.join(OUT_DIR, f"SFE_vs_Temp_{comp}.png")
     plt.savefig(fname, dpi=300)
     plt.close()
 
-print(f"✅ Plots saved in '{OUT_DIR}' for all {len(unique_compositions)} compositions.")
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    # ---- Load Data ----
+    df = add_composition(pd.read_csv(DATA_PATH))
+
+    # ---- Plotting Loop ----
+    unique_compositions = df['composition'].unique()
+    for comp in unique_compositions:
+        subdf = df[df['composition'] == comp]
+        plot_sfe_vs_temp(subdf, comp, os.path.join(OUT_DIR, f"SFE_vs_Temp_{comp}.png"))
+
+    print(f"✅ Plots saved in '{OUT_DIR}' for all {len(unique_compositions)} compositions.")
+
+if __name__ == "__main__":
+    main()
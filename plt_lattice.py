@@ -12,84 +12,12 @@ Outputs:
     lattice_DHCP.png
 """
 
-import re
-import glob
-import pandas as pd
 import matplotlib.pyplot as plt
-import numpy as np
-from pathlib import Path
 
-# ------------------ Helper: parse metadata ------------------
-def parse_metadata(fname):
-    """Extract structure, composition, and temperature from filename."""
-    pat = r'(fcc|hcp|dhcp)_Co([0-9.]+)_Fe([0-9.]+)_Ni([0-9.]+)_([0-9]+)K'
-    m = re.search(pat, Path(fname).stem)
-    if not m:
-        return None
-    struct, Co, Fe, Ni, T = m.groups()
-    return struct.upper(), float(Co), float(Fe), float(Ni), int(T)
-
-# ------------------ Helper: extract lattice vectors ------------------
-def parse_lattice_vectors(text):
-    """Extract lattice vectors a1, a2, a3 and orientation axes."""
-    a1 = a2 = a3 = np.nan
-    orient = None
-
-    # find lattice vector lines
-    m1 = re.search(r"Lattice vector a1\s*=\s*([0-9.]+)", text)
-    m2 = re.search(r"Lattice vector a2\s*=\s*([0-9.]+)", text)
-    m3 = re.search(r"Lattice vector a3\s*=\s*([0-9.]+)", text)
-    if m1: a1 = float(m1.group(1))
-    if m2: a2 = float(m2.group(1))
-    if m3: a3 = float(m3.group(1))
-
-    # orientation info
-    o = re.search(r"Orientation:\s*x=\[([^\]]+)\],\s*y=\[([^\]]+)\],\s*z=\[([^\]]+)\]", text)
-    if o:
-        orient = {
-            "x": o.group(1).strip(),
-            "y": o.group(2).strip(),
-            "z": o.group(3).strip()
-        }
-    return a1, a2, a3, orient
-
-# ------------------ Collect all .log files ------------------
-records = []
-for f in glob.glob("*.log"):
-    meta = parse_metadata(f)
-    if not meta:
-        continue
-    struct, Co, Fe, Ni, T = meta
-    with open(f, "r", errors="ignore") as fh:
-        txt = fh.read()
-    a1, a2, a3, orient = parse_lattice_vectors(txt)
-    # compute lattice parameters
-    if struct == "FCC":
-        a, c = a1, a1
-    else:  # HCP and DHCP
-        a = np.mean([a1, a2])
-        c = a3
-    # mark non-conventional orientation
-    nonconv = "True" if orient and orient["x"] != "1 0 0" else "False"
-
-    records.append({
-        "Structure": struct,
-        "Co": Co, "Fe": Fe, "Ni": Ni,
-        "Temperature": T,
-        "a1": a1, "a2": a2, "a3": a3,
-        "a": a, "c": c,
-        "Orientation_x": orient["x"] if orient else "",
-        "Orientation_y": orient["y"] if orient else "",
-        "Orientation_z": orient["z"] if orient else "",
-        "NonConventional": nonconv
-    })
-
-df = pd.DataFrame(records)
-df.to_csv("lattice_results.csv", index=False)
-print(f"✅ Extracted {len(df)} structures → lattice_results.csv")
+import harvest
 
 # ------------------ Plotting setup ------------------
-plt.rcParams.update({
+STYLE = {
     "font.family": "serif",
     "axes.labelsize": 13,
     "axes.titlesize": 14,
@@ -97,10 +25,9 @@ plt.rcParams.update({
     "xtick.labelsize": 10,
     "ytick.labelsize": 10,
     "figure.dpi": 300
-})
-
+}
 # ------------------ Plot function ------------------
-def plot_lattice(df_struct, name):
+def plot_lattice(df_struct, name, fname=None):
     """Plot lattice parameters vs temperature."""
     plt.figure(figsize=(7,5))
     for comp, g in df_struct.groupby(["Co","Fe","Ni"]):
@@ -116,13 +43,24 @@ def plot_lattice(df_struct, name):
     plt.grid(True, alpha=0.4)
     plt.legend(ncol=2, frameon=True)
     plt.tight_layout()
-    plt.savefig(f"lattice_{name}.png", dpi=600)
+    plt.savefig(fname or f"lattice_{name}.png", dpi=600)
     plt.close()
 
-# ------------------ Generate three concise plots ------------------
-for struct in ["FCC", "HCP", "DHCP"]:
-    dsub = df[df["Structure"] == struct]
-    if not dsub.empty:
-        plot_lattice(dsub, struct)
+def main():
+    # ------------------ Collect all .log files (single streaming pass, cached) ------------------
+    runs = harvest.harvest(harvest.find_logs(["*.log"]))
+    df = harvest.lattice_table(runs)
+    df.to_csv("lattice_results.csv", index=False)
+    print(f"✅ Extracted {len(df)} structures → lattice_results.csv")
+
+    # ------------------ Generate three concise plots ------------------
+    for struct in ["FCC", "HCP", "DHCP"]:
+        dsub = df[df["Structure"] == struct]
+        if not dsub.empty:
+            plot_lattice(dsub, struct)
+
+    print("✅ Generated: lattice_FCC.png, lattice_HCP.png, lattice_DHCP.png")
 
-print("✅ Generated: lattice_FCC.png, lattice_HCP.png, lattice_DHCP.png")
+if __name__ == "__main__":
+    plt.rcParams.update(STYLE)
+    main()
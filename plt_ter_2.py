@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Generates smooth, full-triangle ternary contour plots for Co–Fe–Ni alloys
-using RBF interpolation over a uniform ternary grid.
+Generates smooth, full-triangle ternary contour plots for Co–Fe–Ni alloys.
+The RBF surface comes from ternary.py: one cached fit per temperature for
+all three γ properties, evaluated only inside the triangle.
 """
 
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.interpolate import Rbf
 from matplotlib import cm
 
-plt.rcParams.update({
+from ternary import barycentric, surface
+
+STYLE = {
     "font.family": "serif",
     "axes.labelsize": 13,
     "axes.titlesize": 14,
@@ -19,14 +21,9 @@ plt.rcParams.update({
     "xtick.labelsize": 11,
     "ytick.labelsize": 11,
     "figure.dpi": 300
-})
-
-# ====================== Barycentric Projection ======================
-def barycentric(Co, Fe, Ni):
-    s = Co + Fe + Ni
-    x = 0.5 * (2 * Fe + Ni) / s
-    y = (np.sqrt(3) / 2.0) * Ni / s
-    return x, y
+}
+PROPS = ["γISF", "γESF", "γTwin"]
+GRID  = 300
 
 # ====================== Draw Triangle ======================
 def draw_triangle(ax):
@@ -40,53 +37,13 @@ def draw_triangle(ax):
     ax.set_aspect('equal')
     ax.axis('off')
 
-# ====================== Generate Full Ternary Grid ======================
-def generate_ternary_grid(n_points=60):
-    """Generate a uniform grid of (Co,Fe,Ni) with Co+Fe+Ni=1"""
-    grid = []
-    for i in range(n_points + 1):
-        for j in range(n_points + 1 - i):
-            k = n_points - i - j
-            Co = i / n_points
-            Fe = j / n_points
-            Ni = k / n_points
-            grid.append((Co, Fe, Ni))
-    return np.array(grid)
-
-# ====================== RBF Interpolation ======================
-def make_contour(ax, dfT, prop, title):
-    """RBF-based full-triangle smooth contour."""
-    dfT = dfT.copy()
-    total = dfT["Co"] + dfT["Fe"] + dfT["Ni"]
-    dfT["Co"] /= total
-    dfT["Fe"] /= total
-    dfT["Ni"] /= total
-
-    # Input data
+# ====================== Contour ======================
+def make_contour(ax, dfT, prop, title, Xi, Yi, Zi):
+    """Full-triangle smooth contour of one pre-evaluated surface."""
     x, y = barycentric(dfT["Co"], dfT["Fe"], dfT["Ni"])
-    vals = dfT[prop].values
-
-    # Create RBF interpolator
-    rbf = Rbf(x, y, vals, function='multiquadric', smooth=0.0)
 
-    # Generate uniform ternary grid
-    grid = generate_ternary_grid(200)
-    Xg, Yg = barycentric(grid[:, 0], grid[:, 1], grid[:, 2])
-    Zg = rbf(Xg, Yg)
-
-    # Mask outside triangle
-    mask = (Yg <= np.sqrt(3) * np.minimum(Xg, 1 - Xg))
-    Xg, Yg, Zg = Xg[mask], Yg[mask], Zg[mask]
-
-    # Plot contour
-    xi = np.linspace(0, 1, 300)
-    yi = np.linspace(0, np.sqrt(3)/2, 300)
-    Xi, Yi = np.meshgrid(xi, yi)
-    Zi = rbf(Xi, Yi)
-    Zi_masked = np.ma.array(Zi, mask=(Yi > np.sqrt(3) * np.minimum(Xi, 1 - Xi)))
-
-    cf = ax.contourf(Xi, Yi, Zi_masked, levels=20, cmap=cm.plasma)
-    cs = ax.contour(Xi, Yi, Zi_masked, levels=12, colors='k', linewidths=0.3, alpha=0.4)
+    cf = ax.contourf(Xi, Yi, Zi, levels=20, cmap=cm.plasma)
+    cs = ax.contour(Xi, Yi, Zi, levels=12, colors='k', linewidths=0.3, alpha=0.4)
     draw_triangle(ax)
     ax.scatter(x, y, c='white', edgecolors='k', s=25, label="Simulated")
 
@@ -107,6 +64,17 @@ def add_benchmark(ax):
     for (xpt, ypt, ref) in zip(xb, yb, bench["Ref"]):
         ax.text(xpt + 0.02, ypt, ref, fontsize=8)
 
+# ====================== Figure ======================
+def contour_figure(dfT, T, prop, fname, surf=None):
+    """One ternary contour figure; `surf` = surface(dfT) when already evaluated."""
+    Xi, Yi, Z = surf if surf is not None else surface(dfT, PROPS, n=GRID)
+    fig, ax = plt.subplots(figsize=(6,5))
+    make_contour(ax, dfT, prop, f"{prop} Contour Plot at {T} K", Xi, Yi, Z[prop])
+    add_benchmark(ax)
+    plt.tight_layout()
+    plt.savefig(fname, dpi=600)
+    plt.close(fig)
+
 # ====================== Main Routine ======================
 def main():
     df = pd.read_csv("sfe_results.csv")
@@ -114,16 +82,13 @@ def main():
 
     for T in temps:
         dfT = df[df["Temperature"] == T].copy()
-        for prop in ["γISF", "γESF", "γTwin"]:
-            fig, ax = plt.subplots(figsize=(6,5))
-            make_contour(ax, dfT, prop, f"{prop} Contour Plot at {T} K")
-            add_benchmark(ax)
-            plt.tight_layout()
-            plt.savefig(f"ternary_{prop}_{T}K_contour_full.png", dpi=600)
-            plt.close(fig)
+        surf = surface(dfT, PROPS, n=GRID)
+        for prop in PROPS:
+            contour_figure(dfT, T, prop, f"ternary_{prop}_{T}K_contour_full.png", surf)
 
     print("✅ Full-triangle ternary contour plots generated successfully!")
 
 # ====================== Entry ======================
 if __name__ == "__main__":
+    plt.rcParams.update(STYLE)
     main()
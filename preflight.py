@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Preflight checks for a sweep: reject broken jobs before they reach LAMMPS.
+
+Every data file is header-parsed with bounded reads. The parser reads the
+header and Masses up to the Atoms section (at most HEADER_BYTES), and a tail
+read checks that the Atoms section is complete. Its atom-type count is
+checked against the Masses section and the deck's `pair_coeff` element map
+("Number of element to type mappings does not match number of atom types"),
+and those elements against the setfl's element list. The .json sidecar
+(generate.py) must match the box. Deck, setfl (resolved from the current
+directory, as LAMMPS does), LAMMPS executable and the shell runners' paths
+are resolved once per sweep, not per job.
+
+`--dry-run` also runs each (data file, deck) pair in parallel up to its
+`pair_coeff` line, followed by `run 0`, so LAMMPS itself reads the cell and
+the potential.
+
+    python preflight.py                       # every job run_all.py would launch
+    python preflight.py --dry-run -j 16
+    python preflight.py work/data/fcc_*.data --batch-temps
+    python run_all.py --preflight --workers 16
+
+Exit status 1 when a job is rejected.
+"""
+
+import os, re, glob, json, time, shutil, argparse, subprocess, tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+
+HEADER_BYTES = 1 << 16     # a header (incl. Masses) longer than this is rejected
+TAIL_BYTES = 4096
+SECTIONS = {"Atoms", "Velocities", "Masses", "Ellipsoids", "Lines", "Triangles", "Bodies",
+            "Bonds", "Angles", "Dihedrals", "Impropers", "Pair", "PairIJ"}
+
+PAIR_RE = re.compile(r"^\s*pair_coeff\s+\*\s+\*\s+(\S+)\s+(.+?)\s*(?:#.*)?$", re.M)
+INDEX_RE = re.compile(r"^\s*variable\s+(\w+)\s+index\s+(\S+)", re.M)
+VAR_RE = re.compile(r"\$\{(\w+)\}|\$(\w)")
+SH_VAR_RE = re.compile(r"\$\{(\w+)\}|\$(\w+)")
+ASSIGN_RE = re.compile(r"^\s*(\w+)=\"?([^\"\s]+)\"?", re.M)
+
+# ------------------ Data files ------------------
+def data_header(path, limit=HEADER_BYTES):
+    """Header of a LAMMPS data file from one bounded read → dict (raises ValueError)."""
+    with open(path, "rb") as fh:
+        buf = fh.read(limit)
+    lines = buf.split(b"\n")
+    if len(buf) == limit:
+        lines = lines[:-1]          # last line may be cut
+    hdr = {"natoms": None, "ntypes": None, "lengths": [None] * 3, "tilt": False, "masses": 0, "atoms_at": None}
+    pos, section = len(lines[0]) + 1, None
+    for k, raw in enumerate(lines[1:], 1):
+        pos += len(raw) + 1
+        tok = raw.decode(errors="ignore").split("#")[0].split()
+        if not tok:
+            continue
+        if tok[0] in SECTIONS:
+            section = tok[0]
+            if section == "Atoms":
+                rest = lines[k + 1:]
+                skip = next((i for i, l in enumerate(rest) if l.strip()), len(rest))
+                hdr["atoms_at"] = pos + sum(len(l) + 1 for l in rest[:skip])
+                hdr["row"] = len(rest[skip]) + 1 if skip < len(rest) else None
+                break
+            continue
+        if section == "Masses":
+            hdr["masses"] += 1
+        elif section is None:
+            if tok[1:] == ["atoms"]:
+                hdr["natoms"] = int(tok[0])
+            elif tok[1:] == ["atom", "types"]:
+                hdr["ntypes"] = int(tok[0])
+            elif len(tok) == 4 and tok[2:] in (["xlo", "xhi"], ["ylo", "yhi"], ["zlo", "zhi"]):
+                hdr["lengths"]["xyz".index(tok[2][0])] = float(tok[1]) - float(tok[0])
+            elif tok[3:] == ["xy", "xz", "yz"]:
+                hdr["tilt"] = any(float(t) != 0 for t in tok[:3])
+    if hdr["atoms_at"] is None:
+        raise ValueError(f"no Atoms section in the first {limit // 1024} KB")
+    if hdr["natoms"] is None or hdr["ntypes"] is None or None in hdr["lengths"]:
+        raise ValueError("incomplete header (atoms / atom types / box)")
+    return hdr
+
+def complete(path, hdr):
+    """Whether the Atoms section holds natoms rows: exact size for fixed-width rows, else a tail check."""
+    size = os.path.getsize(path)
+    if hdr["row"] and size == hdr["atoms_at"] + hdr["natoms"] * hdr["row"]:
+        return True
+    if size < hdr["atoms_at"] + hdr["natoms"] * 10:          # "<id> <type> x y z" is ≥ 10 bytes
+        return False
+    with open(path, "rb") as fh:
+        fh.seek(max(size - TAIL_BYTES, 0))
+        tail = fh.read()
+    last = tail.rstrip(b"\n").rsplit(b"\n", 1)[-1].split()
+    return tail.endswith(b"\n") and len(last) >= 5
+
+def check_data(path, ntypes=None):
+    """Problems of one data file (bounded reads only); `ntypes` is what the deck maps."""
+    try:
+        hdr = data_header(path)
+    except (OSError, ValueError) as e:
+        return [f"data: {e}"], None
+    errs = []
+    if hdr["masses"] != hdr["ntypes"]:
+        errs.append(f"data: {hdr['masses']} Masses for {hdr['ntypes']} atom types")
+    if ntypes is not None and hdr["ntypes"] != ntypes:
+        errs.append(f"data: {hdr['ntypes']} atom types, pair_coeff maps {ntypes} elements")
+    if not complete(path, hdr):
+        errs.append(f"data: truncated Atoms section (expected {hdr['natoms']} atoms)")
+    return errs, hdr
+
+def check_sidecar(path, hdr, hexagonal):
+    """Errors and warnings of the generate.py sidecar next to a data file."""
+    side = os.path.splitext(path)[0] + ".json"
+    if not os.path.exists(side):
+        return [], ["no .json sidecar: decks report lattice vectors with the legacy divisor 8"] if hexagonal else []
+    with open(side) as fh:
+        meta = json.load(fh)
+    errs = []
+    if meta.get("natoms") != hdr["natoms"]:
+        errs.append(f"sidecar: {meta.get('natoms')} atoms, data file {hdr['natoms']}")
+    L = meta.get("lengths") or []
+    if len(L) != 3 or any(abs(a - b) > 1e-6 * max(b, 1) for a, b in zip(L, hdr["lengths"])):
+        errs.append("sidecar: box lengths differ from the data file (stale sidecar)")
+    missing = [k for k in ("NX", "NY", "NZ", "FY") if k not in meta]
+    if missing:
+        errs.append(f"sidecar: no {'/'.join(missing)}")
+    return errs, []
+
+# ------------------ Decks, potential, executables ------------------
+def expand(text, variables):
+    return VAR_RE.sub(lambda m: str(variables.get(m.group(1) or m.group(2), m.group(0))), text)
+
+def setfl_elements(path):
+    """Element names on line 4 of a setfl file."""
+    with open(path, errors="ignore") as fh:
+        head = [fh.readline() for _ in range(4)]
+    tok = head[3].split()
+    return tok[1:1 + int(tok[0])]
+
+def check_deck(in_file, variables=None, cwd=None):
+    """Deck → (setfl path, mapped elements, problems); paths resolve from `cwd` like LAMMPS."""
+    if not os.path.exists(in_file):
+        return None, None, [f"deck: {in_file} not found"]
+    text = open(in_file, errors="ignore").read()
+    m = PAIR_RE.search(text)
+    if not m:
+        return None, None, [f"deck: no `pair_coeff * * <setfl> <elements>` in {os.path.basename(in_file)}"]
+    defaults = dict(INDEX_RE.findall(text))
+    setfl_rel = expand(m.group(1), {**defaults, **(variables or {})})
+    elements = m.group(2).split()
+    setfl = os.path.normpath(os.path.join(cwd or os.getcwd(), setfl_rel))
+    if not os.path.exists(setfl):
+        return setfl, elements, [f"deck: setfl {setfl_rel} not found (resolves to {setfl})"]
+    try:
+        known = setfl_elements(setfl)
+    except (OSError, ValueError, IndexError):
+        return setfl, elements, [f"setfl: cannot parse the element line of {setfl}"]
+    bad = [el for el in elements if el != "NULL" and el not in known]
+    errs = [f"deck: elements {' '.join(bad)} not in setfl ({' '.join(known)})"] if bad else []
+    return setfl, elements, errs
+
+def check_lmp(lmp):
+    """Problem with the LAMMPS executable, or None."""
+    path = shutil.which(lmp)
+    return None if path and os.access(path, os.X_OK) else f"LAMMPS executable {lmp} not found (set $LMP)"
+
+def check_runners(paths):
+    """One line per shell runner whose configured absolute paths do not exist here."""
+    out = []
+    for p in paths:
+        env, missing = {}, []
+        for name, value in ASSIGN_RE.findall(open(p, errors="ignore").read()):
+            value = SH_VAR_RE.sub(lambda m: env.get(m.group(1) or m.group(2), m.group(0)), value)
+            env[name] = value
+            if value.startswith("/") and "$" not in value and not os.path.exists(value):
+                missing.append((name, value))
+        if missing:
+            out.append(f"{os.path.basename(p)}: {', '.join(n for n, _ in missing)} point to missing paths "
+                       f"(e.g. {missing[0][1]})")
+    return out
+
+# ------------------ Dry run ------------------
+def dry_run(lmp, df, in_file, variables, timeout=120):
+    """Deck up to pair_coeff, then `run 0`, read from stdin → first ERROR line or None."""
+    text = open(in_file, errors="ignore").read()
+    m = PAIR_RE.search(text)
+    script = text[:m.end()] + "\nrun 0\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        cmd = [lmp, "-log", "none", "-var", "DATA", df, "-var", "OUTDIR", tmp]
+        for k, v in variables.items():
+            cmd += ["-var", k, *str(v).split()]
+        try:
+            p = subprocess.run(cmd, input=script, capture_output=True, text=True, timeout=timeout, cwd=os.getcwd())
+        except subprocess.TimeoutExpired:
+            return f"run 0: no result after {timeout} s"
+        except OSError as e:
+            return f"run 0: {e}"
+    err = next((l.strip() for l in (p.stdout + p.stderr).splitlines() if l.startswith("ERROR")), None)
+    if err:
+        return f"run 0: {err}"
+    return None if p.returncode == 0 else f"run 0: exit status {p.returncode}"
+
+# ------------------ Jobs ------------------
+def check_jobs(jobs, variables=None, lmp=None, dry=False, workers=8, timeout=120):
+    """(struct, data, T, deck) jobs → ({deck: errors}, {(data, deck): (errors, warnings)}).
+
+    Decks are checked once; data files once per deck, whatever the number of temperatures.
+    """
+    variables = variables or {}
+    decks = {d: check_deck(d, variables) for d in {job[3] for job in jobs}}
+    temps = {}
+    for struct, df, T, deck in jobs:
+        temps.setdefault((struct, df, deck), []).append(T)
+
+    def one(item):
+        (struct, df, deck), ts = item
+        _, elements, deck_errs = decks[deck]
+        errs, hdr = check_data(df, len(elements) if elements else None)
+        warns = []
+        if hdr:
+            serr, warns = check_sidecar(df, hdr, struct != "fcc")
+            errs += serr
+        if dry and lmp and not errs and not deck_errs:
+            v = {"TEMP": " ".join(map(str, ts)), "STRUCT": struct, **settings.cell_vars(df), **variables}
+            e = dry_run(lmp, df, deck, v, timeout)
+            if e:
+                errs.append(e)
+        return (df, deck), (errs, warns)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        res = dict(pool.map(one, temps.items()))
+    return {d: errs for d, (_, _, errs) in decks.items()}, res
+
+def filter_jobs(jobs, variables=None, lmp=None, dry=False, workers=8, timeout=120):
+    """Jobs that pass check_jobs; problems are printed (deck problems once per deck)."""
+    decks, res = check_jobs(jobs, variables, lmp, dry, workers, timeout)
+    for deck, errs in sorted(decks.items()):
+        if errs:
+            n = sum(d == deck for _, d in res)
+            print(f"❌ {os.path.basename(deck) or '(no deck)'}: {'; '.join(errs)} — {n} data files rejected")
+    for (df, deck), (errs, warns) in sorted(res.items()):
+        for w in warns:
+            print(f"⚠️  {os.path.basename(df)}: {w}")
+        if errs:
+            print(f"❌ {os.path.basename(df)} ({os.path.basename(deck)}): {'; '.join(errs)}")
+    return [j for j in jobs if not decks[j[3]] and not res[(j[1], j[3])][0]]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="data files (default: work/data/*.data)")
+    ap.add_argument("--dry-run", action="store_true", help="also `run 0` every data file with its deck")
+    ap.add_argument("--batch-temps", action="store_true", help="check against in.batch.lmp")
+    ap.add_argument("--swap", type=int, default=0, metavar="N", help="as run_all.py --swap")
+    ap.add_argument("--lmp", default=None, help="LAMMPS executable (default: $LMP, else settings.LMP)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--timeout", type=int, default=120, help="seconds per dry run")
+    args = ap.parse_args()
+
+    lmp = args.lmp or settings.LMP
+    t0 = time.time()
+    try:
+        paths = [os.path.abspath(p) for p in args.paths] or settings.data_files()
+    except OSError:
+        paths = []
+    if not paths:
+        print(f"❌ No .data files in {settings.DATA_DIR}")
+        raise SystemExit(1)
+    deck = lambda s: settings.IN_BATCH if args.batch_temps else settings.STRUCT_MAP.get(s, "")
+    jobs = [(s, p, T, deck(s)) for p in paths for s in [os.path.basename(p).split("_")[0].lower()]
+            for T in settings.TEMPS]
+    variables = {"SWAP": args.swap} if args.swap else {}
+
+    fatal = check_lmp(lmp)
+    if fatal:
+        print(f"❌ {fatal}")
+    for w in check_runners(sorted(glob.glob(os.path.join(settings.ROOT, "run_*.sh")))):
+        print(f"⚠️  {w}")
+    ok = filter_jobs(jobs, variables, None if fatal else lmp, args.dry_run, args.jobs, args.timeout)
+    print(f"✅ {len(ok)}/{len(jobs)} jobs pass preflight{' (incl. run 0)' if args.dry_run and not fatal else ''} "
+          f"in {time.time() - t0:.1f} s")
+    if fatal or len(ok) < len(jobs):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Quasi-harmonic free energies of the FCC / HCP / DHCP Co–Fe–Ni alloys.
+
+For every phase and composition a small random-alloy cell (generate.py, same
+seeds) is scaled over a few volumes and relaxed at each one. Force constants
+come from ± finite displacements. Only one atom per class of
+species-preserving lattice translations is displaced; the rest are copied by
+permutation, so pure elements need 3 displacements instead of 3N. The
+dynamical matrices on a Monkhorst–Pack q-mesh are built and diagonalized in
+one batched call, and give
+
+    F(V, T) = E0(V) + Σ_qs [ħω/2 + kT ln(1 − e^(−ħω/kT))] / (N_q N)
+
+per atom. F is fitted per temperature by a cubic in V and minimized, which
+gives F(T), V(T), a(T) and the linear thermal expansion α(T) on a dense
+temperature grid. HCP/DHCP keep the c/a of generate.PHASES; internal
+coordinates are relaxed, the cell shape is not.
+
+Outputs:
+    qha_results.csv   Structure,Co,Fe,Ni,Temperature,F,E0,F_vib,V,a,alpha,n_imag   (eV/atom, Å³/atom, 1/K)
+    qha_dos.csv       phonon DOS at the middle volume (THz, states/THz/atom)
+"""
+
+import os, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from ase import units
+
+import generate
+from eam import EAMPotential, SETFL
+from neighbor import NeighborList
+
+# ------------------ Settings ----------------
+CELL_SIZE = {"fcc": 2, "hcp": 3, "dhcp": 3}   # → 32 / 96 / 96 atoms (orthohexagonal hcp/dhcp)
+STRAINS = np.linspace(-0.01, 0.03, 7)         # linear strains about the static equilibrium
+DELTA = 0.01                                  # displacement (Å)
+QMESH = (4, 4, 4)
+TEMPS = np.arange(0.0, 1501.0, 10.0)
+CHUNK = 64                                    # displaced cells per compute_batch
+
+HBAR_OMEGA = units._hbar * np.sqrt(units._e / units._amu) * 1e10 / units._e   # ħ·√(eV/Å²/amu) in eV
+EV_TO_THZ = units._e / units._hplanck / 1e12
+
+# ------------------ Structure ----------------
+def relax(pot, atoms, maxiter=500, gtol=1e-6):
+    """Relax all positions at fixed cell (in place) → energy."""
+    nl = NeighborList(pot.cutoff, skin=0.3)
+
+    def fun(x):
+        atoms.positions[:] = x.reshape(-1, 3)
+        res = pot.compute(atoms, nl)
+        return res["energy"], -res["forces"].ravel()
+
+    opt = minimize(fun, atoms.positions.ravel(), jac=True, method="L-BFGS-B",
+                   options={"maxiter": maxiter, "gtol": gtol})
+    return fun(opt.x)[0]
+
+def static_scale(pot, atoms):
+    """Isotropic cell scale of the (unrelaxed) static energy minimum, from a batched scan."""
+    scales = np.linspace(0.96, 1.04, 9)
+    cells = []
+    for f in scales:
+        a = atoms.copy()
+        a.set_cell(np.asarray(atoms.cell) * f, scale_atoms=True)
+        cells.append(a)
+    e = np.array([r["energy"] for r in pot.compute_batch(cells)])
+    c2, c1, _ = np.polyfit(scales, e, 2)
+    return -c1 / (2 * c2)
+
+def translation_perms(atoms, tol=1e-3):
+    """Atom permutations of every lattice translation that maps the decorated cell onto itself."""
+    frac = atoms.get_scaled_positions(wrap=True)
+    z = atoms.numbers
+    perms = []
+    for t in frac[z == z[0]] - frac[0]:
+        d = (frac[:, None, :] + t - frac[None, :, :] + 0.5) % 1.0 - 0.5
+        hit = np.all(np.abs(d) < tol, axis=2) & (z[:, None] == z[None, :])
+        if np.all(hit.sum(axis=1) == 1):
+            perms.append(hit.argmax(axis=1))
+    return np.array(perms)
+
+def force_constants(pot, atoms, delta=DELTA):
+    """(3N, 3N) force constants from ± displacements of symmetry-inequivalent atoms."""
+    n = len(atoms)
+    perms = translation_perms(atoms)
+    reps, seen = [], np.zeros(n, dtype=bool)
+    for i in range(n):
+        if not seen[i]:
+            reps.append(i)
+            seen[perms[:, i]] = True
+
+    images = []
+    for i in reps:
+        for k in range(3):
+            for sgn in (1, -1):
+                a = atoms.copy()
+                a.positions[i, k] += sgn * delta
+                images.append(a)
+    forces = []
+    for s in range(0, len(images), CHUNK):
+        forces += [r["forces"] for r in pot.compute_batch(images[s:s + CHUNK])]
+    forces = np.array(forces).reshape(len(reps), 3, 2, n, 3)
+    rows = -(forces[:, :, 0] - forces[:, :, 1]) / (2 * delta)     # (rep, k, j, b)
+
+    phi = np.zeros((n, 3, n, 3))
+    for r, i in enumerate(reps):
+        for p in perms:   # translation p sends atom i → p[i] and j → p[j]
+            phi[p[i]][:, p, :] = rows[r]
+    phi = phi.reshape(3 * n, 3 * n)
+    phi = 0.5 * (phi + phi.T)
+    # acoustic sum rule: Σ_j Φ_ij = 0 for every block row
+    blocks = phi.reshape(n, 3, n, 3)
+    blocks[np.arange(n), :, np.arange(n), :] -= blocks.sum(axis=2)
+    return blocks.reshape(3 * n, 3 * n), len(images)
+
+# ------------------ Phonons ----------------
+def image_weights(atoms):
+    """Shortest periodic image vectors d_ij + L (27 candidates) and their 1/multiplicity weights."""
+    cell = np.asarray(atoms.cell)
+    shifts = np.array([[a, b, c] for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1)]) @ cell
+    frac = atoms.get_scaled_positions(wrap=True)
+    pos = frac @ cell
+    d = pos[None, :, None, :] - pos[:, None, None, :] + shifts[None, None, :, :]   # (i, j, L, 3)
+    r = np.linalg.norm(d, axis=3)
+    short = r <= r.min(axis=2, keepdims=True) + 1e-4
+    return d, short / short.sum(axis=2, keepdims=True)
+
+def qpoints(atoms, mesh=QMESH):
+    """Monkhorst–Pack mesh in Cartesian 1/Å (2π included)."""
+    grids = [(np.arange(m) + 0.5) / m - 0.5 for m in mesh]
+    frac = np.stack(np.meshgrid(*grids, indexing="ij"), axis=-1).reshape(-1, 3)
+    return 2 * np.pi * frac @ atoms.cell.reciprocal()
+
+def frequencies(phi, atoms, mesh=QMESH):
+    """ħω (eV) of every mode at every q of the mesh → (n_q, 3N); imaginary modes negative."""
+    n = len(atoms)
+    d, w = image_weights(atoms)
+    q = qpoints(atoms, mesh)
+    phase = np.einsum("ijl,qijl->qij", w, np.exp(1j * np.einsum("qk,ijlk->qijl", q, d)))
+    m = np.repeat(atoms.get_masses(), 3)
+    dyn = (phi / np.sqrt(np.outer(m, m))).reshape(n, 3, n, 3)
+    D = (dyn[None] * phase[:, :, None, :, None]).reshape(len(q), 3 * n, 3 * n)
+    lam = np.linalg.eigvalsh(0.5 * (D + np.conj(np.swapaxes(D, 1, 2))))
+    return HBAR_OMEGA * np.sign(lam) * np.sqrt(np.abs(lam))
+
+def vibrational_free_energy(hw, n_atoms, temps=TEMPS):
+    """Harmonic F_vib(T) per atom from the mode energies ħω (eV) of one q-mesh."""
+    n_q = len(hw)
+    hw = hw[hw > 1e-5]   # imaginary / zero modes carry no free energy
+    kT = units.kB * np.asarray(temps, dtype=float)[:, None]
+    thermal = np.zeros((len(kT), hw.size))
+    hot = kT[:, 0] > 0
+    thermal[hot] = kT[hot] * np.log1p(-np.exp(-hw / kT[hot]))
+    return (0.5 * hw + thermal).sum(axis=1) / (n_q * n_atoms)
+
+def dos(hw, n_atoms, bins=200):
+    """Phonon DOS (THz, states/THz/atom, integrates to 3) of the real modes."""
+    f = hw[hw > 0] * EV_TO_THZ
+    h, edges = np.histogram(f, bins=bins, range=(0, f.max() * 1.05))
+    width = edges[1] - edges[0]
+    return 0.5 * (edges[1:] + edges[:-1]), h / (len(hw) * n_atoms) / width
+
+# ------------------ Quasi-harmonic fit ----------------
+def equilibrium(V, F):
+    """Minimum of a cubic fit F(V) inside the sampled range → (V*, F*), NaN when outside."""
+    c = np.polyfit(V, F, 3)
+    roots = np.roots(np.polyder(c))
+    roots = roots[np.isreal(roots)].real
+    roots = roots[(roots >= V.min()) & (roots <= V.max()) & (np.polyval(np.polyder(c, 2), roots) > 0)]
+    if not len(roots):
+        return np.nan, np.nan
+    v = roots[np.argmin(np.polyval(c, roots))]
+    return v, np.polyval(c, v)
+
+_pot = None
+
+def potential(setfl=SETFL):
+    """Per-process potential (memory-mapped bundle, so workers start instantly)."""
+    global _pot
+    if _pot is None:
+        _pot = EAMPotential.load(setfl, elements=generate.LABELS)
+    return _pot
+
+def qha_structure(phase, comp, setfl=SETFL, strains=STRAINS, mesh=QMESH, temps=TEMPS):
+    """F(T), V(T), a(T), α(T) of one phase/composition → (rows, dos frame, n displaced cells)."""
+    pot = potential(setfl)
+    base = generate.build_structure(phase, comp, size=CELL_SIZE[phase])
+    n = len(base)
+    cell0 = np.asarray(base.cell) * static_scale(pot, base)
+
+    E0, Fvib, n_imag, n_cells, mid = [], [], 0, 0, len(strains) // 2
+    for k, s in enumerate(strains):
+        atoms = base.copy()
+        atoms.set_cell(cell0 * (1 + s), scale_atoms=True)
+        E0.append(relax(pot, atoms) / n)
+        phi, nc = force_constants(pot, atoms)
+        hw = frequencies(phi, atoms, mesh)
+        n_cells += nc
+        n_imag = max(n_imag, int((hw < -1e-4).sum()))
+        Fvib.append(vibrational_free_energy(hw, n, temps))
+        if k == mid:
+            nu, g = dos(hw, n)
+    V = abs(np.linalg.det(cell0)) / n * (1 + strains) ** 3
+    E0, Fvib = np.array(E0), np.array(Fvib)          # (nV,), (nV, nT)
+
+    eq = np.array([equilibrium(V, E0 + Fvib[:, t]) for t in range(len(temps))])
+    Vt, Ft = eq[:, 0], eq[:, 1]
+    e0 = np.polyval(np.polyfit(V, E0, 3), Vt)
+    alpha = np.gradient(Vt, temps) / Vt / 3
+    a = generate.PHASES[phase]["a"] * (Vt * n / base.get_volume()) ** (1 / 3)   # cell shape is fixed
+
+    key = {"Structure": phase.upper(), "Co": comp["Co"], "Fe": comp["Fe"], "Ni": comp["Ni"]}
+    rows = [{**key, "Temperature": T, "F": Ft[t], "E0": e0[t], "F_vib": Ft[t] - e0[t], "V": Vt[t],
+             "a": a[t], "alpha": alpha[t], "n_imag": n_imag}
+            for t, T in enumerate(temps)]
+    return rows, pd.DataFrame({**key, "nu": nu, "g": g}), n_cells
+
+def _job(args):
+    t0 = time.time()
+    return args, qha_structure(*args), time.time() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--setfl", default=SETFL)
+    ap.add_argument("--phases", nargs="+", default=list(generate.PHASES), choices=list(generate.PHASES))
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default="qha_results.csv")
+    ap.add_argument("--dos", default="qha_dos.csv")
+    args = ap.parse_args()
+
+    potential(args.setfl)   # build the bundle once before the workers map it
+    todo = [(phase, comp, args.setfl) for comp in generate.COMPOSITIONS for phase in args.phases]
+    rows, doses = [], []
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for (phase, comp, _), (r, g, n_cells), dt in pool.map(_job, todo):
+            rows += r
+            doses.append(g)
+            at = {int(x["Temperature"]): x for x in r}
+            warn = f"  ⚠️ {r[0]['n_imag']} imaginary modes" if r[0]["n_imag"] else ""
+            print(f"✓ {generate.fname_base(phase, comp)}: F(300 K) = {at[300]['F']:.4f} eV/atom, "
+                  f"α(300 K) = {at[300]['alpha']*1e6:.1f}e-6/K  ({n_cells} cells, {dt:.1f} s){warn}")
+
+    df = pd.DataFrame(rows)
+    df.to_csv(args.out, index=False)
+    pd.concat(doses, ignore_index=True).to_csv(args.dos, index=False)
+
+    # most stable phase per composition
+    if df["Structure"].nunique() > 1:
+        for T in (100, 350, 550):
+            best = df[df["Temperature"] == T].dropna(subset=["F"]).sort_values("F").groupby(["Co", "Fe", "Ni"]).head(1)
+            counts = best["Structure"].value_counts().to_dict()
+            print(f"{T:>4} K  lowest F: {counts}")
+    print(f"✅ Saved: {args.out}, {args.dos}  ({time.time() - t0:.1f} s)")
+
+if __name__ == "__main__":
+    main()
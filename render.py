@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental, parallel figure rendering for all plt_* scripts.
+
+The input tables are read once (sfe_results.csv, the harvest store or
+lattice_results.csv, the energies). Every figure is described by the slice of
+data it draws, and its hash covers that slice, the source of the plotting
+module and of the repo modules it imports (ternary.py, harvest.py, …) and
+the call arguments. A figure is rendered only when its outputs are
+missing or its hash differs from work/render_manifest.json. Stale figures are
+drawn on a process pool with the Agg backend, and per-figure render times are
+printed.
+
+    python render.py              # render what is stale
+    python render.py --force -j 8
+    python render.py --dry-run    # list stale figures
+"""
+
+import os, sys, ast, json, time, hashlib, argparse, importlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+
+import harvest
+
+ROOT     = os.path.abspath(os.path.dirname(__file__))
+MANIFEST = os.path.join(ROOT, "work", "render_manifest.json")
+
+Figure = namedtuple("Figure", "outputs module func args")
+
+# ------------------ Inputs (read once) ------------------
+def load_data(sfe="sfe_results.csv", lattice="lattice_results.csv", energies="potential_energy_all.csv"):
+    data = {}
+    if os.path.exists(sfe):
+        data["sfe"] = pd.read_csv(sfe)
+    runs = harvest.load_table("runs")
+    if len(runs) and runs["a1"].notna().any():
+        data["lattice"] = harvest.lattice_table(runs)
+    elif os.path.exists(lattice):
+        data["lattice"] = pd.read_csv(lattice)
+    try:
+        data["energy"] = harvest.read_energies(energies)
+    except FileNotFoundError:
+        pass
+    return data
+
+# ------------------ Figure registry ------------------
+def figures(data):
+    """Every figure the plt_* scripts produce, with the data slice it needs."""
+    import plt1, plt_ter_2, plt_benchmark, plt_lattice, plt_lattice_param
+    figs = []
+    if "sfe" in data:
+        sfe = data["sfe"]
+        for T in sorted(sfe["Temperature"].unique()):
+            dfT = sfe[sfe["Temperature"] == T].reset_index(drop=True)
+            for prop in plt_ter_2.PROPS:
+                figs.append(Figure([f"ternary_{prop}_{T}K_contour_full.png"], "plt_ter_2", "contour_figure",
+                                   (dfT, T, prop, f"ternary_{prop}_{T}K_contour_full.png")))
+
+        bench = plt_benchmark.select(sfe).reset_index(drop=True)
+        figs.append(Figure(["benchmark_horizontal.png", "benchmark_logscale.png"], "plt_benchmark",
+                           "benchmark_figures", (bench, "benchmark_horizontal.png", "benchmark_logscale.png")))
+
+        comp = plt1.add_composition(sfe)
+        for c, sub in comp.groupby("composition", sort=False):
+            out = os.path.join(plt1.OUT_DIR, f"SFE_vs_Temp_{c}.png")
+            figs.append(Figure([out], "plt1", "plot_sfe_vs_temp", (sub.reset_index(drop=True), c, out)))
+
+        lp = sfe.dropna(subset=["a", "c"]).reset_index(drop=True)
+        figs.append(Figure(["lattice_vs_Temperature.png"], "plt_lattice_param", "plot_vs_temperature",
+                           (lp, "lattice_vs_Temperature.png")))
+        figs.append(Figure(["lattice_vs_Composition.png"], "plt_lattice_param", "plot_vs_composition",
+                           (lp, "lattice_vs_Composition.png")))
+
+    if "lattice" in data:
+        lat = data["lattice"]
+        for struct in ["FCC", "HCP", "DHCP"]:
+            dsub = lat[lat["Structure"] == struct].reset_index(drop=True)
+            if not dsub.empty:
+                figs.append(Figure([f"lattice_{struct}.png"], "plt_lattice", "plot_lattice",
+                                   (dsub, struct, f"lattice_{struct}.png")))
+
+    if "energy" in data:
+        figs.append(Figure(["pe_by_structure_better_scaled.png"], "plt_pe", "pe_by_structure",
+                           (data["energy"], "pe_by_structure_better_scaled.png")))
+    return figs
+
+# ------------------ Staleness ------------------
+_sources = {}
+
+def repo_imports(name):
+    """Repo modules (top-level .py files) that module `name` imports."""
+    tree = ast.parse(open(os.path.join(ROOT, name + ".py"), "rb").read())
+    mods = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            mods |= {a.name.split(".")[0] for a in node.names}
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            mods.add(node.module.split(".")[0])
+    return {m for m in mods if os.path.exists(os.path.join(ROOT, m + ".py"))}
+
+def module_hash(name):
+    """Source hash of a plotting module and every repo module it imports, transitively (e.g. ternary, harvest)."""
+    if name not in _sources:
+        seen, todo = set(), [name]
+        while todo:
+            m = todo.pop()
+            if m not in seen:
+                seen.add(m)
+                todo += repo_imports(m)
+        h = hashlib.sha256()
+        for m in sorted(seen):
+            h.update(m.encode())
+            h.update(open(os.path.join(ROOT, m + ".py"), "rb").read())
+        _sources[name] = h.hexdigest()
+    return _sources[name]
+
+def figure_hash(fig):
+    h = hashlib.sha256()
+    h.update(f"{fig.module}.{fig.func}:{module_hash(fig.module)}".encode())
+    for a in fig.args:
+        if isinstance(a, pd.DataFrame):
+            h.update(repr(list(a.columns)).encode())
+            h.update(pd.util.hash_pandas_object(a, index=False).values.tobytes())
+        else:
+            h.update(repr(a).encode())
+    return h.hexdigest()
+
+def load_manifest(path=MANIFEST):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+def save_manifest(manifest, path=MANIFEST):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def stale(figs, manifest):
+    out = []
+    for fig in figs:
+        h = figure_hash(fig)
+        if any(manifest.get(o) != h or not os.path.exists(o) for o in fig.outputs):
+            out.append((fig, h))
+    return out
+
+# ------------------ Rendering ------------------
+def render_one(fig):
+    """Draw one figure (in a worker); returns seconds spent."""
+    import matplotlib.pyplot as plt
+    mod = importlib.import_module(fig.module)
+    for o in fig.outputs:
+        if os.path.dirname(o):
+            os.makedirs(os.path.dirname(o), exist_ok=True)
+    t0 = time.perf_counter()
+    with plt.rc_context():
+        plt.rcdefaults()        # a worker may already hold another module's STYLE
+        plt.rcParams.update(getattr(mod, "STYLE", {}))
+        getattr(mod, fig.func)(*fig.args)
+    plt.close("all")
+    return time.perf_counter() - t0
+
+def render(todo, manifest, jobs):
+    # 600-dpi ternary contours are the slowest; start them first
+    todo = sorted(todo, key=lambda t: t[0].module != "plt_ter_2")
+    n_fail = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futs = {pool.submit(render_one, fig): (fig, h) for fig, h in todo}
+        for fut in as_completed(futs):
+            fig, h = futs[fut]
+            name = ", ".join(fig.outputs)
+            try:
+                dt = fut.result()
+            except Exception as e:
+                n_fail += 1
+                print(f"❌ {name}: {e}")
+                continue
+            for o in fig.outputs:
+                manifest[o] = h
+            print(f"🖼  {name}  {dt:.2f} s")
+    return n_fail
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--force", action="store_true", help="render every figure")
+    ap.add_argument("--dry-run", action="store_true", help="only list stale figures")
+    ap.add_argument("--only", default="", help="substring filter on output names")
+    args = ap.parse_args()
+
+    t0 = time.time()
+    figs = [f for f in figures(load_data()) if any(args.only in o for o in f.outputs)]
+    manifest = load_manifest()
+    todo = [(f, figure_hash(f)) for f in figs] if args.force else stale(figs, manifest)
+    print(f"render: {len(todo)} stale / {len(figs)} figures")
+    if args.dry_run:
+        for fig, _ in todo:
+            print("  ", ", ".join(fig.outputs))
+        return
+
+    n_fail = render(todo, manifest, args.jobs) if todo else 0
+    save_manifest(manifest)
+    print(f"✅ Rendered {len(todo) - n_fail} figures in {time.time() - t0:.1f} s"
+          + (f" ({n_fail} failed)" if n_fail else ""))
+    sys.exit(1 if n_fail else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,27 @@
 #!/usr/bin/env python3
 """
 Robust batch runner for Co–Fe–Ni SFE simulations (EAM/alloy version).
-Loops over all .data files and executes temperature sweeps via LAMMPS.
+Loops over all .data files and executes temperature sweeps via LAMMPS
+($LMP overrides the executable). Per-job timings go to work/metrics.jsonl.
+
+    python run_all.py                                     # serial
+    python run_all.py --workers 16 --np 4 --pin --monitor
 """
 
-import os, re, time, shutil, subprocess
+import os, re, glob, json, time, queue, shutil, argparse, tempfile, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# --- Paths ---
-ROOT      = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
-LMP       = "/opt/homebrew/bin/lmp_serial"
-DATA_DIR  = os.path.join(ROOT, "work", "data")
-LOG_DIR   = os.path.join(ROOT, "work", "logs")
-RES_DIR   = os.path.join(ROOT, "work", "results")
-IN_FCC    = os.path.join(ROOT, "inputs", "in.fcc.lmp")
-IN_HCP    = os.path.join(ROOT, "inputs", "in.hcp.lmp")
-IN_DHCP   = os.path.join(ROOT, "inputs", "in.dhcp.lmp")
+import cache as jobcache
+import lmpworker
+import metrics
+import monitor
+import preflight
+from settings import (ROOT, LMP, DATA_DIR, LOG_DIR, RES_DIR, LEDGER, IN_FCC, IN_HCP, IN_DHCP, IN_BATCH,
+                      STRUCT_MAP, TEMPS, data_files, cell_vars)
 
-STRUCT_MAP = {"fcc": IN_FCC, "hcp": IN_HCP, "dhcp": IN_DHCP}
-TEMPS      = [100, 550, 350]
+TASKSET    = shutil.which("taskset")
+DECK_VARS  = {}   # extra -var settings for every launch (e.g. SWAP from --swap)
 
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(RES_DIR, exist_ok=True)
@@ -26,52 +29,268 @@ os.makedirs(RES_DIR, exist_ok=True)
 def ts(): return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 def check_data_file(df):
+    """Bounded header read (preflight.data_header); the full cross-checks are `--preflight`."""
     try:
-        head = open(df).read(1000)
-    except Exception as e:
+        hdr = preflight.data_header(df)
+    except (OSError, ValueError) as e:
         return False, f"cannot read: {e}"
-    ntypes = re.search(r"^(\s*\d+)\s+atom\s+types", head, flags=re.I|re.M)
-    if not ntypes or int(ntypes.group(1)) != 3:
+    if hdr["ntypes"] != 3:
         return False, "Expected 3 atom types"
-    if "Masses" not in open(df).read():
+    if not hdr["masses"]:
         return False, "No 'Masses' section"
     return True, "ok"
 
-def run_one(struct, df, T, in_file, attempt=1):
+FINAL_RE = re.compile(r"^(FINAL_STRUCT|FINAL_TEMP|FINAL_PE_PERATOM|MONITOR_PE_PERATOM)\s*=\s*(\S+)", re.M)
+
+def parse_final(log):
+    """FINAL_* values printed at the end of a deck, or {} if absent."""
+    try:
+        txt = open(log, errors="ignore").read()
+    except OSError:
+        return {}
+    return {k: v for k, v in FINAL_RE.findall(txt)}
+
+def var_args(variables):
+    return [a for k, v in variables.items() for a in ("-var", k, str(v))]
+
+def run_one(struct, df, T, in_file, attempt=1, cores=None, np_mpi=1, mpirun="mpirun", monitor_opts=None,
+            cache=None):
     base = os.path.splitext(os.path.basename(df))[0]
     tag  = f"{base}_{T}K"
     log  = os.path.join(LOG_DIR, f"{tag}.log")
     outd = os.path.join(RES_DIR, base)
     os.makedirs(outd, exist_ok=True)
+    cv = {**cell_vars(df), **DECK_VARS}
+
+    key = None
+    if cache is not None and os.path.exists(in_file):
+        key = jobcache.job_key(df, in_file, {"TEMP": T, "STRUCT": struct, **cv}, LMP, extra=monitor_opts)
+        if cache.get(key) and cache.restore(key, log, outd):
+            print(f"[{ts()}] ⚡ cached {tag} ({key[:12]})\n")
+            return True, 0.0
 
     cmd = [
         LMP, "-var", "DATA", df, "-var", "TEMP", str(T),
-        "-var", "STRUCT", struct, "-var", "OUTDIR", outd,
-        "-in", in_file
+        "-var", "STRUCT", struct, "-var", "OUTDIR", outd, *var_args(cv),
+        "-log", "none", "-in", in_file     # stdout already goes to LOG_DIR/<tag>.log; no shared ./log.lammps
     ]
+    if np_mpi > 1:
+        cmd = [mpirun, "-np", str(np_mpi)] + cmd
+
+    # pin the launcher (and everything it forks) to this job's core block
+    cmd = pinned(cmd, cores)
 
+    monitor.clear_sentinels(outd, T)    # a crashed run's sentinel would end a stage at once, monitored or not
     print(f"[{ts()}] ▶ run {tag} (attempt {attempt})")
     t0 = time.time()
-    with open(log, "w") as lf:
-        proc = subprocess.run(cmd, stdout=lf, stderr=subprocess.STDOUT)
+    usage = {}
+    if monitor_opts is not None:
+        div = monitor.divisors(cv)
+        rc, rep = monitor.run_monitored(cmd, log, outd, T, usage=usage, div=div, **monitor_opts)
+        steps = "/".join(str(rep["samples"][s]) for s in monitor.STAGES)
+        print(f"[{ts()}]   thermo samples npt/nvt = {steps}, converged = {rep['converged']}")
+    else:
+        with open(log, "w") as lf:
+            proc = subprocess.Popen(cmd, stdout=lf, stderr=subprocess.STDOUT)
+            rc, usage = metrics.wait(proc, t0)
     mins = (time.time() - t0)/60.0
+    metrics.record(tag, usage, log, rc=rc, attempt=attempt, np=np_mpi, monitored=monitor_opts is not None)
 
-    if proc.returncode == 0:
+    if rc == 0:
+        if key is not None:
+            outputs = [os.path.join(outd, f"final_{struct}_{T}K.data"), os.path.join(outd, f"monitor_{T}K.json")]
+            cache.put(key, log, outputs, meta={"tag": tag, "minutes": mins, "final": parse_final(log)})
+            cache.evict()
         print(f"[{ts()}] ✅ done {tag} in {mins:.2f} min\n")
         return True, mins
     else:
         print(f"[{ts()}] ❌ fail {tag} (see {log})\n")
         return False, mins
 
-def main():
-    datafiles = sorted([os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR) if f.endswith(".data")])
+def is_triclinic(df):
+    with open(df, errors="ignore") as fh:
+        return "xy xz yz" in fh.read(2000)
+
+def run_batch(struct, df, temps, attempt=1, cores=None, np_mpi=1, mpirun="mpirun", monitor_opts=None,
+              cache=None, in_file=IN_BATCH):
+    """All temperatures of one data file in a single LAMMPS process (in.batch.lmp).
+
+    The cell is read and minimized once; each temperature still gets its own
+    {base}_{T}K.log, final_*.data and cache entry. → {T: (ok, minutes)}
+    """
+    base = os.path.splitext(os.path.basename(df))[0]
+    outd = os.path.join(RES_DIR, base)
+    os.makedirs(outd, exist_ok=True)
+    logs = {T: os.path.join(LOG_DIR, f"{base}_{T}K.log") for T in temps}
+
+    cv = {**cell_vars(df), **DECK_VARS}
+
+    res, keys, todo = {}, {}, []
+    for T in temps:
+        if cache is not None and os.path.exists(in_file):
+            keys[T] = key = jobcache.job_key(df, in_file, {"TEMP": T, "STRUCT": struct, **cv}, LMP,
+                                             extra=monitor_opts)
+            if cache.get(key) and cache.restore(key, logs[T], outd):
+                print(f"[{ts()}] ⚡ cached {base}_{T}K ({key[:12]})")
+                res[T] = (True, 0.0)
+                continue
+        todo.append(T)
+    if not todo:
+        print()
+        return res
+
+    cmd = [
+        LMP, "-var", "DATA", df, "-var", "TEMP", *map(str, todo),
+        "-var", "STRUCT", struct, "-var", "OUTDIR", outd,
+        "-var", "LOGDIR", LOG_DIR, "-var", "BASE", base,
+        "-var", "TRICLINIC", "1" if is_triclinic(df) else "0", *var_args(cv),
+        "-log", os.path.join(LOG_DIR, f"{base}_batch.log"), "-in", in_file
+    ]
+    if np_mpi > 1:
+        cmd = [mpirun, "-np", str(np_mpi)] + cmd
+
+    cmd = pinned(cmd, cores)
+
+    for T in todo:  # a stale log must not pass for this run's output, a stale sentinel must not end a stage
+        if os.path.exists(logs[T]):
+            os.remove(logs[T])
+        monitor.clear_sentinels(outd, T)
+
+    label = "/".join(map(str, todo))
+    print(f"[{ts()}] ▶ run {base}_[{label}]K batch (attempt {attempt})")
+    t0 = time.time()
+    usage = {}
+    if monitor_opts is not None:
+        div = monitor.divisors(cv)
+        rc, reps = monitor.run_monitored_batch(cmd, outd, {T: logs[T] for T in todo}, usage=usage, div=div,
+                                               **monitor_opts)
+        for T, rep in reps.items():
+            steps = "/".join(str(rep["samples"][s]) for s in monitor.STAGES)
+            print(f"[{ts()}]   {T} K thermo samples npt/nvt = {steps}, converged = {rep['converged']}")
+    else:
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        rc, usage = metrics.wait(proc, t0)
+    mins = (time.time() - t0)/60.0
+    share = mins / len(todo)
+    # process usage is shared; each temperature records its own LAMMPS timing
+    shared = {k: v / len(todo) if k != "max_rss_mb" else v for k, v in usage.items()}
+
+    for T in todo:
+        tag = f"{base}_{T}K"
+        try:
+            ok = "END_OF_RUN" in open(logs[T], errors="ignore").read()
+        except OSError:
+            ok = False
+        if ok and T in keys:
+            outputs = [os.path.join(outd, f"final_{struct}_{T}K.data"), os.path.join(outd, f"monitor_{T}K.json")]
+            cache.put(keys[T], logs[T], outputs, meta={"tag": tag, "minutes": share, "final": parse_final(logs[T])})
+        res[T] = (ok, share)
+        metrics.record(tag, shared, logs[T], rc=rc, attempt=attempt, np=np_mpi,
+                       monitored=monitor_opts is not None, batch=len(todo))
+    if keys:
+        cache.evict()
+
+    n_ok = sum(res[T][0] for T in todo)
+    mark = "✅" if n_ok == len(todo) else "❌"
+    print(f"[{ts()}] {mark} {base}: {n_ok}/{len(todo)} temperatures in {mins:.2f} min (rc={rc})\n")
+    return res
+
+def batches(jobs):
+    """Group (struct, df, T, deck) jobs into (struct, df, [T, ...]) per data file."""
+    out = {}
+    for struct, df, T, _ in jobs:
+        out.setdefault((struct, df), []).append(T)
+    return [(struct, df, temps) for (struct, df), temps in out.items()]
+
+def run_library(jobs, workers, factory, ledger_path=LEDGER, cache=None, log_dir=LOG_DIR, res_dir=RES_DIR,
+                metrics_path=metrics.METRICS):
+    """Full decks on `workers` persistent LAMMPS library instances (lmpworker.py).
+
+    No per-job process start; the FINAL_* values come back as Python floats.
+    """
+    ledger = Ledger(ledger_path)
+    todo, keys = [], {}
+    for struct, df, T, in_file in jobs:
+        tag = job_tag(df, T)
+        if ledger.done(tag):
+            continue
+        base = os.path.splitext(os.path.basename(df))[0]
+        outd = os.path.join(res_dir, base)
+        os.makedirs(outd, exist_ok=True)
+        variables = {"DATA": df, "TEMP": T, "STRUCT": struct, "OUTDIR": outd, **cell_vars(df), **DECK_VARS}
+        log = os.path.join(log_dir, f"{tag}.log")
+        if cache is not None and os.path.exists(in_file):
+            keys[tag] = key = jobcache.job_key(df, in_file, {k: v for k, v in variables.items()
+                                                            if k not in ("DATA", "OUTDIR")}, LMP)
+            if cache.get(key) and cache.restore(key, log, outd):
+                ledger.record(tag, "done", attempt=0, minutes=0.0, final=cache.meta(key).get("final"))
+                print(f"[{ts()}] ⚡ cached {tag} ({key[:12]})")
+                continue
+        monitor.clear_sentinels(outd, T)
+        todo.append((struct, T, outd, lmpworker.deck_job(tag, in_file, variables, log)))
+    print(f"ledger: {len(jobs) - len(todo)} done, {len(todo)} to run on {workers} library workers\n")
+
+    n_ok, total_min = 0, 0.0
+    with lmpworker.Pool(workers, factory) as pool:
+        futs = {pool.submit(job): (struct, T, outd, job) for struct, T, outd, job in todo}
+        for fut in as_completed(futs):
+            struct, T, outd, job = futs[fut]
+            r = fut.result()
+            mins = r["wall_s"] / 60.0
+            total_min += mins
+            metrics.record(job.tag, {"wall_s": r["wall_s"]}, job.log, path=metrics_path, rc=0 if r["ok"] else 1,
+                           attempt=1, library=True, served=r["served"])
+            if not r["ok"]:
+                ledger.record(job.tag, "failed", attempt=1, minutes=round(mins, 4), error=r["error"])
+                print(f"[{ts()}] ❌ fail {job.tag}: {r['error']}")
+                continue
+            final = {k: r["results"][k] for k in lmpworker.DECK_RESULTS}
+            ledger.record(job.tag, "done", attempt=1, minutes=round(mins, 4), final=final)
+            if job.tag in keys:
+                outputs = [os.path.join(outd, f"final_{struct}_{T}K.data")]
+                cache.put(keys[job.tag], job.log, outputs, meta={"tag": job.tag, "minutes": mins, "final": final})
+            n_ok += 1
+            print(f"[{ts()}] ✅ done {job.tag} in {mins:.2f} min (worker {r['pid']}, job {r['served'] + 1})")
+    if keys:
+        cache.evict()
+    return len(todo), n_ok, total_min
+
+# ------------------ Job ledger ------------------
+class Ledger:
+    """Append-only JSONL job ledger; the last record of a tag is its state."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self.state[rec["tag"]] = rec
+
+    def done(self, tag):
+        return self.state.get(tag, {}).get("state") == "done"
+
+    def record(self, tag, state, **info):
+        rec = {"tag": tag, "state": state, "time": ts(), **info}
+        with self.lock:
+            self.state[tag] = rec
+            with open(self.path, "a") as fh:
+                fh.write(json.dumps(rec) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+
+def collect_jobs():
+    """All runnable (struct, data file, T, deck) jobs, after data-file checks."""
+    datafiles = data_files()
     if not datafiles:
         raise RuntimeError("No .data files in work/data")
 
-    total_jobs, total_min = 0, 0.0
-    tstart = time.time()
-    print("\n======= Co–Fe–Ni SFE Automation (EAM) =======\n")
-
+    jobs = []
     for df in datafiles:
         struct = os.path.basename(df).split("_")[0].lower()
         if struct not in STRUCT_MAP:
@@ -83,23 +302,217 @@ def main():
             print(f"❌ {os.path.basename(df)}: {reason} — skipping.\n")
             continue
 
-        in_file = STRUCT_MAP[struct]
-
         for T in TEMPS:
+            jobs.append((struct, df, T, STRUCT_MAP[struct]))
+    return jobs
+
+def job_tag(df, T):
+    return f"{os.path.splitext(os.path.basename(df))[0]}_{T}K"
+
+def pinned(cmd, cores):
+    """`cmd` behind `taskset -c` so the launcher and every rank it forks stay on `cores`."""
+    return [TASKSET, "-c", ",".join(map(str, sorted(cores)))] + cmd if cores else cmd
+
+def core_blocks(n_workers, np_mpi):
+    """Disjoint CPU sets of size np_mpi, one per worker (None if too few cores)."""
+    if not hasattr(os, "sched_getaffinity") or TASKSET is None:
+        print("⚠️  no sched_getaffinity/taskset here; not pinning")
+        return [None] * n_workers
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < n_workers * np_mpi:
+        print(f"⚠️  {len(cpus)} cores < {n_workers}×{np_mpi}; not pinning")
+        return [None] * n_workers
+    return [set(cpus[i*np_mpi:(i+1)*np_mpi]) for i in range(n_workers)]
+
+def run_scheduled(jobs, workers, np_mpi=1, pin=False, mpirun="mpirun", ledger_path=LEDGER, retries=1,
+                  monitor_opts=None, cache=None, batch=False):
+    """Run jobs on a pool of `workers` concurrent LAMMPS launches, resumable via the ledger.
+
+    With `batch`, the pending temperatures of each data file share one launch.
+    """
+    ledger = Ledger(ledger_path)
+    todo = [j for j in jobs if not ledger.done(job_tag(j[1], j[2]))]
+    print(f"ledger: {len(jobs) - len(todo)} done, {len(todo)} to run → {ledger_path}\n")
+
+    slots = queue.Queue()
+    for block in (core_blocks(workers, np_mpi) if pin else [None] * workers):
+        slots.put(block)
+
+    def work(job):
+        struct, df, T, in_file = job
+        tag = job_tag(df, T)
+        cores = slots.get()
+        try:
+            mins = 0.0
+            for attempt in range(1, retries + 2):
+                ledger.record(tag, "running", attempt=attempt,
+                              cores=sorted(cores) if cores else None)
+                ok, m = run_one(struct, df, T, in_file, attempt=attempt,
+                                cores=cores, np_mpi=np_mpi, mpirun=mpirun, monitor_opts=monitor_opts,
+                                cache=cache)
+                mins += m
+                if ok:
+                    final = parse_final(os.path.join(LOG_DIR, f"{tag}.log"))
+                    ledger.record(tag, "done", attempt=attempt, minutes=round(m, 4), final=final)
+                    return True, mins
+                ledger.record(tag, "failed", attempt=attempt, minutes=round(m, 4))
+            return False, mins
+        finally:
+            slots.put(cores)
+
+    def work_batch(unit):
+        struct, df, temps = unit
+        cores = slots.get()
+        try:
+            n_ok, mins = 0, 0.0
+            for attempt in range(1, retries + 2):
+                for T in temps:
+                    ledger.record(job_tag(df, T), "running", attempt=attempt,
+                                  cores=sorted(cores) if cores else None)
+                res = run_batch(struct, df, temps, attempt=attempt, cores=cores, np_mpi=np_mpi,
+                                mpirun=mpirun, monitor_opts=monitor_opts, cache=cache)
+                failed = []
+                for T in temps:
+                    ok, m = res[T]
+                    mins += m
+                    tag = job_tag(df, T)
+                    if ok:
+                        n_ok += 1
+                        final = parse_final(os.path.join(LOG_DIR, f"{tag}.log"))
+                        ledger.record(tag, "done", attempt=attempt, minutes=round(m, 4), final=final)
+                    else:
+                        failed.append(T)
+                        ledger.record(tag, "failed", attempt=attempt, minutes=round(m, 4))
+                if not failed:
+                    break
+                temps = failed
+            return n_ok, mins
+        finally:
+            slots.put(cores)
+
+    units = batches(todo) if batch else todo
+    n_ok, total_min = 0, 0.0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for fut in as_completed([pool.submit(work_batch if batch else work, u) for u in units]):
+            ok, mins = fut.result()
+            n_ok += ok
+            total_min += mins
+    return len(todo), n_ok, total_min
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=0, help="concurrent jobs, each state recorded in --ledger so an interrupted sweep only reruns unfinished "
+                         "or failed jobs (0 = legacy serial loop)")
+    ap.add_argument("--np", dest="np_mpi", type=int, default=1, help="MPI ranks per job (mpirun -np K)")
+    ap.add_argument("--mpirun", default="mpirun", help="MPI launcher used when --np > 1")
+    ap.add_argument("--pin", action="store_true", help="pin each worker to its own block of --np cores (taskset)")
+    ap.add_argument("--ledger", default=LEDGER, help="JSONL job ledger for resumable sweeps (--workers / --lib)")
+    ap.add_argument("--monitor", action="store_true", help="stream thermo through monitor.py: end NPT/NVT once E/atom and the box converge, append "
+                         "averaged MONITOR_* values to the log")
+    ap.add_argument("--tol-e", type=float, default=2e-4, help="E/atom standard-error tolerance (eV)")
+    ap.add_argument("--tol-l", type=float, default=2e-3, help="lattice-vector standard-error tolerance (Å)")
+    ap.add_argument("--batch-temps", action="store_true",
+                    help="one LAMMPS process per data file for all temperatures (in.batch.lmp): setfl read and cell "
+                         "minimized once, logs as usual")
+    ap.add_argument("--swap", type=int, default=0, metavar="N",
+                    help="hybrid MD/MC: N atom/swap attempts per type pair every 100 steps, so chemical short-range "
+                         "order equilibrates at each T (swapmc.py is the static-lattice equivalent)")
+    ap.add_argument("--dump", type=int, default=0, metavar="N",
+                    help="binary NVT trajectory every N steps, work/results/<base>/traj_<T>K.bin, for traj.py "
+                         "(disables the cache)")
+    ap.add_argument("--lib", nargs="?", const="lammps", choices=["lammps", "mock"],
+                    help="run decks on --workers persistent LAMMPS library instances (lmpworker.py); `mock` tests "
+                         "the plumbing without LAMMPS, with logs, ledger and metrics in a temp dir")
+    ap.add_argument("--preflight", nargs="?", const="static", choices=["static", "dry"],
+                    help="check LAMMPS, runners, headers, type/element map, setfl and sidecars first (preflight.py) "
+                         "and drop failing jobs; `dry` also runs `run 0` per data file")
+    ap.add_argument("--no-cache", action="store_true", help="always relaunch LAMMPS (default: reuse cache.py entries keyed on data, deck, setfl, LAMMPS "
+                         "version)")
+    ap.add_argument("--cache-dir", default=jobcache.CACHE_DIR)
+    ap.add_argument("--cache-gb", type=float, default=jobcache.MAX_BYTES / (1 << 30), help="budget for cached final_*.data")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = collect_jobs()
+    mon = dict(tol_e=args.tol_e, tol_l=args.tol_l) if args.monitor else None
+    cache = None if args.no_cache else jobcache.Cache(args.cache_dir, int(args.cache_gb * (1 << 30)))
+    if args.swap:
+        DECK_VARS["SWAP"] = args.swap
+    if args.dump:
+        DECK_VARS["DUMP"] = args.dump
+        cache = None    # trajectories are not cached entries
+    if args.preflight:
+        fatal = preflight.check_lmp(LMP)
+        if fatal:
+            print(f"❌ {fatal}")
+            if not args.lib:
+                return    # no job could launch
+        for w in preflight.check_runners(sorted(glob.glob(os.path.join(ROOT, "run_*.sh")))):
+            print(f"⚠️  {w}")
+        checked = [(s, df, T, IN_BATCH if args.batch_temps else d) for s, df, T, d in jobs]
+        passed = preflight.filter_jobs(checked, DECK_VARS, None if fatal else LMP, args.preflight == "dry",
+                                       max(args.workers, os.cpu_count() or 1))
+        keep = {(df, T) for _, df, T, _ in passed}
+        print(f"preflight: {len(keep)}/{len(jobs)} jobs pass\n")
+        jobs = [j for j in jobs if (j[1], j[2]) in keep]
+
+    total_jobs, total_min = 0, 0.0
+    tstart = time.time()
+    print("\n======= Co–Fe–Ni SFE Automation (EAM) =======\n")
+
+    out = {"ledger_path": args.ledger}
+    if args.lib:
+        if mon is not None or args.batch_temps:
+            print("⚠️  --monitor / --batch-temps do not apply to --lib (no stdout stream, one deck per job)")
+        factory = lmpworker.MockLammps if args.lib == "mock" else lmpworker.library
+        if args.lib == "mock":     # fake results: never cached, never in the real logs/ledger/metrics
+            cache = None
+            scratch = tempfile.mkdtemp(prefix="run_all_mock_")
+            out = {"ledger_path": os.path.join(scratch, "jobs.jsonl"), "log_dir": os.path.join(scratch, "logs"),
+                   "res_dir": os.path.join(scratch, "results"),
+                   "metrics_path": os.path.join(scratch, "metrics.jsonl")}
+            os.makedirs(out["log_dir"])
+            print(f"⚠️  mock run: logs, results, ledger and metrics go to {scratch}")
+        try:
+            lmpworker.check_factory(factory)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+        total_jobs, n_ok, total_min = run_library(jobs, max(args.workers, 1), factory, cache=cache, **out)
+        print(f"✅ {n_ok}/{total_jobs} jobs succeeded ({total_min:.2f} CPU-job min)")
+    elif args.workers > 0:
+        total_jobs, n_ok, total_min = run_scheduled(
+            jobs, args.workers, np_mpi=args.np_mpi, pin=args.pin,
+            mpirun=args.mpirun, ledger_path=args.ledger, monitor_opts=mon, cache=cache,
+            batch=args.batch_temps)
+        print(f"✅ {n_ok}/{total_jobs} jobs succeeded ({total_min:.2f} CPU-job min)")
+    elif args.batch_temps:
+        for struct, df, temps in batches(jobs):
+            total_jobs += len(temps)
+            res = run_batch(struct, df, temps, attempt=1, monitor_opts=mon, cache=cache)
+            total_min += sum(m for _, m in res.values())
+            failed = [T for T, (ok, _) in res.items() if not ok]
+            if failed:
+                print("↻ retrying failed temperatures once...")
+                res2 = run_batch(struct, df, failed, attempt=2, monitor_opts=mon, cache=cache)
+                total_min += sum(m for _, m in res2.values())
+    else:
+        for struct, df, T, in_file in jobs:
             total_jobs += 1
-            ok, mins = run_one(struct, df, T, in_file, attempt=1)
+            ok, mins = run_one(struct, df, T, in_file, attempt=1, monitor_opts=mon, cache=cache)
             total_min += mins
             if not ok:
                 print("↻ retrying once...")
-                ok2, mins2 = run_one(struct, df, T, in_file, attempt=2)
+                ok2, mins2 = run_one(struct, df, T, in_file, attempt=2, monitor_opts=mon, cache=cache)
                 total_min += mins2
 
     elapsed = (time.time() - tstart)/60.0
     print("===============================================")
     print(f"🏁 Finished {total_jobs} jobs in {elapsed:.2f} min "
           f"(avg {elapsed/max(total_jobs,1):.2f} min/job)")
-    print("Logs   →", LOG_DIR)
-    print("Results→", RES_DIR)
+    print("Logs   →", out.get("log_dir", LOG_DIR))
+    print("Results→", out.get("res_dir", RES_DIR))
     print("===============================================\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paths and sweep settings shared by run_all.py and preflight.py.
+
+Imports neither of them, so preflight.py can be used by run_all.py
+(--preflight) and run on its own without a circular import.
+"""
+
+import os, json
+
+# --- Paths ---
+ROOT      = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
+LMP       = os.environ.get("LMP", "/opt/homebrew/bin/lmp_serial")
+DATA_DIR  = os.path.join(ROOT, "work", "data")
+LOG_DIR   = os.path.join(ROOT, "work", "logs")
+RES_DIR   = os.path.join(ROOT, "work", "results")
+LEDGER    = os.path.join(ROOT, "work", "jobs.jsonl")
+IN_FCC    = os.path.join(ROOT, "inputs", "in.fcc.lmp")
+IN_HCP    = os.path.join(ROOT, "inputs", "in.hcp.lmp")
+IN_DHCP   = os.path.join(ROOT, "inputs", "in.dhcp.lmp")
+IN_BATCH  = os.path.join(ROOT, "inputs", "in.batch.lmp")
+
+STRUCT_MAP = {"fcc": IN_FCC, "hcp": IN_HCP, "dhcp": IN_DHCP}
+TEMPS      = [100, 550, 350]
+
+def data_files():
+    """Sorted .data files in DATA_DIR."""
+    return sorted(os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR) if f.endswith(".data"))
+
+def cell_vars(df):
+    """Deck divisors NX/NY/NZ and factor FY from the data file's generate.py sidecar ({} for legacy files)."""
+    side = os.path.splitext(df)[0] + ".json"
+    if not os.path.exists(side):
+        return {}
+    with open(side) as fh:
+        meta = json.load(fh)
+    return {k: meta[k] for k in ("NX", "NY", "NZ", "FY") if k in meta}
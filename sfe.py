@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generalized stacking-fault (γ-surface) engine for Co–Fe–Ni FCC alloys.
+
+For every composition in generate.COMPOSITIONS a periodic (111)-oriented
+random-alloy slab (x ∥ [11-2], y ∥ [-110], z ∥ [111]) is sheared rigidly along
+⟨112⟩ on 1, 2 and 3 consecutive planes, then relaxed only normal to the fault:
+
+    path 1 : ISF           → γISF  = γ₁(b_p),  γUSF = max γ₁
+    path 2 : ESF           → γESF  = γ₂(b_p)
+    path 3 : 3-layer twin  → γTwin = γ₃(b_p) / 2   (energy per twin boundary)
+
+The fault sits on the periodic boundary (tilted c vector), so there are no free
+surfaces. All displacement steps of one composition (every path, step and
+lattice constant) are relaxed together as one batched EAM evaluation.
+
+Temperature enters through the lattice constant: the MD value from
+lattice_results.csv when that run exists, else the static 0 K EAM value.
+
+Outputs:
+    sfe_results.csv    Co,Fe,Ni,Temperature,γISF,γESF,γTwin,γUSF,a,c,Method  (mJ/m²)
+    gsfe_curves.csv    full γ(s) curves, s = shear / b_p
+"""
+
+import os, time, argparse
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from ase.lattice.cubic import FaceCenteredCubic
+
+import generate
+from eam import EAMPotential, SETFL
+from neighbor import NeighborList
+
+# ------------------ Settings ----------------
+TEMPS = [100, 350, 550]          # same sweep as run_all.TEMPS
+EV_A2_TO_MJ_M2 = 16021.766       # 1 eV/Å² in mJ/m²
+DECK_CELLS = 8                   # in.*.lmp report a1 = Lx/8
+SLAB_SIZE = (1, 2, 4)            # [11-2] × [-110] × [111] repeats → 12 (111) layers
+N_STEPS = 10                     # shear points per path, s = 0 … 1
+
+# ------------------ Lattice constants ------------------
+def static_lattice_constant(pot, fracs, rng, a_guess=3.55):
+    """0 K FCC lattice constant of a random alloy from a batched E(a) scan."""
+    a_grid = a_guess * np.linspace(0.96, 1.04, 9)
+    symbols = None
+    cells = []
+    for a in a_grid:
+        at = FaceCenteredCubic("Ni", latticeconstant=a, size=(3, 3, 3))
+        if symbols is None:
+            symbols = generate.rand_elements(len(at), fracs, generate.LABELS, rng)
+        at.set_chemical_symbols(symbols)
+        cells.append(at)
+    e = np.array([r["energy"] for r in pot.compute_batch(cells)])
+    c2, c1, _ = np.polyfit(a_grid, e, 2)
+    return -c1 / (2 * c2)
+
+def md_lattice_constants(path="lattice_results.csv"):
+    """{(Co, Fe, Ni, T): a} for FCC runs that reported lattice vectors."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path).dropna(subset=["a1"])
+    df = df[df["Structure"].str.upper() == "FCC"]
+    scale = DECK_CELLS / generate.N_SUPERCELL
+    return {(r.Co, r.Fe, r.Ni, int(r.Temperature)): r.a1 * scale for r in df.itertuples()}
+
+def comp_key(comp):
+    return tuple(float(f"{comp[el]:.2f}") for el in generate.LABELS)
+
+# ------------------ Slabs ------------------
+def layer_ids(atoms, tol=0.3):
+    """(111) layer index of every atom, counted from the bottom."""
+    z = atoms.positions[:, 2]
+    order = np.argsort(z)
+    brk = np.concatenate([[0], np.cumsum(np.diff(z[order]) > tol)])
+    ids = np.empty(len(z), dtype=int)
+    ids[order] = brk
+    return ids
+
+def partial_vector(atoms, layers):
+    """Lateral offset layer 0 → layer 1 (the b_p that maps A→B, ISF direction)."""
+    a0 = np.nonzero(layers == 0)[0][0]
+    l1 = np.nonzero(layers == 1)[0]
+    d = atoms.positions[l1] - atoms.positions[a0]
+    d[:, 2] = 0.0
+    cell2 = atoms.cell[:2, :2]
+    frac = np.linalg.solve(cell2.T, d[:, :2].T).T
+    frac -= np.round(frac)
+    d[:, :2] = frac @ cell2
+    return d[np.argmin(np.linalg.norm(d, axis=1))]
+
+def build_slab(a, symbols=None):
+    atoms = FaceCenteredCubic("Ni", directions=[[1, 1, -2], [-1, 1, 0], [1, 1, 1]],
+                              latticeconstant=a, size=SLAB_SIZE)
+    if symbols is not None:
+        atoms.set_chemical_symbols(symbols)
+    return atoms
+
+def faulted(slab, layers, bp, shears):
+    """Slab with shear s_k·b_p on planes (top|0), (0|1), (1|2)…, fault on the boundary."""
+    img = slab.copy()
+    disp = np.zeros(len(slab))
+    for k, s in enumerate(shears[1:], start=1):
+        disp += s * (layers >= k)
+    img.positions += disp[:, None] * bp
+    cell = np.array(slab.cell)
+    cell[2] += sum(shears) * bp
+    img.set_cell(cell, scale_atoms=False)
+    return img
+
+def relax_normal(pot, images, maxiter=200, gtol=1e-4):
+    """Relax z of every atom of every image (in place), all images in one L-BFGS."""
+    nls = [NeighborList(pot.cutoff, skin=0.5) for _ in images]
+    sizes = [len(a) for a in images]
+    z0 = np.concatenate([a.positions[:, 2] for a in images])
+
+    def fun(z):
+        for a, zz in zip(images, np.split(z, np.cumsum(sizes)[:-1])):
+            a.positions[:, 2] = zz
+        res = pot.compute_batch(images, nls)
+        e = sum(r["energy"] for r in res)
+        g = -np.concatenate([r["forces"][:, 2] for r in res])
+        return e, g
+
+    opt = minimize(fun, z0, jac=True, method="L-BFGS-B", options={"maxiter": maxiter, "gtol": gtol})
+    fun(opt.x)
+    return np.array([r["energy"] for r in pot.compute_batch(images, nls)])
+
+# ------------------ γ-surface per composition ------------------
+def gsfe_composition(pot, comp, temps, md_a, rng, n_steps=N_STEPS):
+    """All γ(s) curves of one composition, every step and lattice constant in one batch."""
+    n_atoms = len(build_slab(3.55))
+    fracs = [comp[el] for el in generate.LABELS]
+    symbols = list(generate.rand_elements(n_atoms, fracs, generate.LABELS, rng))
+
+    a0 = static_lattice_constant(pot, fracs, rng)
+    a_of_T = {T: md_a.get(comp_key(comp) + (T,), a0) for T in temps}
+    s_grid = np.linspace(0.0, 1.0, n_steps + 1)
+
+    images, meta = [], []
+    for a in sorted(set(a_of_T.values())):
+        slab = build_slab(a, symbols)
+        layers = layer_ids(slab)
+        bp = partial_vector(slab, layers)
+        area = np.linalg.norm(np.cross(slab.cell[0], slab.cell[1]))
+        for path in (1, 2, 3):
+            for s in s_grid:
+                if path > 1 and s == 0.0:
+                    continue  # identical to the end point of the previous path
+                shears = [1.0] * (path - 1) + [s]
+                images.append(faulted(slab, layers, bp, shears))
+                meta.append((a, area, path, s))
+
+    energies = relax_normal(pot, images)
+    e_ref = {a: e for (a, _, p, s), e in zip(meta, energies) if p == 1 and s == 0.0}
+
+    curves = []
+    for (a, area, path, s), e in zip(meta, energies):
+        curves.append({"a": a, "path": path, "s": s,
+                       "gamma": (e - e_ref[a]) / area * EV_A2_TO_MJ_M2})
+    curves = pd.DataFrame(curves)
+    # each later path starts where the previous one ended
+    for path in (2, 3):
+        start = curves[(curves.path == path - 1) & (curves.s == 1.0)].assign(path=path, s=0.0)
+        curves = pd.concat([curves, start], ignore_index=True)
+    curves = curves.sort_values(["a", "path", "s"])
+
+    rows, out_curves = [], []
+    for T, a in a_of_T.items():
+        cv = curves[curves.a == a]
+        end = cv[cv.s == 1.0].set_index("path")["gamma"]
+        rows.append({
+            "Co": comp_key(comp)[0], "Fe": comp_key(comp)[1], "Ni": comp_key(comp)[2],
+            "Temperature": T,
+            "γISF": end[1], "γESF": end[2], "γTwin": end[3] / 2.0,
+            "γUSF": cv[cv.path == 1]["gamma"].max(),
+            "a": a, "c": a, "Method": "gsfe",
+        })
+        out_curves.append(cv.assign(Co=rows[-1]["Co"], Fe=rows[-1]["Fe"], Ni=rows[-1]["Ni"], Temperature=T))
+    return rows, pd.concat(out_curves, ignore_index=True)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--setfl", default=SETFL)
+    ap.add_argument("--lattice", default="lattice_results.csv", help="MD lattice constants per T")
+    ap.add_argument("--steps", type=int, default=N_STEPS)
+    ap.add_argument("--out", default="sfe_results.csv")
+    ap.add_argument("--curves", default="gsfe_curves.csv")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    pot = EAMPotential.load(args.setfl, elements=generate.LABELS)
+    md_a = md_lattice_constants(args.lattice)
+    rng = np.random.default_rng(args.seed)
+
+    rows, curves = [], []
+    for comp in generate.COMPOSITIONS:
+        t0 = time.time()
+        r, c = gsfe_composition(pot, comp, TEMPS, md_a, rng, args.steps)
+        rows += r
+        curves.append(c)
+        co, fe, ni = comp_key(comp)
+        print(f"✓ Co{co:.2f}_Fe{fe:.2f}_Ni{ni:.2f}: γISF = {r[0]['γISF']:7.1f}  γESF = {r[0]['γESF']:7.1f}  "
+              f"γTwin = {r[0]['γTwin']:7.1f} mJ/m²  ({time.time() - t0:.1f} s)")
+
+    pd.DataFrame(rows).to_csv(args.out, index=False)
+    cols = ["Co", "Fe", "Ni", "Temperature", "a", "path", "s", "gamma"]
+    pd.concat(curves, ignore_index=True)[cols].to_csv(args.curves, index=False)
+    print(f"✅ Saved: {args.out}, {args.curves}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Special quasirandom structures (SQS) for the generate.py supercells.
+
+Simulated annealing over species swaps drives the Warren–Cowley parameters
+
+    α_s(AB) = 1 − N_s(AB) / (N z_s c_A c_B)
+
+of the first few neighbour shells towards 0, the ideal random-alloy value.
+N_s(AB) counts ordered (i, j) pairs in shell s. A swap i↔j only changes
+N_s through the O(z) neighbours of i and j, so every step updates the pair
+counts incrementally. All chains advance together: one step is one proposed
+swap in each of the C chains, evaluated with a single bincount.
+
+    python sqs.py                     # random vs SQS |α| for a few compositions
+    python generate.py --sqs          # SQS cells instead of plain shuffles
+"""
+
+import time, argparse
+import numpy as np
+
+from neighbor import NeighborList
+
+N_SHELLS = 3
+N_CHAINS = 8
+N_STEPS  = 5000
+
+# ------------------ Shells ------------------
+def shells(atoms, n_shells=N_SHELLS, tol=1e-3):
+    """[(n, z_s) neighbour-index arrays] for the first n_shells distance shells."""
+    n = len(atoms)
+    d1 = (4.0 * atoms.get_volume() / n) ** (1.0 / 3.0) / np.sqrt(2.0)  # close-packed NN distance
+    cutoff = d1 * (1.0 + 0.45 * n_shells)
+    nl = NeighborList(cutoff, skin=0.0)
+    nl.update(atoms.positions, atoms.cell, atoms.pbc)
+    i, j, d, _ = nl.pairs(atoms.positions, atoms.cell)
+
+    key = np.round(d / tol).astype(np.int64)
+    levels = np.unique(key)[:n_shells]
+    out = []
+    for lv in levels:
+        m = key == lv
+        ii, jj = i[m], j[m]
+        z = np.bincount(ii, minlength=n)
+        if z.min() != z.max():
+            raise ValueError(f"shell at {lv * tol:.3f} Å is not uniform (z = {z.min()}…{z.max()})")
+        out.append(jj[np.argsort(ii, kind="stable")].reshape(n, z[0]))
+    return out
+
+# ------------------ Correlations ------------------
+def pair_counts(types, nbs, k):
+    """Ordered pair counts N[c, s, A, B] for types (C, n) with k species."""
+    types = np.atleast_2d(types)
+    C = len(types)
+    out = np.zeros((C, len(nbs), k, k))
+    for s, nb in enumerate(nbs):
+        a = np.repeat(types[:, :, None], nb.shape[1], axis=2)
+        b = types[:, nb]
+        idx = (np.arange(C)[:, None, None] * k + a) * k + b
+        out[:, s] = np.bincount(idx.ravel(), minlength=C * k * k).reshape(C, k, k)
+    return out
+
+def warren_cowley(counts_ab, conc, z, n):
+    """α[c, s, A, B] from pair counts; NaN for absent species."""
+    cc = np.outer(conc, conc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1.0 - counts_ab / (n * np.asarray(z, dtype=float)[None, :, None, None] * cc)
+
+def objective(alpha, weights, present):
+    a = np.where(present[None, None], alpha, 0.0)
+    return np.einsum("csab,s->c", a**2, weights)
+
+# ------------------ Annealing ------------------
+def optimize(atoms, counts, n_chains=N_CHAINS, n_shells=N_SHELLS, steps=N_STEPS,
+             rng=None, t0=1e-3, t1=1e-6, nbs=None):
+    """SA over swaps in n_chains parallel chains.
+
+    Returns (types, obj): the best 0-based type array of every chain, sorted by
+    objective (best first), and their objective values.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    counts = np.asarray(counts)
+    n, k = int(counts.sum()), len(counts)
+    nbs = shells(atoms, n_shells) if nbs is None else nbs
+    base = np.repeat(np.arange(k, dtype=np.int64), counts)
+    T = np.stack([rng.permutation(base) for _ in range(n_chains)])
+    if (counts > 0).sum() < 2:
+        return T, np.zeros(n_chains)
+
+    S = len(nbs)
+    z = np.array([nb.shape[1] for nb in nbs])
+    conc = counts / n
+    present = np.outer(counts > 0, counts > 0)
+    w = 1.0 / np.arange(1, S + 1)
+    N = pair_counts(T, nbs, k)
+    obj = objective(warren_cowley(N, conc, z, n), w, present)
+    best, best_obj = T.copy(), obj.copy()
+
+    C = n_chains
+    rows = np.arange(C)
+    temps = t0 * (t1 / t0) ** (np.arange(steps) / max(1, steps - 1))
+    flat = (rows[:, None] * S + np.arange(S)[None, :]) * k * k  # (C, S) offsets into ΔN
+
+    for step in range(steps):
+        i = rng.integers(n, size=C)
+        j = rng.integers(n, size=C)
+        a, b = T[rows, i], T[rows, j]
+        live = a != b
+        if not live.any():
+            continue
+
+        idx, wgt = [], []
+        for s, nb in enumerate(nbs):
+            for ctr, oth, old, new in ((i, j, a, b), (j, i, b, a)):
+                nbr = nb[ctr]                              # (C, z_s)
+                t = T[rows[:, None], nbr]
+                m = (nbr != oth[:, None]) & live[:, None]  # the i–j pair itself is unchanged
+                t, off = t[m], np.broadcast_to(flat[:, s, None], m.shape)[m]
+                o, nw = np.broadcast_to(old[:, None], m.shape)[m], np.broadcast_to(new[:, None], m.shape)[m]
+                idx += [off + o * k + t, off + t * k + o, off + nw * k + t, off + t * k + nw]
+                wgt += [-1.0, -1.0, 1.0, 1.0]
+        sizes = [len(x) for x in idx]
+        dN = np.bincount(np.concatenate(idx), np.repeat(wgt, sizes), minlength=C * S * k * k)
+        N_new = N + dN.reshape(C, S, k, k)
+        obj_new = objective(warren_cowley(N_new, conc, z, n), w, present)
+
+        d = obj_new - obj
+        acc = live & ((d <= 0) | (rng.random(C) < np.exp(-np.maximum(d, 0) / temps[step])))
+        if acc.any():
+            r = rows[acc]
+            T[r, i[acc]], T[r, j[acc]] = b[acc], a[acc]
+            N[acc], obj[acc] = N_new[acc], obj_new[acc]
+            imp = obj < best_obj
+            if imp.any():
+                best[imp], best_obj[imp] = T[imp], obj[imp]
+
+    order = np.argsort(best_obj)
+    return best[order], best_obj[order]
+
+def main():
+    import generate
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--steps", type=int, default=N_STEPS)
+    ap.add_argument("--chains", type=int, default=N_CHAINS)
+    ap.add_argument("--shells", type=int, default=N_SHELLS)
+    ap.add_argument("--seed", type=int, default=generate.SEED)
+    args = ap.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    for phase in ("fcc", "hcp"):
+        atoms = generate.lattice(phase)
+        nbs = shells(atoms, args.shells)
+        z = np.array([nb.shape[1] for nb in nbs])
+        for comp in (generate.COMPOSITIONS[13], generate.COMPOSITIONS[19], generate.COMPOSITIONS[4]):
+            cnt = generate.species_counts(len(atoms), [comp[el] for el in generate.LABELS])
+            conc, present = cnt / len(atoms), np.outer(cnt > 0, cnt > 0)
+            t = time.time()
+            types, _ = optimize(atoms, cnt, args.chains, steps=args.steps, rng=rng, nbs=nbs)
+            dt = time.time() - t
+            rand = np.stack([rng.permutation(np.repeat(np.arange(3), cnt)) for _ in range(args.chains)])
+            mean_abs = lambda T: np.abs(warren_cowley(pair_counts(T, nbs, 3), conc, z, len(atoms))[:, :, present]).mean()
+            print(f"✓ {generate.fname_base(phase, comp)}: mean |α| random = {mean_abs(rand):.4f}  "
+                  f"SQS = {mean_abs(types):.4f}  ({args.chains} chains, {dt:.1f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ternary surrogate for Co–Fe–Ni property maps (γISF, γESF, γTwin, …).
+
+One RBFInterpolator (multiquadric, same shape parameter as the legacy
+scipy Rbf default, optional neighbour limit) is fitted per temperature for all
+properties at once: the values are an (n, n_props) array. Fitted models are
+pickled to work/ternary/<hash>.pkl, keyed on the data and settings, so
+regenerating figures never refits. Grids are evaluated in chunks and only at
+points inside the triangle.
+
+    Xi, Yi, Z = surface(dfT, ["γISF", "γESF", "γTwin"], n=2000)   # Z[prop] masked (n, n)
+"""
+
+import os, pickle, hashlib
+import numpy as np
+import scipy
+from scipy.interpolate import RBFInterpolator
+
+ROOT      = os.path.abspath(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(ROOT, "work", "ternary")
+PROPS     = ["γISF", "γESF", "γTwin"]
+NEIGHBORS = 50       # local fit beyond this many points
+CHUNK     = 200_000  # grid points per evaluation call
+H         = np.sqrt(3) / 2.0
+
+_models = {}
+
+# ------------------ Geometry ------------------
+def barycentric(Co, Fe, Ni):
+    s = Co + Fe + Ni
+    x = 0.5 * (2 * Fe + Ni) / s
+    y = H * Ni / s
+    return x, y
+
+def inside(x, y, tol=1e-12):
+    return (y >= -tol) & (y <= np.sqrt(3) * np.minimum(x, 1 - x) + tol)
+
+def triangle_grid(n):
+    """n×n mesh over the triangle's bounding box and its inside mask."""
+    Xi, Yi = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, H, n))
+    return Xi, Yi, inside(Xi, Yi)
+
+# ------------------ Fit ------------------
+def rbf_epsilon(xy):
+    """Inverse of scipy.interpolate.Rbf's default epsilon (mean node spacing)."""
+    edges = np.ptp(xy, axis=0)
+    edges = edges[edges > 0]
+    return 1.0 / np.power(np.prod(edges) / len(xy), 1.0 / edges.size)
+
+class Surrogate:
+    """Vector-valued RBF model on the ternary plane."""
+
+    def __init__(self, xy, values, props, neighbors=NEIGHBORS):
+        self.props = list(props)
+        nb = neighbors if neighbors and neighbors < len(xy) else None
+        self.model = RBFInterpolator(xy, values, kernel="multiquadric",
+                                     epsilon=rbf_epsilon(xy), neighbors=nb)
+
+    def __call__(self, x, y):
+        """Values at points (x, y) → (m, n_props)."""
+        pts = np.column_stack([np.ravel(x), np.ravel(y)])
+        out = np.empty((len(pts), len(self.props)))
+        for c0 in range(0, len(pts), CHUNK):
+            out[c0:c0 + CHUNK] = self.model(pts[c0:c0 + CHUNK])
+        return out
+
+def data_points(dfT, props):
+    d = dfT.dropna(subset=list(props))
+    x, y = barycentric(d["Co"].values, d["Fe"].values, d["Ni"].values)
+    xy, vals = np.column_stack([x, y]), d[list(props)].to_numpy(dtype=float)
+    # replicas / duplicate compositions → mean (RBF needs distinct nodes)
+    key = np.round(xy, 9)
+    uniq, inv = np.unique(key, axis=0, return_inverse=True)
+    inv = inv.ravel()
+    mean = np.zeros((len(uniq), vals.shape[1]))
+    np.add.at(mean, inv, vals)
+    mean /= np.bincount(inv)[:, None]
+    return uniq, mean
+
+def fit(dfT, props=PROPS, neighbors=NEIGHBORS, model_dir=MODEL_DIR):
+    """Surrogate for one temperature's rows; memoized in memory and on disk."""
+    xy, vals = data_points(dfT, props)
+    h = hashlib.sha256()
+    for part in (xy.tobytes(), vals.tobytes(), repr((list(props), neighbors, scipy.__version__)).encode()):
+        h.update(part)
+    key = h.hexdigest()[:20]
+    if key in _models:
+        return _models[key]
+
+    path = os.path.join(model_dir, f"{key}.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as fh:
+            model = pickle.load(fh)
+    else:
+        model = Surrogate(xy, vals, props, neighbors)
+        os.makedirs(model_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(model, fh)
+        os.replace(tmp, path)
+    _models[key] = model
+    return model
+
+def surface(dfT, props=PROPS, n=300, neighbors=NEIGHBORS):
+    """(Xi, Yi, {prop: masked (n, n) array}), evaluated inside the triangle only."""
+    model = fit(dfT, props, neighbors)
+    Xi, Yi, mask = triangle_grid(n)
+    vals = model(Xi[mask], Yi[mask])
+    Z = {}
+    for k, p in enumerate(model.props):
+        z = np.full(Xi.shape, np.nan)
+        z[mask] = vals[:, k]
+        Z[p] = np.ma.array(z, mask=~mask)
+    return Xi, Yi, Z
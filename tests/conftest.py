@@ -0,0 +1,4 @@
+import os, sys
+
+# the scripts are flat top-level modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
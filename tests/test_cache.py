@@ -0,0 +1,31 @@
+"""cache.py: an entry whose dump was evicted is a miss until a rerun puts the dump back."""
+
+import os
+
+import cache
+
+def job(tmp_path, name):
+    d = tmp_path / name
+    d.mkdir()
+    (d / "log").write_text("FINAL_PE_PERATOM = -4.4\n")
+    (d / "final_fcc_100K.data").write_bytes(b"x" * 1000)
+    (d / "monitor_100K.json").write_text("{}")
+    return str(d / "log"), [str(d / "final_fcc_100K.data"), str(d / "monitor_100K.json")]
+
+def test_restore_after_eviction(tmp_path):
+    c = cache.Cache(str(tmp_path / "cache"))
+    log, files = job(tmp_path, "run")
+    assert c.put("ab" * 32, log, files, meta={"tag": "t"})
+    out = tmp_path / "out"
+    assert c.restore("ab" * 32, str(tmp_path / "a.log"), str(out))
+    assert sorted(os.listdir(out)) == ["final_fcc_100K.data", "monitor_100K.json"]
+
+    assert c.evict(0) == 1000
+    assert c.get("ab" * 32)                                   # log and meta are kept ...
+    out2 = tmp_path / "out2"
+    assert not c.restore("ab" * 32, str(tmp_path / "b.log"), str(out2))    # ... but it is a miss
+    assert not out2.exists() and not (tmp_path / "b.log").exists()
+
+    assert not c.put("ab" * 32, log, files)                   # the rerun refills the dump
+    assert c.restore("ab" * 32, str(tmp_path / "b.log"), str(out2))
+    assert (out2 / "final_fcc_100K.data").stat().st_size == 1000
@@ -0,0 +1,75 @@
+"""lmpworker.py on MockLammps: variable ownership across jobs, error recovery, run_library plumbing."""
+
+import os, json
+
+import pytest
+
+import lmpworker
+from lmpworker import Job, MockLammps, Worker
+
+DECK = """variable NX index 8
+variable NY index 8
+read_data ${DATA}
+"""
+
+@pytest.fixture
+def data(tmp_path):
+    df = tmp_path / "fcc_Co0.00_Fe0.00_Ni1.00.data"
+    df.write_text("# fake\n\n256 atoms\n3 atom types\n")
+    deck = tmp_path / "in.fcc.lmp"
+    deck.write_text(DECK)
+    return str(df), str(deck)
+
+def test_reset_deletes_owned_variables(data):
+    df, deck = data
+    w = Worker(MockLammps)
+    r = w.run(lmpworker.deck_job("a", deck, {"DATA": df, "NX": 12}))
+    assert r["ok"] and r["results"]["natoms"] == 256
+    assert w.lmp.variables == {"DATA": df, "NX": "12", "NY": "8"}
+    assert w.owned == ["DATA", "NX"]
+
+    w.reset()
+    assert w.owned == [] and "NX" not in w.lmp.variables and "DATA" not in w.lmp.variables
+    assert w.lmp.variables == {"NY": "8"}    # the deck's own default survives `clear`, as in LAMMPS
+
+def test_job_vars_do_not_leak_into_next_job(data):
+    df, deck = data
+    w = Worker(MockLammps)
+    w.run(lmpworker.deck_job("a", deck, {"DATA": df, "NX": 12}))
+    r = w.run(lmpworker.deck_job("b", deck, {"DATA": df}))
+    assert r["ok"] and r["served"] == 1
+    assert w.lmp.variables["NX"] == "8"
+
+def test_error_replaces_instance(data):
+    df, _ = data
+    w = Worker(MockLammps)
+    first = w.lmp
+    r = w.run(Job("bad", vars={"X": 1}, commands=["run 0"]))
+    assert not r["ok"] and "before simulation box" in r["error"]
+    assert w.lmp is not first and w.owned == []
+    r = w.run(lmpworker.static_job("good", df))
+    assert r["ok"] and r["results"]["pe"] == pytest.approx(MockLammps.PE_PERATOM * 256)
+
+def test_deck_job_log(data, tmp_path):
+    df, deck = data
+    log = tmp_path / "a.log"
+    r = Worker(MockLammps).run(lmpworker.deck_job("a", deck, {"DATA": df}, log=str(log)))
+    assert r["ok"] and r["results"]["PE_PERATOM"] == MockLammps.PE_PERATOM
+    assert "FINAL_PE_PERATOM" in log.read_text()
+
+def test_mock_run_library_stays_in_its_dirs(data, tmp_path):
+    import run_all
+    df, deck = data
+    out = {"ledger_path": str(tmp_path / "jobs.jsonl"), "log_dir": str(tmp_path / "logs"),
+           "res_dir": str(tmp_path / "results"), "metrics_path": str(tmp_path / "metrics.jsonl")}
+    os.makedirs(out["log_dir"])
+    jobs = [("fcc", df, T, deck) for T in (100, 350)]
+
+    assert run_all.run_library(jobs, 1, MockLammps, **out)[:2] == (2, 2)
+    assert sorted(os.listdir(out["log_dir"])) == ["fcc_Co0.00_Fe0.00_Ni1.00_100K.log",
+                                                  "fcc_Co0.00_Fe0.00_Ni1.00_350K.log"]
+    assert os.path.isdir(os.path.join(out["res_dir"], "fcc_Co0.00_Fe0.00_Ni1.00"))
+    with open(out["metrics_path"]) as fh:
+        assert {json.loads(l)["tag"] for l in fh} == {"fcc_Co0.00_Fe0.00_Ni1.00_100K",
+                                                      "fcc_Co0.00_Fe0.00_Ni1.00_350K"}
+    assert run_all.Ledger(out["ledger_path"]).done("fcc_Co0.00_Fe0.00_Ni1.00_350K")
@@ -0,0 +1,125 @@
+"""run_all.py scheduler against a fake LMP: ledger resume, retry accounting, core pinning."""
+
+import os, json, stat, sys, functools
+
+import pytest
+
+import metrics
+import run_all
+
+FAKE_LMP = """#!{python}
+import os, sys
+a = sys.argv
+v = {{a[i + 1]: a[i + 2] for i in range(len(a) - 2) if a[i] == "-var"}}
+assert a[a.index("-log") + 1] == "none"       # concurrent jobs must not share ./log.lammps
+tag = os.path.basename(v["DATA"])[:-len(".data")] + "_" + v["TEMP"] + "K"
+calls = os.path.join({calls!r}, tag)
+n = os.path.getsize(calls) if os.path.exists(calls) else 0     # earlier launches of this job
+open(calls, "a").write("x")
+if tag in os.environ.get("FAKE_FAIL", "").split(",") and n < int(os.environ.get("FAKE_FAILS", "1")):
+    sys.exit(1)
+if os.path.exists("/proc/self/status"):
+    print([l for l in open("/proc/self/status") if l.startswith("Cpus_allowed_list")][0].strip())
+print("FINAL_STRUCT =", v["STRUCT"])
+print("FINAL_TEMP =", v["TEMP"])
+print("FINAL_PE_PERATOM = -4.4")
+"""
+
+TEMPS = (100, 350)
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch):
+    calls = tmp_path / "calls"
+    calls.mkdir()
+    lmp = tmp_path / "lmp"
+    lmp.write_text(FAKE_LMP.format(python=sys.executable, calls=str(calls)))
+    lmp.chmod(lmp.stat().st_mode | stat.S_IXUSR)
+    for d in ("logs", "results", "data"):
+        (tmp_path / d).mkdir()
+    df = tmp_path / "data" / "fcc_Co0.00_Fe0.00_Ni1.00.data"
+    df.write_text("fake\n")
+
+    monkeypatch.setattr(run_all, "LMP", str(lmp))
+    monkeypatch.setattr(run_all, "LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(run_all, "RES_DIR", str(tmp_path / "results"))
+    monkeypatch.setattr(metrics, "record", functools.partial(metrics.record, path=str(tmp_path / "metrics.jsonl")))
+    jobs = [("fcc", str(df), T, str(tmp_path / "in.fcc.lmp")) for T in TEMPS]
+    return tmp_path, jobs, str(tmp_path / "jobs.jsonl")
+
+def launches(tmp_path):
+    return {p.name: p.stat().st_size for p in (tmp_path / "calls").iterdir()}
+
+def ledger_lines(path):
+    with open(path) as fh:
+        return [json.loads(l) for l in fh if l.strip()]
+
+def test_resume_after_killed_job(sweep):
+    tmp_path, jobs, ledger = sweep
+    done, killed = (run_all.job_tag(j[1], j[2]) for j in jobs)
+    with open(ledger, "w") as fh:      # first job finished, second was killed while running (torn last line)
+        fh.write(json.dumps({"tag": done, "state": "done", "attempt": 1}) + "\n")
+        fh.write(json.dumps({"tag": killed, "state": "running", "attempt": 1}) + "\n")
+        fh.write('{"tag": "' + killed[:5])
+
+    n, n_ok, _ = run_all.run_scheduled(jobs, 2, ledger_path=ledger)
+    assert (n, n_ok) == (1, 1)
+    assert launches(tmp_path) == {killed: 1}
+    led = run_all.Ledger(ledger)
+    assert led.done(done) and led.done(killed)
+    assert led.state[killed]["final"]["FINAL_TEMP"] == str(TEMPS[1])
+
+    assert run_all.run_scheduled(jobs, 2, ledger_path=ledger)[:2] == (0, 0)    # nothing left to do
+
+def test_retry_accounting(sweep, monkeypatch):
+    tmp_path, jobs, ledger = sweep
+    flaky, good = (run_all.job_tag(j[1], j[2]) for j in jobs)
+    monkeypatch.setenv("FAKE_FAIL", flaky)
+    monkeypatch.setenv("FAKE_FAILS", "1")
+
+    n, n_ok, _ = run_all.run_scheduled(jobs, 1, ledger_path=ledger, retries=1)
+    assert (n, n_ok) == (2, 2)
+    assert launches(tmp_path) == {flaky: 2, good: 1}
+    trail = [(r["state"], r["attempt"]) for r in ledger_lines(ledger) if r["tag"] == flaky]
+    assert trail == [("running", 1), ("failed", 1), ("running", 2), ("done", 2)]
+
+def test_retries_exhausted_then_resumed(sweep, monkeypatch):
+    tmp_path, jobs, ledger = sweep
+    flaky = run_all.job_tag(jobs[0][1], jobs[0][2])
+    monkeypatch.setenv("FAKE_FAIL", flaky)
+    monkeypatch.setenv("FAKE_FAILS", "2")
+
+    assert run_all.run_scheduled(jobs, 1, ledger_path=ledger, retries=1)[:2] == (2, 1)
+    assert run_all.Ledger(ledger).state[flaky]["state"] == "failed"
+    assert run_all.run_scheduled(jobs, 1, ledger_path=ledger, retries=1)[:2] == (1, 1)   # only the failed job
+    assert launches(tmp_path)[flaky] == 3
+
+def test_core_blocks(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(run_all, "TASKSET", "/usr/bin/taskset")
+    assert run_all.core_blocks(2, 4) == [{0, 1, 2, 3}, {4, 5, 6, 7}]
+    assert run_all.core_blocks(3, 4) == [None] * 3
+    assert run_all.pinned(["lmp", "-in", "x"], {5, 4}) == ["/usr/bin/taskset", "-c", "4,5", "lmp", "-in", "x"]
+    assert run_all.pinned(["lmp"], None) == ["lmp"]
+
+    monkeypatch.setattr(run_all, "TASKSET", None)
+    assert run_all.core_blocks(2, 4) == [None, None]
+
+@pytest.mark.skipif(run_all.TASKSET is None or not os.path.exists("/proc/self/status"),
+                    reason="needs taskset and /proc")
+def test_pinned_sweep(sweep):
+    tmp_path, jobs, ledger = sweep
+    cpu = min(os.sched_getaffinity(0))
+    assert run_all.run_scheduled(jobs, 1, pin=True, ledger_path=ledger)[:2] == (2, 2)
+    assert {tuple(r["cores"]) for r in ledger_lines(ledger) if r["state"] == "running"} == {(cpu,)}
+    for j in jobs:
+        log = tmp_path / "logs" / f"{run_all.job_tag(j[1], j[2])}.log"
+        assert f"Cpus_allowed_list:\t{cpu}" in log.read_text()
+
+def test_stale_sentinels_removed_before_launch(sweep):
+    tmp_path, jobs, ledger = sweep
+    outd = tmp_path / "results" / "fcc_Co0.00_Fe0.00_Ni1.00"
+    outd.mkdir()
+    for stage in ("npt", "nvt"):
+        (outd / f"{stage}_{TEMPS[0]}K.converged").touch()    # left behind by a crashed monitored run
+    assert run_all.run_one(*jobs[0])[0]
+    assert not list(outd.glob("*.converged"))
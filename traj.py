@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming structure analysis of the NVT trajectories (run_all.py --dump N).
+
+Each binary dump (work/results/<base>/traj_<T>K.bin, `id type x y z`, sorted
+by id) is first packed into three memory-mappable .npy files:
+
+    traj_<T>K.xyz.npy     (frames, atoms, 3) uint16 fractional coordinates (L/65536 ≈ 2e-4 Å)
+    traj_<T>K.types.npy   (frames, atoms)    uint8 types (per frame: atom/swap changes them)
+    traj_<T>K.box.npy     (frames, 3)        box lengths (Å)
+
+That is 7 bytes per atom and frame instead of the dump's 40.
+
+The analyzer then reads the packed frames in chunks, so memory stays
+constant whatever the trajectory length. Per frame, pairs come from one
+Verlet list (reused while atoms stay within the skin), and each chunk is
+histogrammed by (type pair, r bin) in a single bincount. That gives partial
+g_ab(r) and the coordination numbers CN_ab up to the first minimum of the
+total g(r). Ashcroft–Langreth partial structure factors S_ab(q), and the total
+S(q), come from the type densities ρ_a(q) = Σ exp(iq·r) on the box's
+reciprocal lattice (|q| ≤ Q_MAX). The sum is separable, so it is one matrix
+product per block of atoms.
+
+Runs are analysed in parallel. The per-run scalars are merged into the runs
+table of the harvest store by tag, next to the energies and lattice vectors:
+the first g(r) peak, the first Bragg peak of S(q), CN_ab and the frame count.
+The curves become the store's `rdf` and `sq` tables.
+
+    python run_all.py --workers 16 --dump 1000
+    python traj.py                        # work/results/*/traj_*K.bin
+    python traj.py path/to/traj_350K.bin -j 8 --every 2
+
+Outputs:
+    traj_results.csv   tag,n_frames,r1,g1,r_min,CN,CN_CoCo,…,q1,S1
+"""
+
+import os, re, glob, time, struct, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import generate
+import harvest
+from fingerprint import RES_DIR
+from neighbor import NeighborList
+
+# ------------------ Settings ----------------
+R_MAX = 6.0           # Å, below half the smallest box length
+DR = 0.02             # Å
+Q_MAX = 8.0           # 1/Å
+DQ = 0.05             # 1/Å
+CHUNK = 32            # frames per read from the memory map
+ATOM_BLOCK = 4096     # atoms per ρ(q) matrix product
+SKIN = 0.5            # Å, Verlet skin between frames
+SCALE = 65536         # fractional-coordinate quantization
+BRAGG = 5.0           # S(q) above this marks a Bragg reflection; q1 is the first one
+
+TRAJ_RE = re.compile(r"traj_([0-9]+)K\.bin$")
+PAIRS = [(a, b) for a in range(len(generate.LABELS)) for b in range(a, len(generate.LABELS))]
+
+# ------------------ Binary dump ------------------
+def _unpack(fh, fmt):
+    size = struct.calcsize(fmt)
+    raw = fh.read(size)
+    if len(raw) < size:
+        raise EOFError
+    return struct.unpack(fmt, raw)
+
+def dump_frames(path, skip=False):
+    """Frames of a LAMMPS binary dump → (step, lo, lengths, natoms, columns, (N, size_one) array or None if `skip`)."""
+    with open(path, "rb") as fh:
+        while True:
+            try:
+                step, = _unpack(fh, "<q")
+            except EOFError:
+                return
+            revision = 1
+            if step < 0:                                   # magic string, endian flag, revision
+                fh.read(-step)
+                _, revision = _unpack(fh, "<ii")
+                step, = _unpack(fh, "<q")
+            natoms, triclinic = _unpack(fh, "<qi")
+            if triclinic:
+                raise ValueError(f"{path}: triclinic dumps are not supported")
+            fh.read(24)                                    # boundary flags
+            lo_hi = np.array(_unpack(fh, "<6d"))
+            size_one, = _unpack(fh, "<i")
+            columns = "id type x y z"
+            if revision > 1:                               # units, time, column names
+                n, = _unpack(fh, "<i")
+                fh.read(n)
+                if fh.read(1) != b"\0":
+                    fh.read(8)
+                n, = _unpack(fh, "<i")
+                columns = fh.read(n).decode()
+            nchunk, = _unpack(fh, "<i")
+            parts = []
+            for _ in range(nchunk):
+                n, = _unpack(fh, "<i")
+                if skip:
+                    fh.seek(8 * n, 1)
+                else:
+                    parts.append(np.fromfile(fh, dtype="<f8", count=n))
+            data = None if skip else np.concatenate(parts).reshape(natoms, size_one)
+            yield step, lo_hi[0::2], lo_hi[1::2] - lo_hi[0::2], natoms, columns.split(), data
+
+def packed(path):
+    """Prefix of the packed .npy files of a dump."""
+    return path[:-len(".bin")] if path.endswith(".bin") else path
+
+def pack(path, every=1):
+    """Binary dump → <stem>.xyz/.types/.box.npy (headers pass, then one frame at a time)."""
+    prefix = packed(path)
+    natoms = [f[3] for f in dump_frames(path, skip=True)][::every]
+    if not natoms:
+        raise ValueError(f"{path}: no frames")
+    if len(set(natoms)) > 1:
+        raise ValueError(f"{path}: atom count changes between frames")
+    shape = (len(natoms), natoms[0])
+    xyz = np.lib.format.open_memmap(prefix + ".xyz.tmp.npy", mode="w+", dtype=np.uint16, shape=shape + (3,))
+    types = np.lib.format.open_memmap(prefix + ".types.tmp.npy", mode="w+", dtype=np.uint8, shape=shape)
+    boxes = np.empty((shape[0], 3))
+    frames = (f for m, f in enumerate(dump_frames(path)) if m % every == 0)
+    for k, (_, lo, box, _, cols, data) in enumerate(frames):
+        ix = [cols.index(c) for c in ("id", "type", "x", "y", "z")]
+        data = data[np.argsort(data[:, ix[0]])]
+        frac = np.mod((data[:, ix[2:]] - lo) / box, 1.0)
+        xyz[k] = np.rint(frac * SCALE).astype(np.int64) % SCALE
+        types[k] = data[:, ix[1]]
+        boxes[k] = box
+    xyz.flush()
+    types.flush()
+    del xyz, types
+    for name in ("xyz", "types"):
+        os.replace(f"{prefix}.{name}.tmp.npy", f"{prefix}.{name}.npy")
+    np.save(prefix + ".box.npy", boxes)
+    return prefix
+
+def load(prefix):
+    """Memory-mapped (xyz, types, box) of a packed trajectory."""
+    return (np.load(prefix + ".xyz.npy", mmap_mode="r"), np.load(prefix + ".types.npy", mmap_mode="r"),
+            np.load(prefix + ".box.npy"))
+
+# ------------------ Accumulators ------------------
+def q_grid(box, q_max=Q_MAX):
+    """Integer (h, k, l) ranges of the reciprocal lattice (l ≥ 0: ρ(−q) = ρ(q)*) and |q| on that grid."""
+    m = np.floor(q_max * box / (2 * np.pi)).astype(int)
+    h, k, l = np.arange(-m[0], m[0] + 1), np.arange(-m[1], m[1] + 1), np.arange(0, m[2] + 1)
+    q = 2 * np.pi * np.sqrt((h[:, None, None] / box[0]) ** 2 + (k[None, :, None] / box[1]) ** 2
+                            + (l[None, None, :] / box[2]) ** 2)
+    return (h, k, l), q
+
+def type_densities(frac, types, hkl, n_types):
+    """ρ_a(q) = Σ_{j∈a} exp(2πi (h x + k y + l z)) → (n_types, H, K, L), in blocks of ATOM_BLOCK atoms."""
+    h, k, l = hkl
+    rho = np.zeros((n_types, len(h) * len(k), len(l)), dtype=complex)
+    for s in range(0, len(frac), ATOM_BLOCK):
+        f, t = frac[s:s + ATOM_BLOCK], types[s:s + ATOM_BLOCK]
+        ex, ey, ez = (np.exp(2j * np.pi * np.outer(f[:, d], v)) for d, v in enumerate((h, k, l)))
+        exy = (ex[:, :, None] * ey[:, None, :]).reshape(len(f), -1)
+        for a in range(n_types):
+            sel = t == a
+            if sel.any():
+                rho[a] += exy[sel].T @ ez[sel]
+    return rho.reshape(n_types, len(h), len(k), len(l))
+
+# ------------------ Per run ------------------
+def analyse(prefix, r_max=R_MAX, dr=DR, q_max=Q_MAX, dq=DQ, chunk=CHUNK):
+    """Partial g(r), CN and S(q) of one packed trajectory → (scalars, rdf frame, sq frame)."""
+    xyz, types, boxes = load(prefix)
+    n_frames, n = types.shape
+    nt = len(generate.LABELS)
+    if r_max >= 0.5 * boxes.min():
+        raise ValueError(f"{prefix}: r_max {r_max} Å ≥ half the box ({boxes.min():.2f} Å)")
+    nr, nq = int(round(r_max / dr)), int(round(q_max / dq))
+    hist = np.zeros(nt * nt * nr)
+    sq_sum, sq_cnt = np.zeros((nt, nt, nq)), np.zeros(nq)
+    counts = np.zeros(nt)
+    volume = 0.0
+    nl = NeighborList(r_max, skin=SKIN)
+    grid = None
+    for s in range(0, n_frames, chunk):
+        X = np.asarray(xyz[s:s + chunk], dtype=float) / SCALE
+        T = np.asarray(types[s:s + chunk], dtype=np.int64) - 1
+        keys = []
+        for f in range(len(X)):
+            box = boxes[s + f]
+            cell = np.diag(box)
+            pos = X[f] * box
+            nl.update(pos, cell)
+            i, j, d, _ = nl.pairs(pos, cell)
+            keys.append((T[f, i] * nt + T[f, j]) * nr + np.minimum((d / dr).astype(np.int64), nr - 1))
+            counts += np.bincount(T[f], minlength=nt)
+            volume += box.prod()
+
+            if grid is None or not np.allclose(grid[0], box):
+                hkl, q = q_grid(box, q_max)
+                qbin = np.minimum((q / dq).astype(np.int64), nq)
+                qbin[(q == 0) | (q > q_max)] = nq            # outside: dropped
+                grid = (box.copy(), hkl, qbin.ravel())
+            _, hkl, qb = grid
+            rho = type_densities(X[f], T[f], hkl, nt).reshape(nt, -1)
+            cross = (rho[:, None, :] * rho[None, :, :].conj()).real      # (a, b, q)
+            for a in range(nt):
+                for b in range(nt):
+                    sq_sum[a, b] += np.bincount(qb, weights=cross[a, b], minlength=nq + 1)[:nq]
+            sq_cnt += np.bincount(qb, minlength=nq + 1)[:nq]
+        hist += np.bincount(np.concatenate(keys), minlength=nt * nt * nr)
+
+    hist = hist.reshape(nt, nt, nr)
+    N_a = counts / n_frames
+    V = volume / n_frames
+    r = (np.arange(nr) + 0.5) * dr
+    shell = 4 / 3 * np.pi * ((r + dr / 2) ** 3 - (r - dr / 2) ** 3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = hist / (n_frames * N_a[:, None, None] * N_a[None, :, None] / V * shell)
+        g_tot = hist.sum(axis=(0, 1)) / (n_frames * n * n / V * shell)
+        S_ab = sq_sum / (sq_cnt * np.sqrt(np.outer(N_a, N_a))[:, :, None])
+        S = sq_sum.sum(axis=(0, 1)) / (sq_cnt * n)
+
+    # coordination shell: first minimum of g(r) between the first peak and 1.35 × its position
+    p1 = int(np.argmax(g_tot))
+    seg = np.flatnonzero(r <= 1.35 * r[p1])
+    m1 = p1 + int(np.argmin(g_tot[p1:seg[-1] + 1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cn = hist[:, :, :m1].sum(axis=2) / (n_frames * N_a[:, None])
+    ok = sq_cnt > 0
+    bragg = np.flatnonzero(ok & (S > BRAGG))
+    k1 = int(bragg[0]) if len(bragg) else int(np.nanargmax(np.where(ok, S, np.nan)))
+    q = (np.arange(nq) + 0.5) * dq
+
+    labels = generate.LABELS
+    row = {"n_frames": n_frames, "r1": r[p1], "g1": g_tot[p1], "r_min": r[m1],
+           "CN": hist[:, :, :m1].sum() / (n_frames * n), "q1": q[k1], "S1": S[k1]}
+    row.update({f"CN_{labels[a]}{labels[b]}": cn[a, b] for a in range(nt) for b in range(nt)})
+    rdf = pd.DataFrame({"r": r, "g": g_tot, **{f"g_{labels[a]}{labels[b]}": g[a, b] for a, b in PAIRS}})
+    sq = pd.DataFrame({"q": q, "S": S, **{f"S_{labels[a]}{labels[b]}": S_ab[a, b] for a, b in PAIRS}})[ok]
+    return row, rdf, sq.reset_index(drop=True)
+
+def run_tag(path):
+    m = TRAJ_RE.search(os.path.basename(path))
+    return f"{os.path.basename(os.path.dirname(path))}_{m.group(1) if m else -1}K"
+
+def _job(args):
+    path, every, repack = args
+    t0 = time.time()
+    prefix = packed(path)
+    if repack or not os.path.exists(prefix + ".box.npy") or os.path.getmtime(prefix + ".box.npy") < os.path.getmtime(path):
+        pack(path, every)
+    row, rdf, sq = analyse(prefix)
+    tag = run_tag(path)
+    return {"tag": tag, **row}, rdf.assign(tag=tag), sq.assign(tag=tag), time.time() - t0
+
+# ------------------ Store ------------------
+def store_curves(tables, name, df):
+    """Replace the rows of df's tags in a long-form store table."""
+    old = tables.get(name, pd.DataFrame())
+    if len(old):
+        old = old[~old["tag"].isin(set(df["tag"]))]
+    tables[name] = pd.concat([old, df], ignore_index=True)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="traj_*K.bin dumps (default: work/results/*/traj_*K.bin)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--every", type=int, default=1, help="pack every k-th frame")
+    ap.add_argument("--repack", action="store_true", help="re-pack even if the .npy files are up to date")
+    ap.add_argument("--out", default="traj_results.csv")
+    ap.add_argument("--no-store", action="store_true", help="do not merge into the harvest store")
+    args = ap.parse_args()
+
+    paths = sorted(args.paths or glob.glob(os.path.join(RES_DIR, "*", "traj_*K.bin")))
+    if not paths:
+        print("❌ No traj_*K.bin dumps found (run_all.py --dump N).")
+        return
+    t0 = time.time()
+    rows, rdfs, sqs = [], [], []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for row, rdf, sq, dt in pool.map(_job, [(p, args.every, args.repack) for p in paths]):
+            rows.append(row)
+            rdfs.append(rdf)
+            sqs.append(sq)
+            print(f"✓ {row['tag']}: {row['n_frames']} frames, r1 = {row['r1']:.3f} Å, CN = {row['CN']:.2f}, "
+                  f"q1 = {row['q1']:.2f} 1/Å  ({dt:.1f} s)")
+    df = pd.DataFrame(rows)
+    df.to_csv(args.out, index=False)
+
+    if not args.no_store:
+        harvest.update_runs(df)
+        tables = harvest.load_store()
+        store_curves(tables, "rdf", pd.concat(rdfs, ignore_index=True))
+        store_curves(tables, "sq", pd.concat(sqs, ignore_index=True))
+        harvest.save_store(tables)
+    print(f"✅ {len(df)} trajectories in {time.time() - t0:.1f} s → {args.out}")
+
+if __name__ == "__main__":
+    main()